@@ -0,0 +1,56 @@
+import argparse
+import dbn_cache
+import fetch
+import instrumentation
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Descargar historias largas al caché por bloques en paralelo (se reanuda si se corta)"
+    )
+    parser.add_argument("roots", nargs="*", default=fetch.DEFAULT_ROOTS,
+                        help="Raíces a descargar (por defecto: %(default)s)")
+    parser.add_argument("--ranks", type=int, default=6, help="Posiciones de la curva por raíz (c.0 ... c.N-1)")
+    parser.add_argument("--schema", default="ohlcv-1m", help="Schema a descargar")
+    parser.add_argument("--start", default="2010-06-06", help="Fecha inicial")
+    parser.add_argument("--end", default="2025-10-23", help="Fecha final (exclusiva)")
+    parser.add_argument("--chunk-days", type=int, default=dbn_cache.CHUNK_DAYS, help="Días por bloque")
+    parser.add_argument("--chunk-symbols", type=int, default=dbn_cache.CHUNK_SYMBOLS, help="Símbolos por bloque")
+    parser.add_argument("--workers", type=int, default=dbn_cache.BACKFILL_WORKERS, help="Descargas simultáneas")
+    parser.add_argument("--retries", type=int, default=dbn_cache.RETRIES, help="Reintentos por bloque")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    symbols = [f"{root}.c.{rank}" for root in args.roots for rank in range(args.ranks)]
+
+    print(f"📥 BACKFILL {args.schema} - {', '.join(args.roots)} ({len(symbols)} contratos continuos)")
+    print(f"   {args.start} → {args.end}, bloques de {args.chunk_days} días x {args.chunk_symbols} símbolos")
+    print("="*60)
+
+    with instrumentation.session("backfill", args.report, args.profile) as recorder:
+        try:
+            data = fetch.backfill(
+                dataset="GLBX.MDP3",
+                schema=args.schema,
+                stype_in="continuous",
+                symbols=symbols,
+                start=args.start,
+                end=args.end,
+                chunk_days=args.chunk_days,
+                chunk_symbols=args.chunk_symbols,
+                workers=args.workers,
+                retries=args.retries,
+            )
+        except Exception as e:
+            print(f"❌ {e}")
+            return
+
+        counters = recorder.snapshot()["counters"]
+        print(f"✅ {counters.get('requests', 0)} bloques descargados "
+              f"({counters.get('bytes_fetched', 0) / 1e6:.1f} MB, {counters.get('retries', 0)} reintentos); "
+              f"{counters.get('cache_pieces', 0)} tramos ya estaban en el caché")
+        print(f"💾 {len(data.symbols)} símbolos listos en {dbn_cache.CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import json
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+import instrumentation
+import memo
+import streaming
+
+# Directorio raíz del almacén columnar
+STORE_DIR = Path(os.getenv('BAR_STORE_DIR', 'bar_store'))
+
+# Columnas de partición: raíz, posición en la curva y mes (YYYY-MM)
+PARTITION_COLUMNS = ["root", "rank", "period"]
+
+# Qué tramos del caché DBN ya se guardaron (pyarrow ignora los archivos con "_")
+_WRITTEN = "_written.json"
+
+_PARTITIONING = ds.partitioning(
+    pa.schema([("root", pa.string()), ("rank", pa.int32()), ("period", pa.string())]),
+    flavor="hive",
+)
+
+# ZC.c.0 -> raíz ZC, regla c, posición 0
+_CONTINUOUS_RE = re.compile(r"^(?P<root>[A-Z0-9]+)\.(?P<roll>[A-Za-z])\.(?P<rank>\d+)$")
+# ZCZ5 -> raíz ZC (contrato individual)
+_OUTRIGHT_RE = re.compile(r"^(?P<root>[A-Z0-9]+?)[FGHJKMNQUVXZ]\d{1,2}$")
+
+
+def split_symbol(symbol):
+    """
+    Separar un símbolo en (raíz, posición)
+
+    Los contratos continuos ZC.c.3 devuelven ("ZC", 3); los contratos
+    individuales como ZCZ5 devuelven ("ZC", -1).
+    """
+    match = _CONTINUOUS_RE.match(symbol)
+    if match:
+        return match.group("root"), int(match.group("rank"))
+
+    match = _OUTRIGHT_RE.match(symbol)
+    if match:
+        return match.group("root"), -1
+
+    return symbol, -1
+
+
+@instrumentation.span("store_write")
+def write_bars(df, dataset="GLBX.MDP3", schema="ohlcv-1d", store_dir=None):
+    """
+    Guardar barras crudas (salida de to_df()) particionadas por raíz, posición y mes
+
+    Las barras nuevas se combinan con las que ya había en las mismas
+    particiones; si una barra (ts_event, symbol) ya existía se reemplaza.
+    """
+    if df is None or df.empty:
+        return
+
+    bars = df.reset_index() if "ts_event" not in df.columns else df.copy()
+    bars = _add_partitions(bars, symbol_col="symbol",
+                           period=bars["ts_event"].dt.strftime("%Y-%m"))
+
+    base = _bars_path(store_dir, dataset, schema)
+
+    # Recuperar lo que ya estaba en las particiones que se van a reescribir
+    touched = bars[PARTITION_COLUMNS].drop_duplicates()
+    existing = _read(base, _partition_filter(touched))
+    if existing is not None and not existing.empty:
+        existing = existing[_in_partitions(existing, touched)]
+        bars = pd.concat([existing, bars], ignore_index=True)
+        bars = bars.drop_duplicates(subset=["ts_event", "symbol"], keep="last")
+
+    bars = bars.sort_values(["ts_event", "symbol"], kind="stable")
+    _write(bars, base)
+
+
+def write_range(data, dataset="GLBX.MDP3", schema="ohlcv-1d", select=None, store_dir=None):
+    """
+    Guardar las barras de get_range (o CompactBars / DataFrame) que todavía no están en el almacén
+
+    Se anota qué se guardó: de get_range, los tramos (símbolo y fechas) de
+    cada archivo del caché DBN, que nunca se reescribe; de barras en memoria,
+    su huella. Repetir una corrida no reescribe nada y ampliar el rango solo
+    escribe lo nuevo. Lo pendiente se lee por bloques y se escribe un mes a
+    la vez, así que cada partición se reescribe una sola vez y en memoria
+    nunca está el rango completo. Lo que no quedó en disco (día en curso) se
+    escribe siempre.
+
+    Args:
+        data: Resultado de fetch.get_range, CompactBars o DataFrame de to_df()
+        select: Función opcional DataFrame -> DataFrame aplicada antes de guardar
+            (por ejemplo descartar spreads); tiene que dar siempre lo mismo
+
+    Returns:
+        Cantidad de barras escritas
+    """
+    base = _bars_path(store_dir, dataset, schema)
+    written = _load_written(base)
+
+    if hasattr(data, "by_file"):
+        parts = [(source, part) for source, part in data.by_file()
+                 if source is None or not _covered(written["files"], source, part.pieces)]
+    else:
+        key = memo.fingerprint(data)
+        parts = [] if key in written["frames"] else [(key, data)]
+
+    records = 0
+    for source, part in parts:
+        with instrumentation.span("store_write_range") as span:
+            for bars in _by_month(_frames(part)):
+                if select is not None:
+                    bars = select(bars)
+                write_bars(bars, dataset=dataset, schema=schema, store_dir=store_dir)
+                records += len(bars)
+                span.add(records=len(bars))
+
+        if source is None:
+            continue
+        if hasattr(part, "pieces"):
+            _add_covered(written["files"], source, part.pieces)
+        else:
+            written["frames"].append(source)
+        _save_written(base, written)
+
+    if not parts:
+        instrumentation.count("store_skips")
+    return records
+
+
+def read_bars(dataset="GLBX.MDP3", schema="ohlcv-1d", root=None, ranks=None,
+              start=None, end=None, symbols=None, columns=None, store_dir=None):
+    """
+    Leer barras crudas del almacén
+
+    Los filtros por raíz, posición y fechas se aplican sobre las particiones
+    (solo se abren los archivos necesarios) y los archivos se leen con
+    memory-map.
+
+    Returns:
+        DataFrame indexado por ts_event como el de to_df(), o None si no hay datos
+    """
+    base = _bars_path(store_dir, dataset, schema)
+    expr = _filter(root, ranks, start, end)
+
+    if start is not None:
+        expr &= ds.field("ts_event") >= _utc(start)
+    if end is not None:
+        expr &= ds.field("ts_event") < _utc(end)
+    if symbols is not None:
+        expr &= ds.field("symbol").isin(list(symbols))
+    if columns is not None:
+        columns = list(dict.fromkeys(["ts_event", *columns]))
+
+    with instrumentation.span("store_read") as span:
+        df = _read(base, expr, columns=columns)
+        if df is None:
+            return None
+        span.add(records=len(df))
+
+    df = df.drop(columns=[c for c in PARTITION_COLUMNS if c in df.columns])
+    return df.sort_values("ts_event", kind="stable").set_index("ts_event")
+
+
+def write_table(df, name, root, store_dir=None):
+    """
+    Guardar una tabla derivada (por ejemplo el análisis mensual) de una raíz
+
+    Reemplaza por completo la versión anterior de la tabla para esa raíz.
+    La posición se toma de la columna symbol/contract/base_contract y el mes
+    de month_year o de month (MM/YY).
+    """
+    if df is None or df.empty:
+        return
+
+    table = df.copy()
+    symbol_col = next((c for c in ("symbol", "contract", "base_contract") if c in table.columns), None)
+
+    if "month_year" in table.columns:
+        period = table["month_year"].astype(str)
+    else:
+        period = pd.to_datetime(table["month"], format="%m/%y").dt.strftime("%Y-%m")
+
+    table = _add_partitions(table, symbol_col=symbol_col, period=period, root=root)
+
+    base = _table_path(store_dir, name)
+    shutil.rmtree(base / f"root={root}", ignore_errors=True)
+    _write(table, base)
+
+
+def read_table(name, root=None, ranks=None, start=None, end=None, columns=None, store_dir=None):
+    """
+    Leer una tabla derivada filtrando por raíz, posición y rango de meses
+
+    Returns:
+        DataFrame con las mismas columnas que se guardaron, o None si no hay datos
+    """
+    df = _read(_table_path(store_dir, name), _filter(root, ranks, start, end), columns=columns)
+    if df is None:
+        return None
+
+    return df.drop(columns=[c for c in PARTITION_COLUMNS if c in df.columns]).reset_index(drop=True)
+
+
+def save_table(df, name, root, csv_path=None, store_dir=None):
+    """
+    Guardar una tabla derivada en el almacén y, opcionalmente, exportarla a CSV
+    """
+    with instrumentation.span("table_write", records=0 if df is None else len(df)):
+        write_table(df, name, root, store_dir=store_dir)
+
+    if csv_path is not None:
+        with instrumentation.span("csv", records=len(df)):
+            df.to_csv(csv_path, index=False)
+
+
+def _add_partitions(df, symbol_col, period, root=None):
+    if symbol_col is not None:
+        parts = df[symbol_col].fillna("").map(split_symbol)
+        df["root"] = root if root is not None else parts.str[0]
+        df["rank"] = parts.str[1].astype("int32")
+    else:
+        df["root"] = root
+        df["rank"] = -1
+        df["rank"] = df["rank"].astype("int32")
+
+    df["period"] = period.to_numpy()
+    return df
+
+
+def _frames(data):
+    # Barras en bloques de a lo sumo CHUNK_SIZE filas con ts_event como columna
+    if hasattr(data, "iter_df"):
+        return streaming.iter_bars(data)
+    if hasattr(data, "iter_frames"):
+        return data.iter_frames()
+    return [data.reset_index() if "ts_event" not in data.columns else data]
+
+
+def _by_month(chunks):
+    # Bloques en orden temporal -> DataFrames que terminan en fin de mes, para
+    # que write_bars no vuelva a reescribir el mismo mes en el bloque siguiente
+    pending = []
+    for chunk in chunks:
+        ts = chunk["ts_event"]
+        months = (ts.dt.year * 12 + ts.dt.month).to_numpy()
+        done = months < months[-1]
+        if done.any():
+            yield pd.concat([*pending, chunk[done]], ignore_index=True)
+            pending = []
+        pending.append(chunk[~done])
+    if pending:
+        yield pd.concat(pending, ignore_index=True)
+
+
+def _load_written(base):
+    path = base / _WRITTEN
+    if not path.exists():
+        return {"files": {}, "frames": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_written(base, written):
+    base.mkdir(parents=True, exist_ok=True)
+    tmp = base / f"{_WRITTEN}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(written, f, sort_keys=True)
+    os.replace(tmp, base / _WRITTEN)
+
+
+def _covered(files, source, pieces):
+    # ¿Cada (símbolo, [lo, hi)) del archivo está dentro de un tramo ya guardado?
+    for _, symbols, lo, hi in pieces:
+        for symbol in symbols:
+            spans = files.get(f"{source}|{symbol}", [])
+            if not any(a <= lo.value and hi.value <= b for a, b in spans):
+                return False
+    return True
+
+
+def _add_covered(files, source, pieces):
+    for _, symbols, lo, hi in pieces:
+        for symbol in symbols:
+            key = f"{source}|{symbol}"
+            # Tramos ordenados y unidos cuando se tocan
+            spans = sorted(files.get(key, []) + [[lo.value, hi.value]])
+            merged = [spans[0]]
+            for a, b in spans[1:]:
+                if a <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], b)
+                else:
+                    merged.append([a, b])
+            files[key] = merged
+
+
+def _filter(root=None, ranks=None, start=None, end=None):
+    expr = ds.scalar(True)
+
+    if root is not None:
+        roots = [root] if isinstance(root, str) else list(root)
+        expr &= ds.field("root").isin(roots)
+    if ranks is not None:
+        expr &= ds.field("rank").isin([int(r) for r in ranks])
+    if start is not None:
+        expr &= ds.field("period") >= pd.Timestamp(start).strftime("%Y-%m")
+    if end is not None:
+        # end es exclusivo; el mes que lo contiene puede tener datos anteriores
+        expr &= ds.field("period") <= (pd.Timestamp(end) - pd.Timedelta(1, "ns")).strftime("%Y-%m")
+
+    return expr
+
+
+def _partition_filter(partitions):
+    # Un OR por partición se vuelve lentísimo con cientos de particiones: se
+    # filtra cada columna por separado (puede traer de más, ver _in_partitions)
+    return (ds.field("root").isin(partitions["root"].unique().tolist())
+            & ds.field("rank").isin([int(r) for r in partitions["rank"].unique()])
+            & ds.field("period").isin(partitions["period"].unique().tolist()))
+
+
+def _in_partitions(df, partitions):
+    keys = pd.MultiIndex.from_frame(partitions[PARTITION_COLUMNS].astype({"rank": "int32"}))
+    return pd.MultiIndex.from_frame(df[PARTITION_COLUMNS].astype({"rank": "int32"})).isin(keys)
+
+
+def _read(base, expr, columns=None):
+    if not base.exists():
+        return None
+
+    dataset = ds.dataset(
+        str(base),
+        format="parquet",
+        partitioning=_PARTITIONING,
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
+    return dataset.to_table(columns=columns, filter=expr).to_pandas()
+
+
+def _write(df, base):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(
+        table,
+        str(base),
+        format="parquet",
+        partitioning=_PARTITIONING,
+        existing_data_behavior="delete_matching",
+        basename_template="part-{i}.parquet",
+    )
+
+
+def _utc(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+
+
+def _bars_path(store_dir, dataset, schema):
+    return Path(store_dir or STORE_DIR) / "bars" / dataset / schema
+
+
+def _table_path(store_dir, name):
+    return Path(store_dir or STORE_DIR) / "tables" / name
@@ -0,0 +1,145 @@
+import argparse
+import contextlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import fetch
+import instrumentation
+import monthly_futures_extended_2026
+import monthly_simple_2026
+import monthly_projection_2026
+
+# Cada pipeline expone fetch_data(commodity) y main(commodity=..., df=...); si además
+# tiene fetch_compact, se usa ese formato (menos memoria y menos datos hacia los procesos)
+PIPELINES = {
+    "extended": monthly_futures_extended_2026,
+    "simple": monthly_simple_2026,
+    "projection": monthly_projection_2026,
+}
+
+
+def _fetch_root(root, pipelines):
+    """
+    Descargar (o leer del caché) los datos de todos los pipelines de una raíz
+    """
+    inputs = {}
+    for name in pipelines:
+        module = PIPELINES[name]
+        inputs[name] = getattr(module, "fetch_compact", module.fetch_data)(root)
+    return inputs
+
+
+def _init_worker():
+    # Los procesos no tienen pantalla: renderizar siempre a archivo
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def _run_root(root, inputs, export_csv, figures_dir):
+    """
+    Agregar, proyectar y renderizar una raíz en un proceso aparte
+
+    Returns:
+        (raíz, salida de consola capturada, mediciones del proceso para instrumentation.merge)
+    """
+    # El proceso se reutiliza entre raíces: medir solo esta
+    instrumentation.recorder.reset()
+    log = io.StringIO()
+
+    with contextlib.redirect_stdout(log):
+        for name, df in inputs.items():
+            kwargs = {"commodity": root, "export_csv": export_csv, "df": df}
+            if name == "extended" and figures_dir:
+                kwargs["plot_path"] = os.path.join(figures_dir, f"{root}_monthly_extended_2026.png")
+            PIPELINES[name].main(**kwargs)
+
+    return root, log.getvalue(), instrumentation.recorder.snapshot()
+
+
+def run_batch(roots=fetch.DEFAULT_ROOTS, pipelines=tuple(PIPELINES), fetch_workers=4,
+              process_workers=None, export_csv=False, figures_dir="figures"):
+    """
+    Ejecutar los pipelines mensuales y de proyección para varias raíces
+
+    Las descargas corren en un pool de hilos acotado (fetch_workers); la
+    agregación, la proyección y los gráficos de cada raíz corren en un pool de
+    procesos en cuanto llegan sus datos. Cada raíz produce las mismas tablas,
+    CSV y gráficos que el main() del script correspondiente.
+
+    Returns:
+        dict raíz -> salida de consola del pipeline (o el error)
+    """
+    if figures_dir:
+        os.makedirs(figures_dir, exist_ok=True)
+
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            ProcessPoolExecutor(max_workers=process_workers, initializer=_init_worker) as process_pool:
+
+        fetches = {fetch_pool.submit(_fetch_root, root, pipelines): root for root in roots}
+        runs = {}
+
+        for future in as_completed(fetches):
+            root = fetches[future]
+            try:
+                inputs = future.result()
+            except Exception as e:
+                print(f"❌ {root}: Error al obtener datos - {e}")
+                results[root] = f"❌ Error al obtener datos: {e}"
+                continue
+
+            print(f"📥 {root}: datos listos, procesando...")
+            runs[process_pool.submit(_run_root, root, inputs, export_csv, figures_dir)] = root
+
+        for future in as_completed(runs):
+            root = runs[future]
+            try:
+                _, log, measurements = future.result()
+                instrumentation.recorder.merge(measurements)
+                results[root] = log
+                print(f"✅ {root}: completado")
+            except Exception as e:
+                results[root] = f"❌ Error: {e}"
+                print(f"❌ {root}: Error - {e}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecutar los análisis mensuales para varias raíces")
+    parser.add_argument("roots", nargs="*", default=fetch.DEFAULT_ROOTS,
+                        help="Raíces a procesar (por defecto: %(default)s)")
+    parser.add_argument("--pipelines", nargs="+", choices=list(PIPELINES), default=list(PIPELINES))
+    parser.add_argument("--fetch-workers", type=int, default=4, help="Descargas simultáneas")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para agregación y gráficos")
+    parser.add_argument("--csv", action="store_true", help="Exportar también los resultados a CSV")
+    parser.add_argument("--figures-dir", default="figures", help="Carpeta de los gráficos")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar la salida completa de cada raíz")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"🚀 EJECUCIÓN EN LOTE - {', '.join(args.roots)}")
+    print("="*60)
+
+    # Las etapas de los workers se suman a las de este proceso; --profile solo perfila este proceso
+    with instrumentation.session("batch_runner", args.report, args.profile):
+        results = run_batch(
+            roots=args.roots,
+            pipelines=args.pipelines,
+            fetch_workers=args.fetch_workers,
+            process_workers=args.workers,
+            export_csv=args.csv,
+            figures_dir=args.figures_dir,
+        )
+
+    if args.verbose:
+        for root in args.roots:
+            print(f"\n{'='*25} {root} {'='*25}")
+            print(results.get(root, ""))
+
+    print(f"\n🎉 Lote terminado: {len(results)} raíces")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pandas as pd
+import bar_store
+import compact_bars
+import dashboards
+import dbn_cache
+import fetch
+import memo
+import monthly_engine
+import monthly_futures_extended_2026
+import monthly_projection_2026
+import resample
+import synthetic_data
+
+# Carpeta donde se guardan los resultados de cada corrida (uno por archivo)
+RESULTS_DIR = Path("benchmark_results")
+
+# Fin de los datos sintéticos: el mismo que usan los scripts
+END_DATE = "2025-10-23"
+
+# Escenarios por defecto: schema, raíces, posiciones por raíz y años de datos
+SCENARIOS = {
+    "daily": {"schema": "ohlcv-1d", "roots": 6, "ranks": 6, "years": 2},
+    "minute": {"schema": "ohlcv-1m", "roots": 2, "ranks": 6, "years": 1},
+}
+
+
+def measure(run, setup=None, repeat=3, memory=True):
+    """
+    Tiempo (mejor y mediana de `repeat` corridas) y pico de memoria de una etapa
+
+    El pico se mide en una corrida aparte con tracemalloc, para no inflar los
+    tiempos. tracemalloc solo ve la memoria reservada desde Python (NumPy,
+    pandas); los buffers internos del decodificador DBN no aparecen.
+
+    Args:
+        run: Función sin argumentos (recibe lo que devuelva setup, si hay)
+        setup: Función que prepara cada corrida y no se cronometra
+
+    Returns:
+        (dict con seconds_best, seconds_median, peak_mb; resultado de la última corrida)
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        started = time.perf_counter()
+        result = run(*args)
+        times.append(time.perf_counter() - started)
+
+    peak_mb = None
+    if memory:
+        args = () if setup is None else (setup(),)
+        tracemalloc.start()
+        try:
+            run(*args)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+
+    stats = {
+        "seconds_best": min(times),
+        "seconds_median": statistics.median(times),
+        "peak_mb": peak_mb,
+    }
+    return stats, result
+
+
+def run_scenario(name, schema, roots, ranks, years, workdir, repeat=3, memory=True, seed=0):
+    """
+    Medir todas las etapas de un escenario con datos sintéticos servidos localmente
+
+    Returns:
+        Lista de dicts, uno por etapa
+    """
+    end = pd.Timestamp(END_DATE)
+    start = (end - pd.DateOffset(years=years)).strftime("%Y-%m-%d")
+    root_list = synthetic_data.root_names(roots)
+
+    started = time.perf_counter()
+    universe = synthetic_data.SyntheticBars(root_list, ranks, start, END_DATE, schema, seed)
+    generated = time.perf_counter() - started
+    print(f"🧪 {name}: {len(universe.records):,} barras sintéticas "
+          f"({universe.nbytes / 1e6:.1f} MB) generadas en {generated:.2f}s")
+
+    client = synthetic_data.LocalHistorical(universe)
+    fetch.set_client(client)
+
+    workdir = Path(workdir) / name
+    bar_store.STORE_DIR = workdir / "bar_store"
+    symbols = universe.symbols
+    stages = []
+
+    def add(stage, stats, records=None):
+        stages.append({"scenario": name, "stage": stage, "records": records, **stats})
+        peak = "" if stats["peak_mb"] is None else f", pico {stats['peak_mb']:.1f} MB"
+        print(f"   ⏱️  {stage:<16} {stats['seconds_best']:.3f}s (mediana {stats['seconds_median']:.3f}s{peak})")
+
+    def get_all():
+        return fetch.get_range("GLBX.MDP3", schema, symbols, start, END_DATE, stype_in="continuous")
+
+    # Descarga sin caché: cada corrida usa un directorio vacío
+    def empty_cache():
+        dbn_cache.CACHE_DIR = Path(tempfile.mkdtemp(dir=workdir, prefix="cache_"))
+
+    # Los scripts memoizan sus tablas: cada corrida mide el cálculo con un memo vacío
+    def empty_memo():
+        memo.MEMO_DIR = Path(tempfile.mkdtemp(dir=workdir, prefix="memo_"))
+
+    workdir.mkdir(parents=True, exist_ok=True)
+    stats, data = measure(lambda _: get_all(), setup=empty_cache, repeat=repeat, memory=memory)
+    add("fetch_cold", stats, len(universe.records))
+
+    # Mismo pedido con el caché ya lleno: solo se leen índices y archivos
+    stats, data = measure(get_all, repeat=repeat, memory=memory)
+    add("fetch_warm", stats)
+
+    stats, df = measure(data.to_df, repeat=repeat, memory=memory)
+    add("decode", stats, len(df))
+    bars = df.reset_index()
+
+    # Las mismas barras en formato compacto (precios enteros, símbolos como códigos)
+    stats, compact = measure(lambda: compact_bars.CompactBars.from_range(data), repeat=repeat, memory=memory)
+    add("decode_compact", stats, len(compact))
+    print(f"   💾 to_df {df.memory_usage(deep=True).sum() / 1e6:.1f} MB vs compacto {compact.nbytes / 1e6:.1f} MB")
+
+    if schema == "ohlcv-1d":
+        # El análisis mensual de cada raíz, como lo corre batch_runner
+        def aggregate():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return [
+                    monthly_futures_extended_2026.monthly_futures_analysis(root, start, END_DATE, df=bars)
+                    for root in root_list
+                ]
+    else:
+        def aggregate():
+            return [monthly_engine.monthly_aggregate(bars)]
+
+    stats, monthly = measure(lambda _: aggregate(), setup=empty_memo, repeat=repeat, memory=memory)
+    add("aggregate", stats, len(bars))
+
+    stats, _ = measure(lambda: monthly_engine.monthly_aggregate(compact), repeat=repeat, memory=memory)
+    add("aggregate_compact", stats, len(compact))
+
+    # Promedios mensuales directo desde los registros DBN (to_ndarray, sin DataFrame)
+    stats, _ = measure(lambda: monthly_engine.monthly_aggregate_records(data), repeat=repeat, memory=memory)
+    add("aggregate_records", stats, len(compact))
+
+    # Barras diarias/semanales/mensuales/trimestrales por sesión desde los mismos registros
+    stats, _ = measure(lambda: resample.SessionBars.from_range(data).resample(), repeat=repeat, memory=memory)
+    add("resample", stats, len(compact))
+
+    if schema == "ohlcv-1d":
+        def project():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return [monthly_projection_2026.monthly_projection_2026(root, df=bars, seed=seed)
+                        for root in root_list]
+
+        stats, _ = measure(lambda _: project(), setup=empty_memo, repeat=repeat, memory=memory)
+        add("projection", stats)
+
+        figures = workdir / "figures"
+        figures.mkdir(exist_ok=True)
+
+        def render_extended():
+            for root, root_monthly in zip(root_list, monthly):
+                dashboards.render_extended(root_monthly, root, figures / f"{root}_extended.png")
+
+        stats, _ = measure(render_extended, repeat=repeat, memory=memory)
+        add("render_extended", stats)
+
+        by_root = {root: df[df["symbol"].str.startswith(f"{root}.")] for root in root_list}
+
+        def render_curve():
+            for root, root_df in by_root.items():
+                dashboards.render_maiz(root_df, root, figures / f"{root}_curve.png")
+
+        stats, _ = measure(render_curve, repeat=repeat, memory=memory)
+        add("render_curve", stats)
+
+    csv_path = workdir / "bars.csv"
+    stats, _ = measure(lambda: bars.to_csv(csv_path, index=False), repeat=repeat, memory=memory)
+    add("csv", stats, len(bars))
+
+    return stages
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(stages, params, output_dir=RESULTS_DIR):
+    """
+    Guardar una corrida en output_dir/<fecha-hora>.json y devolver la ruta
+    """
+    import databento
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "databento": databento.__version__,
+            "machine": platform.machine(),
+            "params": params,
+        },
+        "stages": stages,
+    }
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    path.write_text(json.dumps(report, indent=2))
+    return path
+
+
+def compare(stages, baseline_path, params=None):
+    """
+    Imprimir cada etapa contra la misma etapa de una corrida anterior
+    """
+    baseline = json.loads(Path(baseline_path).read_text())
+    previous = {(s["scenario"], s["stage"]): s for s in baseline["stages"]}
+
+    print(f"\n📊 Comparación con {baseline_path} (commit {baseline['meta'].get('commit')})")
+    if params is not None and baseline["meta"]["params"].get("scenarios") != params.get("scenarios"):
+        print("⚠️  Los escenarios de las dos corridas no coinciden: los tiempos no son comparables")
+    print(f"{'Escenario':<10} {'Etapa':<16} {'Antes':>9} {'Ahora':>9} {'Cambio':>8}")
+    print("-" * 56)
+    for stage in stages:
+        old = previous.get((stage["scenario"], stage["stage"]))
+        if old is None:
+            continue
+        ratio = stage["seconds_best"] / old["seconds_best"] if old["seconds_best"] else float("nan")
+        flag = "🟢" if ratio < 0.9 else "🔴" if ratio > 1.1 else "  "
+        print(f"{stage['scenario']:<10} {stage['stage']:<16} {old['seconds_best']:>8.3f}s "
+              f"{stage['seconds_best']:>8.3f}s {ratio:>7.2f}x {flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Medir el pipeline completo con datos DBN sintéticos (sin API)")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--roots", type=int, help="Raíces por escenario (cambia el valor por defecto)")
+    parser.add_argument("--ranks", type=int, help="Posiciones de la curva por raíz")
+    parser.add_argument("--years", type=int, help="Años de datos")
+    parser.add_argument("--repeat", type=int, default=3, help="Corridas por etapa (se guarda la mejor y la mediana)")
+    parser.add_argument("--no-memory", action="store_true", help="No medir el pico de memoria")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los datos sintéticos")
+    parser.add_argument("--compare", metavar="JSON", help="Corrida anterior con la que comparar")
+    parser.add_argument("--output-dir", default=str(RESULTS_DIR), help="Carpeta de resultados")
+    args = parser.parse_args()
+
+    print("🏁 BENCHMARK CON DATOS SINTÉTICOS")
+    print("="*60)
+
+    stages = []
+    params = {"repeat": args.repeat, "seed": args.seed, "scenarios": {}}
+
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as workdir:
+        for name in args.scenarios:
+            scenario = dict(SCENARIOS[name])
+            for key in ("roots", "ranks", "years"):
+                if getattr(args, key) is not None:
+                    scenario[key] = getattr(args, key)
+            params["scenarios"][name] = scenario
+
+            stages += run_scenario(
+                name, workdir=workdir, repeat=args.repeat, memory=not args.no_memory,
+                seed=args.seed, **scenario,
+            )
+
+    path = save_results(stages, params, args.output_dir)
+    print(f"\n💾 Resultados guardados en {path}")
+
+    if args.compare:
+        compare(stages, args.compare, params)
+
+
+if __name__ == "__main__":
+    main()
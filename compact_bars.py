@@ -0,0 +1,228 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from databento_dbn import FIXED_PRICE_SCALE, UNDEF_PRICE
+import instrumentation
+import monthly_engine
+import streaming
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+# Columnas de identificación de to_df() y su tipo compacto
+_ID_TYPES = {"rtype": np.uint8, "publisher_id": np.uint16, "instrument_id": np.uint32}
+
+
+class CompactBars:
+    """
+    Barras OHLCV en memoria con el formato nativo de DBN
+
+    Los precios quedan como enteros int64 de punto fijo (1e-9), el símbolo como
+    códigos de una categoría (uno por fila, el texto una sola vez) y el volumen
+    con el entero más chico que alcanza. Las agregaciones suman enteros, así
+    que no acumulan error de punto flotante; los precios pasan a float solo al
+    mostrarlos (to_frame, price). Un panel de varios años y raíces ocupa
+    bastante menos que el DataFrame de to_df() y pasa más rápido a otros
+    procesos (batch_runner).
+
+    Args:
+        ts: Timestamps ts_event en nanosegundos UTC (int64)
+        symbol: pd.Categorical con el símbolo de cada fila
+        prices: Diccionario open/high/low/close -> int64 de punto fijo
+        volume: Volumen (entero sin signo)
+        ids: Diccionario opcional rtype/publisher_id/instrument_id -> array
+    """
+
+    def __init__(self, ts, symbol, prices, volume, ids=None):
+        self.ts = ts
+        self.symbol = symbol
+        self.prices = prices
+        self.volume = volume
+        self.ids = ids or {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Compactar un DataFrame de barras (to_df() con precios float o price_type="fixed")
+        """
+        ts = df["ts_event"] if "ts_event" in df.columns else df.index.to_series()
+        ts = pd.DatetimeIndex(ts)
+        ts = (ts.tz_localize("UTC") if ts.tz is None else ts).as_unit("ns").asi8
+
+        prices = {}
+        for column in PRICE_COLUMNS:
+            values = df[column].to_numpy()
+            if values.dtype.kind == "f":
+                # Mismo redondeo que al revés: float = entero / FIXED_PRICE_SCALE
+                # (los NaN pasan a UNDEF_PRICE ya como enteros: en float INT64_MAX se desborda)
+                missing = np.isnan(values)
+                fixed = np.rint(np.where(missing, 0.0, values) * FIXED_PRICE_SCALE).astype(np.int64)
+                values = np.where(missing, np.int64(UNDEF_PRICE), fixed)
+            prices[column] = values.astype(np.int64, copy=False)
+
+        ids = {column: df[column].to_numpy().astype(dtype)
+               for column, dtype in _ID_TYPES.items() if column in df.columns}
+
+        return cls(
+            ts,
+            pd.Categorical(df["symbol"].to_numpy()),
+            prices,
+            _narrow(df["volume"].to_numpy()),
+            ids,
+        )
+
+    @classmethod
+    def from_range(cls, data, chunk_size=streaming.CHUNK_SIZE):
+        """
+        Leer un resultado de get_range por bloques directo al formato compacto
+
+        Los precios se piden en punto fijo (price_type="fixed"), así que nunca
+        se arma el DataFrame float completo: en memoria hay un bloque y las
+        barras ya compactadas.
+        """
+        if hasattr(data, "iter_df"):
+            chunks = data.iter_df(count=chunk_size, price_type="fixed")
+        else:
+            chunks = data.to_df(count=chunk_size, price_type="fixed")
+
+        with instrumentation.span("compact") as span:
+            parts = []
+            for chunk in chunks:
+                if not chunk.empty:
+                    parts.append(cls.from_frame(chunk))
+                    span.add(records=len(chunk))
+            return cls.concat(parts)
+
+    @classmethod
+    def concat(cls, parts):
+        """
+        Unir varios CompactBars (bloques, raíces o rangos distintos)
+        """
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty_bars()
+        if len(parts) == 1:
+            return parts[0]
+
+        ids = {column: np.concatenate([part.ids[column] for part in parts])
+               for column in parts[0].ids if all(column in part.ids for part in parts)}
+        return cls(
+            np.concatenate([part.ts for part in parts]),
+            pd.api.types.union_categoricals([part.symbol for part in parts], sort_categories=True),
+            {column: np.concatenate([part.prices[column] for part in parts]) for column in PRICE_COLUMNS},
+            _narrow(np.concatenate([part.volume.astype(np.uint64) for part in parts])),
+            ids,
+        )
+
+    @classmethod
+    def empty_bars(cls):
+        return cls(np.empty(0, np.int64), pd.Categorical([]),
+                   {column: np.empty(0, np.int64) for column in PRICE_COLUMNS}, np.empty(0, np.uint32))
+
+    def __len__(self):
+        return len(self.ts)
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    @property
+    def symbols(self):
+        return list(self.symbol.categories)
+
+    @property
+    def nbytes(self):
+        """
+        Bytes ocupados por los arrays (los textos de los símbolos se cuentan una vez)
+        """
+        arrays = [self.ts, self.symbol.codes, self.volume, *self.prices.values(), *self.ids.values()]
+        text = sum(len(str(s)) for s in self.symbol.categories)
+        return sum(a.nbytes for a in arrays) + text
+
+    def fingerprint(self):
+        """
+        Huella del contenido (para memo.table)
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for values in [self.ts, self.symbol.codes, self.volume, *self.prices.values()]:
+            digest.update(np.ascontiguousarray(values).tobytes())
+        digest.update("\n".join(map(str, self.symbol.categories)).encode())
+        return digest.hexdigest()
+
+    def select(self, symbols=None, start=None, end=None):
+        """
+        Filas de ciertos símbolos y/o de [start, end), comparando códigos enteros
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if symbols is not None:
+            wanted = self.symbol.categories.get_indexer(list(symbols))
+            mask &= np.isin(self.symbol.codes, wanted[wanted >= 0])
+        if start is not None:
+            mask &= self.ts >= _ns(start)
+        if end is not None:
+            mask &= self.ts < _ns(end)
+        return self._take(mask)
+
+    def price(self, column):
+        """
+        Precios de una columna en float (para mostrar o graficar)
+        """
+        values = self.prices[column]
+        return np.where(values == UNDEF_PRICE, np.nan, values / FIXED_PRICE_SCALE)
+
+    def to_frame(self):
+        """
+        DataFrame como el de fetch_data (ts_event como columna, precios float)
+        """
+        frame = {"ts_event": pd.to_datetime(self.ts, utc=True)}
+        frame.update({column: values for column, values in self.ids.items()})
+        frame.update({column: self.price(column) for column in PRICE_COLUMNS})
+        frame["volume"] = self.volume.astype(np.uint64)
+        frame["symbol"] = np.asarray(self.symbol, dtype=object)
+        return pd.DataFrame(frame)
+
+    def iter_frames(self, chunk_size=streaming.CHUNK_SIZE):
+        """
+        to_frame() por bloques de a lo sumo chunk_size filas (por ejemplo para guardar en el almacén)
+        """
+        for lo in range(0, len(self), chunk_size):
+            yield self._take(slice(lo, lo + chunk_size)).to_frame()
+
+    def monthly_aggregate(self, symbols=None):
+        """
+        monthly_engine.monthly_aggregate sumando precios enteros
+
+        Cada (símbolo, mes) suma sus precios como enteros (monthly_engine.monthly_sums)
+        y recién el promedio se pasa a float, así que diff y range_avg salen de
+        restas exactas.
+        """
+        bars = self.select(symbols) if symbols is not None else self
+        if bars.empty:
+            return pd.DataFrame(columns=monthly_engine.MONTHLY_COLUMNS)
+
+        codes, months, sums = monthly_engine.monthly_sums(bars.symbol.codes, bars.ts, bars.prices, bars.volume)
+        return monthly_engine.finalize_sums(codes, months, sums, bars.symbols)
+
+    def _take(self, mask):
+        return CompactBars(
+            self.ts[mask],
+            self.symbol[mask],
+            {column: values[mask] for column, values in self.prices.items()},
+            self.volume[mask],
+            {column: values[mask] for column, values in self.ids.items()},
+        )
+
+
+def _narrow(volume):
+    # El entero sin signo más chico donde entra el volumen máximo
+    volume = np.asarray(volume)
+    top = int(volume.max()) if len(volume) else 0
+    for dtype in (np.uint16, np.uint32):
+        if top <= np.iinfo(dtype).max:
+            return volume.astype(dtype)
+    return volume.astype(np.uint64)
+
+
+def _ns(value):
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.value
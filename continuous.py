@@ -0,0 +1,261 @@
+import numpy as np
+import pandas as pd
+import bar_store
+import contracts
+import fetch
+import instrumentation
+
+DATASET = "GLBX.MDP3"
+
+# Regla de rodaje -> letra del símbolo continuo (igual que Databento: ZC.c.0, ZC.v.0, ZC.n.0)
+ROLL_RULES = {"calendar": "c", "volume": "v", "open_interest": "n"}
+
+# Ajustes hacia atrás: sumar la diferencia o multiplicar por el cociente en cada rodaje
+ADJUSTMENTS = (None, "difference", "ratio")
+
+# stat_type de open interest en el schema statistics
+_OPEN_INTEREST = 9
+
+# Schema (nombre de carpeta) del open interest diario en el almacén
+OPEN_INTEREST_SCHEMA = "open-interest-1d"
+
+_PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+
+class ContinuousBuilder:
+    """
+    Series continuas de cualquier posición y regla de rodaje a partir de los contratos individuales
+
+    Una sola descarga de barras de los contratos (ZCZ5, ZCH6...), de sus
+    definiciones y, si se usa, del open interest alimenta todas las variantes:
+    rodaje por calendario, por volumen o por open interest, cualquier posición
+    y con o sin ajuste hacia atrás. Todo se calcula sobre matrices fechas x
+    contratos (ordenados por vencimiento).
+
+    Args:
+        bars: Barras diarias de los contratos individuales (ts_event, symbol, OHLCV)
+        index: contracts.ContractIndex con los vencimientos
+        open_interest: DataFrame opcional con ts_event, symbol y open_interest
+        root: Raíz para nombrar las series (ZC -> ZC.c.0)
+    """
+
+    def __init__(self, bars, index, open_interest=None, root=None):
+        table = index.table
+        ts = bars["ts_event"] if "ts_event" in bars.columns else bars.index.to_series()
+        ts = pd.to_datetime(ts, utc=True).dt.floor("D").dt.tz_localize(None)
+
+        # Solo los contratos con vencimiento conocido, ordenados por vencimiento
+        listed = bars["symbol"].isin(table.index).to_numpy()
+        table = table[table.index.isin(bars["symbol"][listed].unique())].sort_values("expiration", kind="stable")
+
+        self.root = root if root is not None else (table["root"].iloc[0] if len(table) else "")
+        self.symbols = table.index.to_numpy()
+        self.expirations = table["expiration"].dt.tz_localize(None).to_numpy()
+
+        day_values, date_idx = np.unique(ts.to_numpy()[listed], return_inverse=True)
+        self.dates = pd.DatetimeIndex(day_values)
+        contract_idx = pd.Index(self.symbols).get_indexer(bars["symbol"][listed])
+
+        shape = (len(self.dates), len(self.symbols))
+        self.prices = {}
+        for column in [*_PRICE_COLUMNS, "volume"]:
+            matrix = np.full(shape, np.nan)
+            matrix[date_idx, contract_idx] = bars[column].to_numpy(dtype=float)[listed]
+            self.prices[column] = matrix
+
+        self.open_interest = None
+        if open_interest is not None and not open_interest.empty:
+            oi_ts = pd.to_datetime(open_interest["ts_event"], utc=True).dt.floor("D").dt.tz_localize(None)
+            rows = self.dates.get_indexer(oi_ts)
+            cols = pd.Index(self.symbols).get_indexer(open_interest["symbol"])
+            keep = (rows >= 0) & (cols >= 0)
+            self.open_interest = np.full(shape, np.nan)
+            self.open_interest[rows[keep], cols[keep]] = open_interest["open_interest"].to_numpy(dtype=float)[keep]
+
+        self._filled_close = None
+
+    @classmethod
+    def load(cls, root="ZC", start="2024-01-01", end="2025-10-23", open_interest=False, store_dir=None):
+        """
+        Armar el constructor desde el almacén, descargando antes lo que falte
+
+        Returns:
+            ContinuousBuilder de la raíz
+        """
+        index = contracts.load(f"{root}.FUT", start=start, end=end)
+        download(root, start, end, open_interest=open_interest, store_dir=store_dir, index=index)
+
+        bars = bar_store.read_bars(dataset=DATASET, schema="ohlcv-1d", root=root, ranks=[-1],
+                                   start=start, end=end, store_dir=store_dir)
+        oi = None
+        if open_interest:
+            oi = bar_store.read_bars(dataset=DATASET, schema=OPEN_INTEREST_SCHEMA, root=root, ranks=[-1],
+                                     start=start, end=end, store_dir=store_dir)
+            oi = oi.reset_index() if oi is not None else None
+
+        if bars is None:
+            bars = pd.DataFrame(columns=["ts_event", "symbol", *_PRICE_COLUMNS, "volume"])
+        return cls(bars.reset_index() if "ts_event" not in bars.columns else bars, index, oi, root)
+
+    def selection(self, rank=0, roll="calendar", roll_days=0):
+        """
+        Contrato elegido en cada fecha: índice en self.symbols, o -1 si no hay
+
+        calendar: el rank-ésimo contrato por vencimiento entre los que vencen
+        más de roll_days días después de la fecha. volume / open_interest: el
+        rank-ésimo por volumen (u open interest) del día hábil anterior entre
+        los que no vencieron, como las reglas v y n de Databento.
+        """
+        if roll not in ROLL_RULES:
+            raise ValueError(f"Regla no soportada: {roll} (usar {', '.join(ROLL_RULES)})")
+
+        n_contracts = len(self.symbols)
+        dates = self.dates.to_numpy()
+
+        if roll == "calendar":
+            horizon = dates + np.timedelta64(int(roll_days), "D")
+            chosen = np.searchsorted(self.expirations, horizon, side="right") + rank
+            return np.where(chosen < n_contracts, chosen, -1)
+
+        metric = self.prices["volume"] if roll == "volume" else self.open_interest
+        if metric is None:
+            raise ValueError("Sin open interest: usar ContinuousBuilder.load(..., open_interest=True)")
+
+        # Lo que se conocía al empezar el día: el valor del día anterior
+        previous = np.vstack([np.zeros((1, n_contracts)), metric[:-1]])
+        previous = np.nan_to_num(previous, nan=0.0)
+        active = self.expirations[None, :] > dates[:, None]
+        previous = np.where(active, previous, -np.inf)
+
+        # Orden estable: a igual valor gana el vencimiento más cercano
+        order = np.argsort(-previous, axis=1, kind="stable")
+        if rank >= n_contracts:
+            return np.full(len(dates), -1)
+        chosen = order[:, rank]
+        enough = active.sum(axis=1) > rank
+        return np.where(enough, chosen, -1)
+
+    def series(self, rank=0, roll="calendar", adjust=None, roll_days=0):
+        """
+        Serie continua root.{c|v|n}.{rank} con el formato de to_df()
+
+        Args:
+            rank: Posición (0 = contrato más cercano / de más volumen)
+            roll: "calendar", "volume" u "open_interest"
+            adjust: None, "difference" (sumar el salto de cada rodaje a la
+                historia anterior) o "ratio" (multiplicar por el cociente)
+            roll_days: Días antes del vencimiento en que rueda la regla calendar
+
+        Returns:
+            DataFrame indexado por ts_event con symbol, open, high, low, close,
+            volume, contract (contrato real de cada día) y adjustment
+        """
+        if adjust not in ADJUSTMENTS:
+            raise ValueError(f"Ajuste no soportado: {adjust} (usar {', '.join(map(str, ADJUSTMENTS))})")
+
+        with instrumentation.span("continuous", records=len(self.dates)):
+            chosen = self.selection(rank, roll, roll_days)
+            rows = np.arange(len(self.dates))
+            valid = chosen >= 0
+            pick = np.where(valid, chosen, 0)
+
+            values = {column: np.where(valid, self.prices[column][rows, pick], np.nan)
+                      for column in [*_PRICE_COLUMNS, "volume"]}
+            adjustment = self._adjustment(chosen, adjust)
+
+            if adjust == "ratio":
+                for column in _PRICE_COLUMNS:
+                    values[column] = values[column] * adjustment
+            elif adjust == "difference":
+                for column in _PRICE_COLUMNS:
+                    values[column] = values[column] + adjustment
+
+            keep = valid & ~np.isnan(values["close"])
+            df = pd.DataFrame({
+                "symbol": f"{self.root}.{ROLL_RULES[roll]}.{rank}",
+                **{column: values[column][keep] for column in _PRICE_COLUMNS},
+                "volume": values["volume"][keep],
+                "contract": self.symbols[chosen[keep]] if len(self.symbols) else [],
+                "adjustment": adjustment[keep],
+            }, index=pd.DatetimeIndex(self.dates[keep], name="ts_event").tz_localize("UTC"))
+            return df
+
+    def build(self, ranks=range(6), rolls=("calendar",), adjust=None, roll_days=0):
+        """
+        Varias series a la vez (todas las posiciones y reglas pedidas), ordenadas como to_df()
+        """
+        frames = [self.series(rank, roll, adjust, roll_days) for roll in rolls for rank in ranks]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames).sort_index(kind="stable")
+
+    def _adjustment(self, chosen, adjust):
+        # Salto en cada rodaje con los últimos precios conocidos del día anterior
+        neutral = 1.0 if adjust == "ratio" else 0.0
+        steps = np.full(len(chosen), neutral)
+        if adjust is None or len(chosen) < 2:
+            return steps
+
+        filled = self._filled()
+        previous, current = chosen[:-1], chosen[1:]
+        rolls = np.flatnonzero((previous != current) & (previous >= 0) & (current >= 0)) + 1
+
+        old_price = filled[rolls - 1, chosen[rolls - 1]]
+        new_price = filled[rolls - 1, chosen[rolls]]
+        if adjust == "ratio":
+            jump = new_price / old_price
+        else:
+            jump = new_price - old_price
+        # Si el contrato nuevo todavía no tenía precio no se ajusta ese rodaje
+        steps[rolls] = np.where(np.isfinite(jump), jump, neutral)
+
+        # Cada fecha acumula los saltos de los rodajes posteriores
+        if adjust == "ratio":
+            return np.cumprod(steps[::-1])[::-1] / steps
+        return np.cumsum(steps[::-1])[::-1] - steps
+
+    def _filled(self):
+        # Último cierre conocido de cada contrato hasta cada fecha
+        if self._filled_close is None:
+            close = self.prices["close"]
+            last = np.where(~np.isnan(close), np.arange(len(self.dates))[:, None], 0)
+            np.maximum.accumulate(last, axis=0, out=last)
+            self._filled_close = np.take_along_axis(close, last, axis=0)
+        return self._filled_close
+
+
+def download(root="ZC", start="2024-01-01", end="2025-10-23", open_interest=False, store_dir=None, index=None):
+    """
+    Descargar una vez las barras diarias de todos los contratos individuales de la raíz al almacén
+
+    Se piden con el símbolo padre (ROOT.FUT) y se descartan los spreads; con
+    open_interest=True también el open interest diario (schema statistics).
+    Los datos pasan por el caché DBN, así que repetir la llamada no vuelve a
+    descargar.
+    """
+    index = index if index is not None else contracts.load(f"{root}.FUT", start=start, end=end)
+    outrights = index.table.index
+
+    # Solo se escribe en el almacén lo que todavía no estaba (ver bar_store.write_range)
+    bars = fetch.get_range(dataset=DATASET, schema="ohlcv-1d", stype_in="parent",
+                           symbols=[f"{root}.FUT"], start=start, end=end)
+    bar_store.write_range(bars, dataset=DATASET, schema="ohlcv-1d", store_dir=store_dir,
+                          select=lambda df: df[df["symbol"].isin(outrights)])
+
+    if open_interest:
+        stats = fetch.get_range(dataset=DATASET, schema="statistics", stype_in="parent",
+                                symbols=[f"{root}.FUT"], start=start, end=end)
+        bar_store.write_range(stats, dataset=DATASET, schema=OPEN_INTEREST_SCHEMA, store_dir=store_dir,
+                              select=lambda df: _open_interest(df, outrights))
+
+    return index
+
+
+def _open_interest(stats, outrights):
+    stats = stats[(stats["stat_type"] == _OPEN_INTEREST) & stats["symbol"].isin(outrights)]
+    # El open interest se publica para la sesión de ts_ref; queda el último valor del día
+    day = pd.to_datetime(stats["ts_ref"], utc=True).dt.floor("D")
+    return (pd.DataFrame({"ts_event": day.to_numpy(), "symbol": stats["symbol"].to_numpy(),
+                          "open_interest": stats["quantity"].to_numpy()})
+            .groupby(["ts_event", "symbol"], sort=False).last().reset_index())
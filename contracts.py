@@ -0,0 +1,178 @@
+import pandas as pd
+from datetime import datetime, timezone
+import bar_store
+import dbn_cache
+import fetch
+import instrumentation
+
+DATASET = "GLBX.MDP3"
+
+# Rango de definiciones por defecto (el mismo de explore_2026_contract.py)
+DEFAULT_START = "2024-01-01"
+DEFAULT_END = "2025-10-23"
+
+# Códigos de mes de los contratos individuales (F = enero ... Z = diciembre)
+MONTH_CODES = "FGHJKMNQUVXZ"
+
+# instrument_class de los futuros simples (los spreads son "S")
+_FUTURE_CLASS = "F"
+
+# Índices ya cargados en este proceso: (dataset, padre, inicio, fin) -> ContractIndex
+_loaded = {}
+
+
+class ContractIndex:
+    """
+    Contratos individuales listados de una o varias raíces y sus vencimientos
+
+    Se arma una sola vez desde el schema definition (una fila por contrato,
+    no por día) y responde en memoria qué contratos existen, cuándo vencen y
+    cuáles estaban activos en una fecha.
+
+    Attributes:
+        table: DataFrame indexado por raw_symbol (ZCZ5) y ordenado por
+            vencimiento, con root, month_code, instrument_id, activation,
+            expiration, first_seen y last_seen (fechas UTC)
+    """
+
+    COLUMNS = ["root", "month_code", "instrument_id", "activation", "expiration", "first_seen", "last_seen"]
+
+    def __init__(self, table):
+        self.table = table
+
+    @classmethod
+    def from_definitions(cls, df):
+        """
+        Armar el índice desde los registros de definition (to_df())
+
+        Solo quedan los futuros simples (sin spreads ni opciones). Cada
+        contrato aparece todos los días que está listado: se conserva la
+        última definición y el primer y último día en que se publicó.
+        """
+        if df is None or df.empty:
+            return cls(pd.DataFrame(columns=cls.COLUMNS, index=pd.Index([], name="raw_symbol")))
+
+        defs = df.reset_index()
+        defs = defs[(defs["instrument_class"] == _FUTURE_CLASS) & ~defs["raw_symbol"].str.contains("-", regex=False)]
+
+        ts = defs["ts_recv"] if "ts_recv" in defs.columns else defs["ts_event"]
+        seen = ts.groupby(defs["raw_symbol"]).agg(["min", "max"])
+
+        table = defs.groupby("raw_symbol", sort=False).last()[["instrument_id", "activation", "expiration"]]
+        table["first_seen"] = seen["min"]
+        table["last_seen"] = seen["max"]
+
+        parts = table.index.map(bar_store.split_symbol)
+        table["root"] = [root for root, _ in parts]
+        # ZCZ5 -> Z: la letra que sigue a la raíz
+        table["month_code"] = [symbol[len(root)] for symbol, (root, _) in zip(table.index, parts)]
+
+        return cls(table[cls.COLUMNS].sort_values(["expiration", "root"], kind="stable"))
+
+    def __len__(self):
+        return len(self.table)
+
+    def __contains__(self, symbol):
+        return symbol in self.table.index
+
+    def exists(self, symbols):
+        """
+        dict símbolo -> True/False para una lista de contratos (ZCH6, ZCK6...)
+        """
+        return {symbol: symbol in self.table.index for symbol in symbols}
+
+    def expiration(self, symbol):
+        """
+        Vencimiento (pd.Timestamp UTC) de un contrato, o None si no está listado
+        """
+        if symbol not in self.table.index:
+            return None
+        return self.table.at[symbol, "expiration"]
+
+    def listed(self, year=None, root=None, months=None):
+        """
+        Contratos listados, ordenados por vencimiento
+
+        Args:
+            year: Año de vencimiento (2026 -> ZCH6, ZCK6...)
+            root: Raíz (por defecto todas las del índice)
+            months: Códigos de mes a incluir ("HKNUZ" o lista)
+
+        Returns:
+            DataFrame con las filas de table que cumplen los filtros
+        """
+        table = self.table
+        mask = pd.Series(True, index=table.index)
+
+        if year is not None:
+            mask &= table["expiration"].dt.year == int(year)
+        if root is not None:
+            mask &= table["root"] == root
+        if months is not None:
+            mask &= table["month_code"].isin(list(months))
+
+        return table[mask]
+
+    def active(self, date=None):
+        """
+        Contratos que se podían operar en date (listados y sin vencer)
+        """
+        date = dbn_cache._to_utc(date if date is not None else datetime.now(timezone.utc))
+        table = self.table
+        return table[(table["first_seen"] <= date) & (table["expiration"] > date)]
+
+
+def load(parent="ZC.FUT", start=DEFAULT_START, end=DEFAULT_END, dataset=DATASET):
+    """
+    Índice de contratos de un símbolo padre (ZC.FUT = todos los futuros de maíz)
+
+    Las definiciones se piden una sola vez con stype_in="parent" y quedan en
+    el caché DBN; el índice resultante se guarda además como parquet al lado
+    del caché, así que las ejecuciones siguientes no vuelven a decodificar
+    las definiciones. Dentro del mismo proceso el índice queda en memoria.
+
+    Args:
+        parent: Símbolo padre (ROOT.FUT) o lista de ellos
+        start, end: Rango de definiciones a considerar [start, end)
+
+    Returns:
+        ContractIndex
+    """
+    parents = tuple(dbn_cache._as_list(parent))
+    start = dbn_cache._to_utc(start)
+    end = dbn_cache._to_utc(end) if end is not None else None
+    key = (dataset, parents, start, end)
+
+    if key in _loaded:
+        return _loaded[key]
+
+    path = _index_path(dataset, parents, start, end) if end is not None else None
+    if path is not None and path.exists():
+        with instrumentation.span("contracts_read"):
+            index = ContractIndex(pd.read_parquet(path))
+    else:
+        with instrumentation.span("contracts_build") as span:
+            definitions = fetch.get_range(
+                dataset=dataset,
+                schema="definition",
+                stype_in="parent",
+                symbols=list(parents),
+                start=start,
+                end=end,
+            ).to_df()
+            span.add(records=len(definitions))
+            index = ContractIndex.from_definitions(definitions)
+
+        # El día en curso todavía puede cambiar: solo se guarda un rango cerrado
+        today = pd.Timestamp(datetime.now(timezone.utc).date(), tz="UTC")
+        if path is not None and end <= today:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            index.table.to_parquet(path)
+
+    _loaded[key] = index
+    return index
+
+
+def _index_path(dataset, parents, start, end):
+    name = "+".join(parents) + f"_{start:%Y%m%d}_{end:%Y%m%d}.parquet"
+    return dbn_cache.CACHE_DIR / dataset / "definition" / "contracts" / name
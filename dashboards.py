@@ -0,0 +1,440 @@
+import numpy as np
+import pandas as pd
+import matplotlib.dates as mdates
+import decimation
+import term_structure
+import trends
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Colores por posición en la curva (análisis mensual extendido)
+RANK_COLORS = ['red', 'orange', 'gold', 'lightgreen', 'green', 'darkgreen']
+
+# Colores por orden de aparición (análisis de maíz 2026)
+CURVE_COLORS = ['red', 'orange', 'yellow', 'lightgreen', 'green', 'darkgreen']
+
+# Contratos continuos que dan exposición a 2026
+PROJECTION_SUFFIXES = ('.c.3', '.c.4', '.c.5')
+
+# Plantillas ya construidas en este proceso (se reutilizan entre raíces/fechas)
+_templates = {}
+
+
+def split_by_symbol(df):
+    """
+    Separar un DataFrame por símbolo en una sola pasada (orden de aparición)
+    """
+    return {symbol: group for symbol, group in df.groupby('symbol', sort=False)}
+
+
+def symbol_rank(symbol):
+    """
+    Posición de un contrato continuo (ZC.c.3 -> 3), o None si no es continuo
+    """
+    tail = symbol.rsplit('.', 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+def _new_figure(figsize):
+    # Figura sin pyplot: no abre ventanas ni depende del backend interactivo
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+class _Lines:
+    """
+    Conjunto de líneas de un panel que se reutilizan en cada actualización
+    """
+
+    def __init__(self, ax, fmt='-', **style):
+        self.ax = ax
+        self.fmt = fmt
+        self.style = style
+        self.lines = []
+
+    def set(self, series, legend=None):
+        # series: lista de (x, y, label, color)
+        while len(self.lines) < len(series):
+            line, = self.ax.plot([], [], self.fmt, **self.style)
+            self.lines.append(line)
+
+        for i, line in enumerate(self.lines):
+            if i < len(series):
+                x, y, label, color = series[i]
+                line.set_data(x, y)
+                line.set_label(label)
+                if color is not None:
+                    line.set_color(color)
+                line.set_visible(True)
+            else:
+                line.set_data([], [])
+                line.set_visible(False)
+
+        if legend is not None:
+            self.ax.legend(handles=self.lines[:len(series)], **legend)
+
+
+class _Bars:
+    """
+    Barras (y sus etiquetas de valor) que se reutilizan en cada actualización
+    """
+
+    def __init__(self, ax, value_labels=False, **style):
+        self.ax = ax
+        self.value_labels = value_labels
+        self.style = style
+        self.patches = []
+        self.texts = []
+
+    def set(self, labels, values, colors, rotation=45):
+        n = len(values)
+
+        if len(self.patches) < n:
+            start = len(self.patches)
+            container = self.ax.bar(range(start, n), [0] * (n - start), **self.style)
+            self.patches.extend(container.patches)
+            if self.value_labels:
+                self.texts.extend(
+                    self.ax.text(0, 0, '', ha='center', va='bottom', fontweight='bold')
+                    for _ in range(n - start)
+                )
+
+        for i, patch in enumerate(self.patches):
+            visible = i < n
+            patch.set_visible(visible)
+            if visible:
+                patch.set_height(values[i])
+                patch.set_facecolor(colors[i] if not isinstance(colors, str) else colors)
+            if self.value_labels:
+                text = self.texts[i]
+                text.set_visible(visible)
+                if visible:
+                    text.set_position((patch.get_x() + patch.get_width() / 2, values[i] + 1))
+                    text.set_text(f'${values[i]:.0f}')
+
+        self.ax.set_xticks(range(n))
+        self.ax.set_xticklabels(labels, rotation=rotation)
+        _rescale(self.ax)
+
+
+def _rescale(ax):
+    ax.relim(visible_only=True)
+    ax.autoscale_view()
+
+
+class ExtendedDashboard:
+    """
+    Tablero de 6 paneles de visualize_extended_analysis como plantilla reutilizable
+
+    La figura, los ejes, líneas, barras y la tabla se crean una sola vez; cada
+    update() solo cambia los datos de esos artistas.
+    """
+
+    def __init__(self, figure=None):
+        self.figure = figure if figure is not None else _new_figure((20, 12))
+        axes = self.figure.subplots(2, 3).ravel()
+        self.axes = axes
+        self._laid_out = False
+
+        # Gráficos 1-3: evolución, diferencias y rango mensual por contrato
+        self.metric_lines = []
+        labels = [
+            ('Mes/Año', 'Precio Promedio ($)'),
+            ('Mes/Año', 'Diferencia ($)'),
+            ('Mes/Año', 'Rango Promedio ($)'),
+        ]
+        for ax, (xlabel, ylabel) in zip(axes[:3], labels):
+            ax.set_xlabel(xlabel)
+            ax.set_ylabel(ylabel)
+            ax.grid(True, alpha=0.3)
+            self.metric_lines.append(_Lines(ax, 'o-', linewidth=2, markersize=4))
+        axes[1].axhline(y=0, color='black', linestyle='--', alpha=0.5)
+
+        # Gráfico 4: precios actuales por contrato
+        axes[3].set_xlabel('Contrato')
+        axes[3].set_ylabel('Precio ($)')
+        axes[3].grid(True, alpha=0.3)
+        self.latest_bars = _Bars(axes[3], value_labels=True, alpha=0.7)
+
+        # Gráfico 5: tendencias de los contratos 2026
+        axes[4].set_xlabel('Contrato 2026')
+        axes[4].set_ylabel('Pendiente de Tendencia ($/mes)')
+        axes[4].axhline(y=0, color='black', linestyle='--', alpha=0.5)
+        axes[4].grid(True, alpha=0.3)
+        self.trend_bars = _Bars(axes[4], alpha=0.7)
+
+        # Gráfico 6: tabla de oportunidades 2026
+        axes[5].axis('off')
+        self.table = None
+        self.table_rows = 0
+
+    def update(self, monthly_df, commodity="ZC"):
+        """
+        Cargar los datos de una raíz (salida de monthly_futures_analysis)
+        """
+        by_symbol = split_by_symbol(monthly_df)
+
+        # Eje X común: todos los meses presentes, en orden
+        months = pd.PeriodIndex(monthly_df['month_year'].unique()).sort_values()
+        month_pos = pd.Series(np.arange(len(months)), index=months)
+
+        series_x = {}
+        for symbol, data in by_symbol.items():
+            series_x[symbol] = month_pos[data['month_year'].to_numpy()].to_numpy()
+
+        def label(symbol):
+            return f"{symbol} {'(2026 Proj.)' if symbol.endswith(PROJECTION_SUFFIXES) else ''}"
+
+        def color(symbol):
+            rank = symbol_rank(symbol)
+            return RANK_COLORS[rank] if rank is not None and rank < len(RANK_COLORS) else 'blue'
+
+        titles = [
+            f'{commodity} - Evolución Mensual de Precios Promedio',
+            f'{commodity} - Diferencias Mensuales (Close - Open)',
+            f'{commodity} - Rango Promedio Mensual (Volatilidad)',
+        ]
+        for lines, metric, title in zip(self.metric_lines, ['close_avg', 'diff', 'range_avg'], titles):
+            lines.set(
+                [(series_x[s], d[metric].to_numpy(), label(s), color(s)) for s, d in by_symbol.items()],
+                legend=dict(bbox_to_anchor=(1.05, 1), loc='upper left'),
+            )
+            ax = lines.ax
+            ax.set_title(title)
+            ax.set_xticks(range(len(months)))
+            ax.set_xticklabels(months.astype(str), rotation=45)
+            _rescale(ax)
+
+        # Último mes de cada contrato
+        latest = {symbol: data.iloc[-1] for symbol, data in by_symbol.items()}
+
+        self.axes[3].set_title(f'{commodity} - Precios Actuales por Contrato\n(Verde = Proyección 2026)')
+        self.latest_bars.set(
+            list(latest),
+            [row['close_avg'] for row in latest.values()],
+            ['green' if row['is_2026_projection'] else 'blue' for row in latest.values()],
+        )
+
+        # Tendencia de los últimos 6 meses de los contratos 2026 (al menos 3 meses)
+        projection_symbols = [s for s in by_symbol if s.endswith(PROJECTION_SUFFIXES)]
+        latest_trends = trends.latest_trends(
+            monthly_df[monthly_df['symbol'].isin(projection_symbols)],
+            column='close_avg', window=6, order='month_year', min_periods=3,
+        )
+        slopes = latest_trends['slope'].reindex(projection_symbols).dropna()
+
+        # Sin contratos 2026 con historia suficiente el panel queda vacío
+        self.axes[4].set_visible(not slopes.empty)
+        self.axes[4].set_title(f'{commodity} - Tendencias 2026\n(Verde=Alcista, Rojo=Bajista)')
+        self.trend_bars.set(
+            slopes.index.tolist(),
+            slopes.to_numpy(),
+            ['green' if t > 0 else 'red' for t in slopes.to_numpy()],
+        )
+
+        # Tabla resumen
+        rows = [
+            [s, f"${latest[s]['close_avg']:.2f}", f"${latest[s]['diff']:.2f}", f"${latest[s]['range_avg']:.2f}"]
+            for s in projection_symbols
+        ]
+        self._set_table(rows, commodity)
+
+    def _set_table(self, rows, commodity):
+        ax = self.axes[5]
+
+        # La tabla solo se reconstruye si cambia la cantidad de filas
+        if self.table is None or self.table_rows != len(rows):
+            if self.table is not None:
+                self.table.remove()
+                self.table = None
+            self.table_rows = len(rows)
+            if rows:
+                self.table = ax.table(
+                    cellText=rows,
+                    colLabels=['Contrato 2026', 'Precio Actual', 'Diff Mensual', 'Volatilidad'],
+                    cellLoc='center',
+                    loc='center',
+                    bbox=[0, 0, 1, 1],
+                )
+                self.table.auto_set_font_size(False)
+                self.table.set_fontsize(9)
+                self.table.scale(1, 2)
+        else:
+            for r, row in enumerate(rows, start=1):
+                for c, value in enumerate(row):
+                    self.table[(r, c)].get_text().set_text(value)
+
+        ax.set_title(f'{commodity} - Resumen Oportunidades 2026' if rows else '', pad=20)
+
+    def render(self, output_path):
+        """
+        Guardar el tablero (PNG, SVG... según la extensión del archivo)
+        """
+        if not self._laid_out:
+            self.figure.tight_layout()
+            self._laid_out = True
+        self.figure.savefig(output_path)
+
+
+class MaizDashboard:
+    """
+    Tablero de 6 paneles de maiz_2026_analysis.py como plantilla reutilizable
+    """
+
+    def __init__(self, figure=None):
+        self.figure = figure if figure is not None else _new_figure((16, 10))
+        axes = self.figure.subplots(2, 3).ravel()
+        self.axes = axes
+        self._laid_out = False
+
+        # Gráfico 1: evolución temporal de todos los contratos
+        axes[0].set_title("Evolución de Precios - Curva de Futuros")
+        axes[0].set_xlabel("Fecha")
+        axes[0].set_ylabel("Precio ($)")
+        axes[0].xaxis_date()
+        axes[0].grid(True, alpha=0.3)
+        self.price_lines = _Lines(axes[0], linewidth=2)
+
+        # Gráfico 2: curva de futuros actual
+        axes[1].set_title("Curva de Futuros Actual\n(Verde = Proyección 2026)")
+        axes[1].set_xlabel("Contrato")
+        axes[1].set_ylabel("Precio ($)")
+        axes[1].grid(True, alpha=0.3)
+        self.curve_bars = _Bars(axes[1], value_labels=True, alpha=0.7)
+
+        # Gráfico 3: spreads entre contratos
+        axes[2].set_title("Spreads entre Contratos\n(Rojo=Contango, Azul=Backwardation)")
+        axes[2].set_xlabel("Par de Contratos")
+        axes[2].set_ylabel("Diferencia de Precio ($)")
+        axes[2].axhline(y=0, color='black', linestyle='--', alpha=0.5)
+        axes[2].grid(True, alpha=0.3)
+        self.spread_bars = _Bars(axes[2], alpha=0.7)
+
+        # Gráfico 4: volatilidad
+        axes[3].set_title("Volatilidad por Contrato")
+        axes[3].set_xlabel("Contrato")
+        axes[3].set_ylabel("Volatilidad ($)")
+        axes[3].grid(True, alpha=0.3)
+        self.volatility_bars = _Bars(axes[3], alpha=0.7)
+
+        # Gráfico 5: retornos diarios promedio
+        axes[4].set_title("Retorno Diario Promedio (%)")
+        axes[4].set_xlabel("Contrato")
+        axes[4].set_ylabel("Retorno Diario (%)")
+        axes[4].axhline(y=0, color='black', linestyle='--', alpha=0.5)
+        axes[4].grid(True, alpha=0.3)
+        self.return_bars = _Bars(axes[4], alpha=0.7)
+
+        # Gráfico 6: proyección simple de tendencia
+        axes[5].set_title("Proyección de Tendencia (30 días)\nContratos 2026")
+        axes[5].set_xlabel("Días")
+        axes[5].set_ylabel("Precio ($)")
+        axes[5].grid(True, alpha=0.3)
+        self.actual_lines = _Lines(axes[5], 'o-', linewidth=2)
+        self.trend_lines = _Lines(axes[5], '--', linewidth=2)
+
+    def update(self, df, commodity="ZC"):
+        """
+        Cargar barras diarias (to_df(), indexadas por ts_event) de una raíz
+        """
+        # Una sola agrupación por símbolo para todos los paneles
+        grouped = df.groupby('symbol', sort=False)
+        by_symbol = dict(iter(grouped))
+        closes = grouped['close'].agg(
+            latest='last',
+            volatility='std',
+            daily_return=lambda close: close.pct_change().mean() * 100,
+        ).sort_index()
+        latest_prices = closes['latest']
+
+        # Gráfico 1: cada serie reducida al ancho en píxeles del panel
+        width = decimation.axes_width_px(self.axes[0])
+        series = []
+        for i, (symbol, data) in enumerate(by_symbol.items()):
+            x, y = decimation.decimate(data.index, data['close'].to_numpy(), width)
+            series.append((mdates.date2num(x.tz_convert(None).to_numpy()), y,
+                           symbol, CURVE_COLORS[i % len(CURVE_COLORS)]))
+        self.price_lines.set(series, legend={})
+        _rescale(self.axes[0])
+
+        # Gráfico 2
+        contracts = latest_prices.index.tolist()
+        self.curve_bars.set(
+            contracts,
+            latest_prices.to_numpy(),
+            ['red' if 'c.0' in c or 'c.1' in c or 'c.2' in c else 'green' for c in contracts],
+        )
+
+        # Gráfico 3: spreads entre contratos consecutivos de la curva actual
+        curve = term_structure.TermStructure.from_bars(df, roots=[commodity]).curve(root=commodity).dropna()
+        spreads = np.diff(curve.to_numpy())
+        self.spread_bars.set(
+            [f"{near}\nvs\n{far}" for near, far in zip(curve.index[:-1], curve.index[1:])],
+            spreads,
+            ['red' if s > 0 else 'blue' for s in spreads],
+        )
+
+        # Gráfico 4
+        volatilities = closes['volatility']
+        self.volatility_bars.set(volatilities.index.tolist(), volatilities.to_numpy(), 'purple')
+
+        # Gráfico 5
+        returns = closes['daily_return']
+        self.return_bars.set(
+            returns.index.tolist(),
+            returns.to_numpy(),
+            ['red' if r < 0 else 'green' for r in returns.to_numpy()],
+        )
+
+        # Gráfico 6: tendencia lineal de los últimos 30 días y proyección a 30 días
+        contracts_2026 = [f"{commodity}{suffix}" for suffix in PROJECTION_SUFFIXES]
+        latest_trends = trends.latest_trends(df[df['symbol'].isin(contracts_2026)], window=30)
+        actual, projected = [], []
+        for j, contract in enumerate(contracts_2026):
+            if contract not in latest_trends.index:
+                continue
+            trend = latest_trends.loc[contract]
+            recent_data = by_symbol[contract]['close'].tail(30).to_numpy()
+            x = np.arange(len(recent_data))
+            future_x = np.arange(len(recent_data), len(recent_data) + 30)
+            actual.append((x, recent_data, f'{contract} (Actual)', f'C{2 * j}'))
+            projected.append((future_x, trend['intercept'] + trend['slope'] * future_x,
+                              f'{contract} (Proyección)', f'C{2 * j + 1}'))
+
+        self.actual_lines.set(actual)
+        self.trend_lines.set(projected)
+        handles = [line for pair in zip(self.actual_lines.lines, self.trend_lines.lines) for line in pair]
+        self.axes[5].legend(handles=[h for h in handles if h.get_visible()])
+        _rescale(self.axes[5])
+
+    def render(self, output_path):
+        """
+        Guardar el tablero (PNG, SVG... según la extensión del archivo)
+        """
+        if not self._laid_out:
+            self.figure.tight_layout()
+            self._laid_out = True
+        self.figure.savefig(output_path)
+
+
+def render_extended(monthly_df, commodity, output_path):
+    """
+    Renderizar el tablero mensual extendido sin pantalla, reutilizando la plantilla
+    """
+    dashboard = _templates.get('extended')
+    if dashboard is None:
+        dashboard = _templates['extended'] = ExtendedDashboard()
+    dashboard.update(monthly_df, commodity)
+    dashboard.render(output_path)
+
+
+def render_maiz(df, commodity, output_path):
+    """
+    Renderizar el tablero de curva de futuros sin pantalla, reutilizando la plantilla
+    """
+    dashboard = _templates.get('maiz')
+    if dashboard is None:
+        dashboard = _templates['maiz'] = MaizDashboard()
+    dashboard.update(df, commodity)
+    dashboard.render(output_path)
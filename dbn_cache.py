@@ -0,0 +1,685 @@
+import asyncio
+import contextlib
+import databento as db
+import numpy as np
+import pandas as pd
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import weakref
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+import instrumentation
+
+# Directorio del caché (se puede cambiar con la variable de entorno)
+CACHE_DIR = Path(os.getenv('DATABENTO_CACHE_DIR', '.databento_cache'))
+
+# Tamaño de los bloques de backfill(): días y símbolos por descarga
+CHUNK_DAYS = 90
+CHUNK_SYMBOLS = 10
+
+# Descargas simultáneas de backfill() y reintentos por bloque (espera exponencial)
+BACKFILL_WORKERS = 4
+RETRIES = 3
+RETRY_DELAY = 1.0
+
+# Un solo lock para leer/escribir los índices desde varios hilos
+_index_lock = threading.Lock()
+
+# Un DBNStore comparte su lector interno: no se puede decodificar desde dos hilos a la vez
+_store_locks = weakref.WeakKeyDictionary()
+_store_locks_lock = threading.Lock()
+
+# Archivo de origen de cada DBNStore del caché (para abrir lectores independientes)
+_store_paths = weakref.WeakKeyDictionary()
+
+_DAY_NS = 86_400 * 10**9
+
+# Símbolos padre de stype_in="parent" (ZC.FUT): sus filas llegan con el símbolo del hijo
+_PARENT_RE = re.compile(r"^(?P<root>[A-Z0-9]+)\.(FUT|OPT)$")
+# Raíz de un contrato hijo: ZCZ5 y ZCZ5-ZCH6 -> ZC
+_CHILD_ROOT_RE = r"^([A-Z0-9]+?)[FGHJKMNQUVXZ]\d"
+
+
+class CachedRange:
+    """
+    Resultado de get_range armado a partir de varios archivos DBN del caché.
+
+    Se comporta como un DBNStore para los usos del proyecto (to_df), pero cada
+    archivo solo aporta los símbolos y fechas [start, end) que le corresponden.
+    """
+
+    def __init__(self, pieces, start=None, end=None):
+        # pieces: lista de (store, symbols, start, end) con fechas pd.Timestamp UTC
+        self.pieces = pieces
+        self.start = start
+        self.end = end
+
+    @property
+    def symbols(self):
+        return sorted({s for _, symbols, _, _ in self.pieces for s in symbols})
+
+    def slice(self, symbols=None, start=None, end=None):
+        """
+        Recortar el resultado a un subconjunto de símbolos y/o fechas sin volver a leer disco
+        """
+        symbols = None if symbols is None else set(_as_list(symbols))
+        start = _to_utc(start) if start is not None else None
+        end = _to_utc(end) if end is not None else None
+
+        pieces = []
+        for store, piece_symbols, lo, hi in self.pieces:
+            keep = piece_symbols if symbols is None else [s for s in piece_symbols if s in symbols]
+            lo = lo if start is None else max(lo, start)
+            hi = hi if end is None else min(hi, end)
+            if keep and lo < hi:
+                pieces.append((store, keep, lo, hi))
+
+        return CachedRange(pieces, start or self.start, end or self.end)
+
+    def fingerprint(self):
+        """
+        Identificador de los datos sin leerlos: archivos del caché (nunca se
+        reescriben) y tramos de símbolos y fechas que aporta cada uno
+
+        None si algún tramo no quedó en disco (día en curso).
+        """
+        parts = []
+        for store, symbols, lo, hi in self.pieces:
+            path = _store_paths.get(store)
+            if path is None:
+                return None
+            # Un renglón por símbolo: una descarga nueva y una lectura del
+            # índice agrupan los símbolos distinto pero son los mismos datos
+            source = _source_name(path)
+            parts += [f"{source}|{symbol}|{lo.isoformat()}|{hi.isoformat()}" for symbol in symbols]
+        return "\n".join(sorted(parts))
+
+    def by_file(self):
+        """
+        El resultado separado por archivo del caché: lista de (nombre, CachedRange)
+
+        El nombre (dataset/schema/archivo) identifica el archivo, que nunca se
+        reescribe; es None si la descarga no quedó en disco (día en curso).
+        """
+        parts = []
+        for store, ranges in self._by_store():
+            path = _store_paths.get(store)
+            source = None if path is None else _source_name(path)
+            pieces = [(store, symbols, lo, hi) for symbols, lo, hi in ranges]
+            parts.append((source, CachedRange(pieces, self.start, self.end)))
+        return parts
+
+    def to_df(self, **kwargs):
+        """
+        Equivalente a DBNStore.to_df(): un solo DataFrame indexado por ts_event
+        """
+        with instrumentation.span("decode") as span:
+            frames = []
+
+            for store, ranges in self._by_store():
+                with _store_lock(store):
+                    df = store.to_df(**kwargs)
+                if df.empty:
+                    continue
+
+                frames.append(df[_mask(df, ranges)])
+
+            if not frames:
+                return pd.DataFrame()
+
+            # Orden estable: respeta el orden original de símbolos dentro de cada fecha
+            df = pd.concat(frames).sort_index(kind='stable')
+            span.add(records=len(df))
+            return df
+
+    def iter_df(self, count, **kwargs):
+        """
+        Equivalente a DBNStore.to_df(count=...): DataFrames de a lo sumo count registros
+
+        Cada archivo se lee por bloques con su propio lector, así que la memoria
+        depende de count y no del rango de fechas. Los bloques salen en el orden
+        de cada archivo (archivo por archivo); para un mismo símbolo, archivos
+        distintos nunca cubren las mismas fechas.
+        """
+        return instrumentation.timed_chunks("decode", self._iter_df(count, **kwargs))
+
+    def _iter_df(self, count, **kwargs):
+        for store, ranges in self._by_store():
+            path = _store_paths.get(store)
+
+            if path is not None:
+                # Lector propio: no bloquea ni mueve el lector compartido del store
+                chunks = db.DBNStore.from_file(path).to_df(count=count, **kwargs)
+            else:
+                # Descarga que no se guardó (día en curso): ya está en memoria
+                with _store_lock(store):
+                    df = store.to_df(**kwargs)
+                chunks = (df.iloc[i:i + count] for i in range(0, len(df), count))
+
+            for df in chunks:
+                if df.empty:
+                    continue
+                df = df[_mask(df, ranges)]
+                if not df.empty:
+                    yield df
+
+    def iter_records(self, count):
+        """
+        Equivalente a DBNStore.to_ndarray(count=...) con el símbolo de cada registro
+
+        Los registros quedan en el array estructurado de DBN (precios enteros
+        de punto fijo, sin pasar por pandas) y el símbolo se resuelve con las
+        fechas de los mappings del archivo, buscando en arrays ordenados.
+
+        Yields:
+            RecordChunk de a lo sumo count registros
+        """
+        return instrumentation.timed_chunks("decode", self._iter_records(count))
+
+    def _iter_records(self, count):
+        for store, ranges in self._by_store():
+            path = _store_paths.get(store)
+            symbols = _SymbolIndex(store.metadata)
+
+            if path is not None:
+                chunks = db.DBNStore.from_file(path).to_ndarray(count=count)
+            else:
+                with _store_lock(store):
+                    records = store.to_ndarray()
+                chunks = (records[i:i + count] for i in range(0, len(records), count))
+
+            for records in chunks:
+                if len(records) == 0:
+                    continue
+                codes = symbols.resolve(records)
+                mask = _record_mask(records, codes, symbols.names, ranges)
+                if mask.all():
+                    yield RecordChunk(records, codes, symbols.names)
+                elif mask.any():
+                    yield RecordChunk(records[mask], codes[mask], symbols.names)
+
+    def _by_store(self):
+        # Decodificar cada archivo una sola vez aunque aporte varios tramos,
+        # empezando por el que tiene las fechas más antiguas
+        by_store = {}
+        for store, symbols, lo, hi in self.pieces:
+            by_store.setdefault(id(store), (store, []))[1].append((symbols, lo, hi))
+
+        return sorted(by_store.values(), key=lambda item: min(lo for _, lo, _ in item[1]))
+
+
+class RecordChunk:
+    """
+    Bloque de registros DBN: array estructurado, código del símbolo de cada
+    registro (-1 si no se pudo resolver) y lista de símbolos de los códigos
+    """
+
+    def __init__(self, records, codes, names):
+        self.records = records
+        self.codes = codes
+        self.names = names
+
+    def __len__(self):
+        return len(self.records)
+
+
+class _SymbolIndex:
+    """
+    instrument_id + fecha -> símbolo pedido, a partir de los mappings de la metadata
+
+    Los intervalos se ordenan una vez por (instrument_id, fecha inicial) y cada
+    registro se ubica con searchsorted, sin armar strings por fila.
+    """
+
+    def __init__(self, metadata):
+        self.names = sorted(metadata.mappings)
+        rows = [
+            (int(interval["symbol"]), _day(interval["start_date"]), _day(interval["end_date"]), code)
+            for code, name in enumerate(self.names)
+            for interval in metadata.mappings[name]
+            if str(interval["symbol"]).isdigit()
+        ]
+        table = np.array(sorted(rows), dtype=np.int64).reshape(-1, 4)
+        self.instrument_id, self.start, self.end, self.code = table.T
+        self.keys = (self.instrument_id << 20) + self.start
+
+    def resolve(self, records):
+        if len(self.keys) == 0:
+            return np.full(len(records), -1, dtype=np.int32)
+
+        instrument_id = records["instrument_id"].astype(np.int64)
+        day = records["ts_event"].view(np.int64) // _DAY_NS
+        pos = np.searchsorted(self.keys, (instrument_id << 20) + day, side="right") - 1
+        found = pos >= 0
+        pos = np.where(found, pos, 0)
+        found &= (self.instrument_id[pos] == instrument_id) & (day < self.end[pos])
+        return np.where(found, self.code[pos], -1).astype(np.int32)
+
+
+def get_range(client, dataset, schema, symbols, start, end=None,
+              stype_in="raw_symbol", cache_dir=None):
+    """
+    Reemplazo de client.timeseries.get_range con caché local en disco
+
+    Los registros DBN se guardan por dataset, schema, stype_in y símbolo junto
+    con los días que cubren. Si una petición posterior abarca un rango mayor,
+    solo se descargan los días que faltan.
+
+    Args:
+        client: db.Historical ya creado
+        dataset, schema, symbols, start, end, stype_in: igual que en get_range
+        cache_dir: Directorio del caché (por defecto CACHE_DIR)
+
+    Returns:
+        CachedRange con los registros pedidos
+    """
+    symbols = _as_list(symbols)
+    base = _cache_path(cache_dir, dataset, schema, stype_in)
+    start_ts = _to_utc(start)
+    end_ts = _to_utc(end) if end is not None else None
+
+    fetches, pieces = _plan(base, symbols, start_ts, end_ts)
+    instrumentation.count("cache_pieces", len(pieces))
+
+    for group, lo, hi in fetches:
+        pieces.append(_download(client, base, dataset, schema, stype_in, group, lo, hi))
+
+    return CachedRange(pieces, start_ts, end_ts).slice(start=start_ts, end=end_ts)
+
+
+def is_cached(dataset, schema, symbols, start, end=None, stype_in="raw_symbol", cache_dir=None):
+    """
+    Si get_range ya tiene en disco todos los días pedidos (solo lee el índice)
+    """
+    base = _cache_path(cache_dir, dataset, schema, stype_in)
+    day_start = _to_utc(start).floor('D')
+    day_end = _to_utc(end).ceil('D') if end is not None else None
+    index = _load_index(base)
+    return all(not _coverage(index.get(symbol, []), day_start, day_end)[1] for symbol in _as_list(symbols))
+
+
+async def get_range_async(client, dataset, schema, symbols, start, end=None,
+                          stype_in="raw_symbol", cache_dir=None, limiter=None, retries=0):
+    """
+    Versión async de get_range: los tramos que faltan se piden con get_range_async
+
+    La lectura del índice y la escritura de cada descarga en el caché corren
+    en hilos aparte para no frenar al event loop.
+
+    Args:
+        limiter: Context manager async que se toma antes de cada descarga
+            (por ejemplo fetch.Limiter: tope de peticiones en vuelo y ritmo)
+        retries: Reintentos por descarga ante errores transitorios
+
+    Returns:
+        CachedRange con los registros pedidos
+    """
+    symbols = _as_list(symbols)
+    base = _cache_path(cache_dir, dataset, schema, stype_in)
+    start_ts = _to_utc(start)
+    end_ts = _to_utc(end) if end is not None else None
+
+    fetches, pieces = await asyncio.to_thread(_plan, base, symbols, start_ts, end_ts)
+    instrumentation.count("cache_pieces", len(pieces))
+
+    pieces += await asyncio.gather(*[
+        _download_async(client, base, dataset, schema, stype_in, group, lo, hi, limiter, retries)
+        for group, lo, hi in fetches
+    ])
+
+    return CachedRange(pieces, start_ts, end_ts).slice(start=start_ts, end=end_ts)
+
+
+def backfill(client, dataset, schema, symbols, start, end=None, stype_in="raw_symbol",
+             chunk_days=CHUNK_DAYS, chunk_symbols=CHUNK_SYMBOLS, workers=BACKFILL_WORKERS,
+             retries=RETRIES, cache_dir=None):
+    """
+    get_range para rangos largos: bloques fecha x símbolo descargados en paralelo
+
+    Lo que falta en el caché se parte en bloques de a lo sumo chunk_days días
+    y chunk_symbols símbolos, que se descargan con hasta `workers` peticiones
+    simultáneas. Cada bloque se guarda en el caché apenas termina, así que si
+    el proceso se corta (o un bloque agota sus reintentos) volver a llamar a
+    backfill solo descarga los bloques que faltan.
+
+    Args:
+        client: db.Historical ya creado
+        dataset, schema, symbols, start, end, stype_in: igual que en get_range
+        chunk_days, chunk_symbols: Tamaño máximo de cada bloque
+        workers: Descargas simultáneas
+        retries: Reintentos por bloque ante errores del servidor o de red
+
+    Returns:
+        CachedRange con los registros pedidos (igual que get_range)
+    """
+    symbols = _as_list(symbols)
+    base = _cache_path(cache_dir, dataset, schema, stype_in)
+    start_ts = _to_utc(start)
+    end_ts = _to_utc(end) if end is not None else None
+
+    fetches, pieces = _plan(base, symbols, start_ts, end_ts)
+    instrumentation.count("cache_pieces", len(pieces))
+    chunks = _split(fetches, chunk_days, chunk_symbols)
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_download, client, base, dataset, schema, stype_in, group, lo, hi, retries): (group, lo, hi)
+            for group, lo, hi in chunks
+        }
+        for future in as_completed(futures):
+            try:
+                pieces.append(future.result())
+            except Exception as e:
+                failed.append((futures[future], e))
+
+    if failed:
+        (group, lo, hi), error = failed[0]
+        raise RuntimeError(
+            f"{len(failed)} de {len(chunks)} bloques fallaron (por ejemplo {group[0]} desde "
+            f"{lo:%Y-%m-%d}: {error}); los demás quedaron en el caché, volver a ejecutar para reanudar"
+        ) from error
+
+    return CachedRange(pieces, start_ts, end_ts).slice(start=start_ts, end=end_ts)
+
+
+def _split(fetches, chunk_days, chunk_symbols):
+    """
+    Partir las descargas de _plan en bloques de chunk_days días x chunk_symbols símbolos
+    """
+    chunks = []
+    for group, lo, hi in fetches:
+        if hi is None:
+            # Sin fin: bloques cerrados hasta hoy y el último abierto
+            today = pd.Timestamp(datetime.now(timezone.utc).date(), tz='UTC')
+            bounds = list(pd.date_range(lo, max(lo, today), freq=f"{chunk_days}D")) + [None]
+        else:
+            bounds = list(pd.date_range(lo, hi, freq=f"{chunk_days}D"))
+            if bounds[-1] < hi:
+                bounds.append(hi)
+
+        for i in range(0, len(group), chunk_symbols):
+            for chunk_lo, chunk_hi in zip(bounds[:-1], bounds[1:]):
+                chunks.append((group[i:i + chunk_symbols], chunk_lo, chunk_hi))
+
+    return chunks
+
+
+def _download(client, base, dataset, schema, stype_in, group, lo, hi, retries=0):
+    """
+    Descargar un tramo y guardarlo en el caché, reintentando los errores transitorios
+    """
+    for attempt in range(retries + 1):
+        try:
+            with instrumentation.span("download") as span:
+                data = client.timeseries.get_range(
+                    dataset=dataset,
+                    schema=schema,
+                    stype_in=stype_in,
+                    symbols=group,
+                    start=lo.strftime('%Y-%m-%d'),
+                    end=hi.strftime('%Y-%m-%d') if hi is not None else None,
+                )
+                span.add(bytes=data.nbytes)
+            break
+        except Exception as e:
+            if attempt == retries or not _retryable(e):
+                raise
+            instrumentation.count("retries")
+            time.sleep(RETRY_DELAY * 2 ** attempt)
+
+    instrumentation.count("requests")
+    instrumentation.count("bytes_fetched", data.nbytes)
+
+    with instrumentation.span("cache_write"):
+        return _record(base, data, group, lo, hi)
+
+
+async def _download_async(client, base, dataset, schema, stype_in, group, lo, hi, limiter=None, retries=0):
+    """
+    Como _download, pero esperando la respuesta sin bloquear el event loop
+    """
+    for attempt in range(retries + 1):
+        try:
+            async with limiter if limiter is not None else contextlib.nullcontext():
+                # Varias descargas se solapan en el mismo hilo: se mide a mano
+                # en lugar de abrir un span (la pila de spans es por hilo)
+                started = time.perf_counter()
+                data = await client.timeseries.get_range_async(
+                    dataset=dataset,
+                    schema=schema,
+                    stype_in=stype_in,
+                    symbols=group,
+                    start=lo.strftime('%Y-%m-%d'),
+                    end=hi.strftime('%Y-%m-%d') if hi is not None else None,
+                )
+                instrumentation.recorder.add(instrumentation.stage_path("download"),
+                                             time.perf_counter() - started, bytes=data.nbytes)
+            break
+        except Exception as e:
+            if attempt == retries or not _retryable(e):
+                raise
+            instrumentation.count("retries")
+            await asyncio.sleep(RETRY_DELAY * 2 ** attempt)
+
+    instrumentation.count("requests")
+    instrumentation.count("bytes_fetched", data.nbytes)
+
+    def record():
+        with instrumentation.span("cache_write"):
+            return _record(base, data, group, lo, hi)
+
+    return await asyncio.to_thread(record)
+
+
+def _retryable(error):
+    # Errores del servidor (5xx), límite de peticiones (429) y cortes de red
+    if isinstance(error, db.BentoServerError):
+        return True
+    if isinstance(error, db.BentoClientError):
+        return error.http_status == 429
+    return isinstance(error, (OSError, TimeoutError))
+
+
+def _plan(base, symbols, start, end):
+    """
+    Separar lo que ya está en disco de lo que hay que descargar
+
+    Returns:
+        (fetches, pieces): fetches es una lista de (símbolos, inicio, fin) a
+        descargar, agrupando los símbolos a los que les faltan los mismos días;
+        pieces son los tramos ya disponibles en el caché.
+    """
+    day_start = start.floor('D')
+    day_end = end.ceil('D') if end is not None else None
+    index = _load_index(base)
+
+    pieces = []
+    missing_by_symbol = {}
+    stores = {}
+
+    for symbol in symbols:
+        covered, missing = _coverage(index.get(symbol, []), day_start, day_end)
+        for lo, hi, name in covered:
+            if name not in stores:
+                stores[name] = _open_store(base / name)
+            pieces.append((stores[name], [symbol], lo, hi))
+
+        missing_by_symbol[symbol] = tuple(missing)
+
+    # Una sola descarga por tramo para los símbolos con los mismos huecos
+    groups = {}
+    for symbol, missing in missing_by_symbol.items():
+        groups.setdefault(missing, []).append(symbol)
+
+    fetches = [
+        (group, lo, hi)
+        for missing, group in groups.items()
+        for lo, hi in missing
+    ]
+
+    return fetches, pieces
+
+
+def _coverage(entries, day_start, day_end):
+    """
+    Tramos del índice de un símbolo que caen en [day_start, day_end) y días que faltan
+
+    Returns:
+        (covered, missing): covered es una lista de (inicio, fin, archivo) ya
+        recortados al rango; missing, de (inicio, fin) a descargar.
+    """
+    entries = sorted(
+        (pd.Timestamp(lo, tz='UTC'), pd.Timestamp(hi, tz='UTC'), name)
+        for lo, hi, name in entries
+    )
+
+    cursor = day_start
+    covered = []
+    missing = []
+    for lo, hi, name in entries:
+        if day_end is not None and lo >= day_end:
+            break
+        if hi <= cursor:
+            continue
+        if lo > cursor:
+            missing.append((cursor, lo))
+        piece_hi = hi if day_end is None else min(hi, day_end)
+        covered.append((max(lo, cursor), piece_hi, name))
+        cursor = piece_hi
+
+    if day_end is None or cursor < day_end:
+        missing.append((cursor, day_end))
+
+    return covered, missing
+
+
+def _record(base, data, symbols, lo, hi):
+    """
+    Guardar una descarga en el caché y registrar los días que cubre
+
+    Solo se marcan como cubiertos los días anteriores a hoy (UTC): el día en
+    curso puede cambiar todavía y se vuelve a pedir en la siguiente ejecución.
+    """
+    today = pd.Timestamp(datetime.now(timezone.utc).date(), tz='UTC')
+    covered_hi = today if hi is None else min(hi, today)
+    piece_hi = hi if hi is not None else today + timedelta(days=1)
+
+    if lo < covered_hi:
+        name = f"{uuid.uuid4().hex}.dbn"
+        base.mkdir(parents=True, exist_ok=True)
+        data.to_file(base / name)
+
+        with _index_lock:
+            index = _load_index(base)
+            for symbol in symbols:
+                index.setdefault(symbol, []).append([
+                    lo.strftime('%Y-%m-%d'),
+                    covered_hi.strftime('%Y-%m-%d'),
+                    name,
+                ])
+            _save_index(base, index)
+
+        # Leer desde el archivo: la respuesta descargada ya no queda en memoria
+        data = _open_store(base / name)
+
+    return (data, list(symbols), lo, piece_hi)
+
+
+def _mask(df, ranges):
+    """
+    Filas de df que caen en alguno de los tramos (símbolos, inicio, fin)
+
+    Un símbolo padre (ZC.FUT) incluye las filas de todos sus contratos (ZCZ5,
+    ZCZ5-ZCH6...).
+    """
+    ts = pd.to_datetime(df.index, utc=True)
+    mask = np.zeros(len(df), dtype=bool)
+    child_roots = None
+    for symbols, lo, hi in ranges:
+        rows = df['symbol'].isin(symbols)
+
+        parents = [m.group('root') for m in map(_PARENT_RE.match, symbols) if m]
+        if parents:
+            if child_roots is None:
+                child_roots = df['symbol'].astype(str).str.extract(_CHILD_ROOT_RE, expand=False)
+            rows |= child_roots.isin(parents)
+
+        mask |= (rows & (ts >= lo) & (ts < hi)).to_numpy()
+    return mask
+
+
+def _record_mask(records, codes, names, ranges):
+    """
+    Como _mask, pero sobre registros de to_ndarray y sus códigos de símbolo
+    """
+    ts = records["ts_event"].view(np.int64)
+    mask = np.zeros(len(records), dtype=bool)
+    for symbols, lo, hi in ranges:
+        wanted = set(symbols)
+        parents = {m.group('root') for m in map(_PARENT_RE.match, symbols) if m}
+        child = [re.match(_CHILD_ROOT_RE, name) for name in names]
+        selected = np.array([
+            name in wanted or (match is not None and match.group(1) in parents)
+            for name, match in zip(names, child)
+        ] + [False], dtype=bool)
+        # El código -1 (sin símbolo) cae en el último lugar: nunca se selecciona
+        mask |= selected[codes] & (ts >= lo.value) & (ts < hi.value)
+    return mask
+
+
+def _day(value):
+    # Días desde 1970-01-01 de una fecha de los mappings
+    return int(pd.Timestamp(value).value // _DAY_NS)
+
+
+def _open_store(path):
+    store = db.DBNStore.from_file(path)
+    _store_paths[store] = path
+    return store
+
+
+def _store_lock(store):
+    with _store_locks_lock:
+        return _store_locks.setdefault(store, threading.Lock())
+
+
+def _cache_path(cache_dir, dataset, schema, stype_in):
+    return Path(cache_dir or CACHE_DIR) / dataset / str(schema) / str(stype_in)
+
+
+def _load_index(base):
+    path = base / 'index.json'
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_index(base, index):
+    # Escritura atómica para no dejar un índice a medias si se interrumpe
+    tmp = base / f"index.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp, base / 'index.json')
+
+
+def _as_list(symbols):
+    if isinstance(symbols, str):
+        return [s.strip() for s in symbols.split(',')]
+    return list(symbols)
+
+
+def _to_utc(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+
+
+def _source_name(path):
+    # dataset/schema/archivo: identifica un archivo del caché sin depender de CACHE_DIR
+    return f"{path.parent.parent.name}/{path.parent.name}/{path.name}"
@@ -0,0 +1,126 @@
+import numpy as np
+
+# Método por defecto: min/max por píxel conserva exactamente máximos y mínimos
+DEFAULT_METHOD = "minmax"
+
+
+def axes_width_px(ax):
+    """
+    Ancho en píxeles del área de dibujo de unos ejes (según tamaño y dpi de la figura)
+    """
+    return max(int(ax.get_window_extent().width), 1)
+
+
+def _as_float(values):
+    if getattr(values, "dtype", None) is not None and values.dtype.kind == "M":
+        # Fechas de pandas (con o sin zona horaria) como datetime64 en UTC
+        values = values.to_numpy("datetime64[ns]") if hasattr(values, "to_numpy") else values
+    values = np.asarray(values)
+    if values.dtype.kind in "mM":
+        # Fechas/duraciones: solo importa la distancia relativa entre puntos
+        return values.view("i8").astype(np.float64)
+    return values.astype(np.float64, copy=False)
+
+
+def minmax_indices(y, buckets):
+    """
+    Índices del mínimo y máximo de cada uno de `buckets` tramos consecutivos
+
+    Se conservan además el primer y el último punto. Devuelve a lo sumo
+    2 * buckets + 2 índices ordenados; los NaN se ignoran.
+    """
+    y = _as_float(y)
+    n = len(y)
+    if n <= 2 * buckets + 2:
+        return np.arange(n)
+
+    # Tramo al que pertenece cada punto (tramos de tamaño casi igual)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+
+    with np.errstate(invalid="ignore"):
+        lows = np.fmin.reduceat(y, starts)
+        highs = np.fmax.reduceat(y, starts)
+
+    # Primer punto de cada tramo que alcanza su mínimo / máximo
+    low_hits = np.flatnonzero(y == lows[bucket])
+    high_hits = np.flatnonzero(y == highs[bucket])
+    _, first_low = np.unique(bucket[low_hits], return_index=True)
+    _, first_high = np.unique(bucket[high_hits], return_index=True)
+
+    return np.unique(np.concatenate((
+        [0],
+        low_hits[first_low],
+        high_hits[first_high],
+        [n - 1],
+    )))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Índices elegidos por Largest-Triangle-Three-Buckets
+
+    Conserva la forma visual de la serie con exactamente n_out puntos
+    (incluidos el primero y el último).
+    """
+    x = _as_float(x)
+    y = _as_float(y)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+
+        # Punto promedio del tramo siguiente (o el último punto)
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        # Punto del tramo actual que forma el triángulo de mayor área
+        area = np.abs(
+            (x[prev] - avg_x) * (y[lo:hi] - y[prev])
+            - (x[prev] - x[lo:hi]) * (avg_y - y[prev])
+        )
+        prev = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        indices[i + 1] = prev
+
+    return indices
+
+
+def decimate(x, y, width, method=DEFAULT_METHOD):
+    """
+    Reducir una serie a aproximadamente `width` píxeles antes de graficarla
+
+    Args:
+        x, y: Arrays (o Series) de igual largo; x puede ser fechas
+        width: Ancho disponible en píxeles (ver axes_width_px)
+        method: "minmax" (mín/máx por píxel) o "lttb"
+
+    Returns:
+        (x, y) reducidos, del mismo tipo que la entrada
+    """
+    if method == "minmax":
+        indices = minmax_indices(y, width)
+    elif method == "lttb":
+        indices = lttb_indices(x, y, width)
+    else:
+        raise ValueError(f"Método de reducción desconocido: {method}")
+
+    if len(indices) == len(y):
+        return x, y
+    return _take(x, indices), _take(y, indices)
+
+
+def _take(values, indices):
+    # Series, Index y ndarray conservan su tipo (y zona horaria) con take()
+    if hasattr(values, "take"):
+        return values.take(indices)
+    return np.asarray(values).take(indices)
@@ -1,65 +1,64 @@
-import databento as db
 import matplotlib.pyplot as plt
 import pandas as pd
-import os
-from dotenv import load_dotenv
+import contracts
+import fetch
 
-# Cargar variables de entorno
-load_dotenv()
-
-# Obtener API key desde variable de entorno
-api_key = os.getenv('DATABENTO_API_KEY')
-if not api_key:
-    raise ValueError("DATABENTO_API_KEY no encontrada en el archivo .env")
+print("🌽 Explorando contratos de maíz disponibles...")
 
-client = db.Historical(api_key)
+# Índice de contratos listados (definiciones de ZC.FUT, se descargan una sola vez)
+print("\n📇 Cargando definiciones de ZC.FUT...")
+index = contracts.load("ZC.FUT", start="2024-01-01", end="2025-10-23")
+print(f"  ✅ {len(index)} contratos individuales en el índice")
+
+# Función para traer las barras de los contratos listados en una sola petición
+def fetch_listed_contracts(symbols, year_desc):
+    listed = [s for s, exists in index.exists(symbols).items() if exists]
+    for symbol in symbols:
+        if symbol in listed:
+            print(f"  ✅ {symbol}: listado, vence {index.expiration(symbol):%Y-%m-%d}")
+        else:
+            print(f"  ❌ {symbol}: No listado")
 
-print("🌽 Explorando contratos de maíz disponibles...")
+    if not listed:
+        return []
 
-# Función para probar un contrato individual
-def test_individual_contract(symbol, year_desc):
     try:
-        print(f"  Probando {symbol}...")
-        data = client.timeseries.get_range(
+        data = fetch.get_range(
             dataset="GLBX.MDP3",
             schema="ohlcv-1d",
-            stype_in="instrument_id",
-            symbols=[symbol],
+            stype_in="raw_symbol",
+            symbols=listed,
             start="2024-01-01",
             end="2025-10-23"
         )
-        
         df = data.to_df()
-        if not df.empty:
-            print(f"  ✅ {symbol}: {len(df)} registros encontrados")
-            return df
-        else:
-            print(f"  ❌ {symbol}: Sin datos")
-            return None
-            
     except Exception as e:
-        print(f"  ❌ {symbol}: Error - {str(e)}")
-        return None
+        print(f"  ❌ Contratos {year_desc}: Error - {str(e)}")
+        return []
+
+    available = []
+    for symbol in listed:
+        symbol_df = df[df['symbol'] == symbol] if not df.empty else df
+        if not symbol_df.empty:
+            print(f"  📊 {symbol}: {len(symbol_df)} registros encontrados")
+            available.append((symbol, symbol_df))
+        else:
+            print(f"  ⚠️ {symbol}: listado pero sin barras en el rango")
+    return available
 
-# 1. Probar contratos 2025 (que deberían existir)
-print("\n📅 PASO 1: Probando contratos 2025 (disponibles):")
+# 1. Contratos 2025 (que deberían existir)
+print("\n📅 PASO 1: Contratos 2025 (disponibles):")
 contracts_2025 = ["ZCH5", "ZCK5", "ZCN5", "ZCU5", "ZCZ5"]
-available_2025 = []
-
-for contract in contracts_2025:
-    df = test_individual_contract(contract, "2025")
-    if df is not None:
-        available_2025.append((contract, df))
+available_2025 = fetch_listed_contracts(contracts_2025, "2025")
 
-# 2. Probar contratos 2026 (puede que no existan aún)
-print("\n📅 PASO 2: Probando contratos 2026 (experimental):")
+# 2. Contratos 2026 (puede que no existan aún)
+print("\n📅 PASO 2: Contratos 2026 (experimental):")
 contracts_2026 = ["ZCH6", "ZCK6", "ZCN6", "ZCU6", "ZCZ6"]
-available_2026 = []
+available_2026 = fetch_listed_contracts(contracts_2026, "2026")
 
-for contract in contracts_2026:
-    df = test_individual_contract(contract, "2026")
-    if df is not None:
-        available_2026.append((contract, df))
+listed_2026 = index.listed(year=2026, root="ZC").index.tolist()
+if listed_2026:
+    print(f"  📇 Listados con vencimiento en 2026: {listed_2026}")
 
 # 3. Probar contratos continuos (curva de futuros)
 print("\n🔄 PASO 3: Explorando contratos continuos (curva de futuros):")
@@ -67,7 +66,7 @@ continuous_symbols = ["ZC.c.0", "ZC.c.1", "ZC.c.2", "ZC.c.3", "ZC.c.4", "ZC.c.5"
 
 try:
     print(f"  Probando contratos continuos: {continuous_symbols}")
-    data_continuous = client.timeseries.get_range(
+    data_continuous = fetch.get_range(
         dataset="GLBX.MDP3",
         schema="ohlcv-1d",
         stype_in="continuous",
@@ -0,0 +1,312 @@
+import asyncio
+import databento as db
+import os
+import threading
+import time
+from dotenv import load_dotenv
+import dbn_cache
+import instrumentation
+
+# Raíces agrícolas por defecto: maíz, soja, trigo, trigo KC, harina y aceite de soja
+DEFAULT_ROOTS = ["ZC", "ZS", "ZW", "KE", "ZM", "ZL"]
+
+# Tiempo que espera la primera petición para juntar otras iguales (segundos)
+COALESCE_WINDOW = 0.01
+
+# Modo async: descargas en vuelo a la vez y ritmo máximo (peticiones por segundo, ráfaga)
+MAX_CONCURRENCY = 8
+RATE_LIMIT = 10.0
+RATE_BURST = 10
+
+_client = None
+_client_lock = threading.Lock()
+
+# Peticiones agrupadas por (dataset, schema, stype_in) que aún no terminaron
+_batches = {}
+_batches_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Devolver el cliente histórico, creándolo la primera vez que se usa
+
+    Así importar un script no lee el .env ni valida credenciales.
+    """
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = db.Historical(_api_key())
+
+    return _client
+
+
+def get_live_client():
+    """
+    Crear un cliente db.Live nuevo (cada cliente es una sola sesión en vivo)
+    """
+    return db.Live(key=_api_key())
+
+
+def _api_key():
+    # Cargar variables de entorno
+    load_dotenv()
+
+    # Obtener API key desde variable de entorno
+    api_key = os.getenv('DATABENTO_API_KEY')
+    if not api_key:
+        raise ValueError("DATABENTO_API_KEY no encontrada en el archivo .env")
+
+    return api_key
+
+
+def set_client(client):
+    """
+    Usar otro cliente (por ejemplo uno local para pruebas) en lugar de db.Historical
+    """
+    global _client
+
+    with _client_lock:
+        _client = client
+
+
+class _Batch:
+    """
+    Una llamada a get_range compartida por varias peticiones concurrentes
+    """
+
+    def __init__(self, symbols, start, end):
+        self.symbols = set(symbols)
+        self.start = start
+        self.end = end
+        self.closed = False
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def overlaps(self, start, end):
+        return ((self.end is None or start < self.end)
+                and (end is None or self.start < end))
+
+    def covers(self, symbols, start, end):
+        return (self.symbols.issuperset(symbols)
+                and self.start <= start
+                and (self.end is None or (end is not None and end <= self.end)))
+
+    def add(self, symbols, start, end):
+        self.symbols.update(symbols)
+        self.start = min(self.start, start)
+        self.end = None if self.end is None or end is None else max(self.end, end)
+
+
+@instrumentation.span("fetch")
+def get_range(dataset, schema, symbols, start, end=None, stype_in="raw_symbol"):
+    """
+    Obtener datos históricos usando el caché local y un cliente compartido
+
+    Las peticiones concurrentes para el mismo dataset, schema y stype_in cuyas
+    fechas se solapan se juntan en una sola llamada a get_range; cada una
+    recibe solo sus símbolos y fechas.
+
+    Returns:
+        dbn_cache.CachedRange con los registros pedidos
+    """
+    symbols = dbn_cache._as_list(symbols)
+    start = dbn_cache._to_utc(start)
+    end = dbn_cache._to_utc(end) if end is not None else None
+    key = (dataset, str(schema), str(stype_in))
+
+    with _batches_lock:
+        batches = _batches.setdefault(key, [])
+        batch = next(
+            (b for b in batches
+             if (not b.closed and b.overlaps(start, end)) or b.covers(symbols, start, end)),
+            None,
+        )
+        leader = batch is None
+        if leader:
+            batch = _Batch(symbols, start, end)
+            batches.append(batch)
+        elif not batch.closed:
+            batch.add(symbols, start, end)
+
+    if leader:
+        # Dar tiempo a que lleguen otras peticiones que se puedan juntar,
+        # salvo que todo esté en el caché (no hay descarga que compartir)
+        if not dbn_cache.is_cached(dataset, schema, symbols, start, end, stype_in):
+            time.sleep(COALESCE_WINDOW)
+        with _batches_lock:
+            batch.closed = True
+
+        try:
+            batch.result = dbn_cache.get_range(
+                get_client(),
+                dataset=dataset,
+                schema=schema,
+                stype_in=stype_in,
+                symbols=sorted(batch.symbols),
+                start=batch.start,
+                end=batch.end,
+            )
+        except Exception as e:
+            batch.error = e
+        finally:
+            with _batches_lock:
+                batches.remove(batch)
+            batch.done.set()
+    else:
+        batch.done.wait()
+
+    if batch.error is not None:
+        raise batch.error
+
+    return batch.result.slice(symbols, start, end)
+
+
+@instrumentation.span("fetch")
+def backfill(dataset, schema, symbols, start, end=None, stype_in="raw_symbol", **kwargs):
+    """
+    Descargar un rango largo por bloques en paralelo y con reanudación (ver dbn_cache.backfill)
+
+    kwargs: chunk_days, chunk_symbols, workers, retries
+
+    Returns:
+        dbn_cache.CachedRange con los registros pedidos
+    """
+    return dbn_cache.backfill(
+        get_client(),
+        dataset=dataset,
+        schema=schema,
+        stype_in=stype_in,
+        symbols=symbols,
+        start=start,
+        end=end,
+        **kwargs,
+    )
+
+
+class TokenBucket:
+    """
+    Ritmo máximo de peticiones: se reponen `rate` fichas por segundo, hasta `burst`
+
+    Cada petición gasta una ficha; si no hay, espera a que se reponga (en
+    orden de llegada).
+    """
+
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Limiter:
+    """
+    Tope de descargas en vuelo (semáforo) y de ritmo (TokenBucket) para get_range_async
+
+    Se usa como context manager async alrededor de cada descarga; rate=None
+    desactiva el límite de ritmo.
+    """
+
+    def __init__(self, concurrency=MAX_CONCURRENCY, rate=RATE_LIMIT, burst=RATE_BURST):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst) if rate else None
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        try:
+            if self.bucket is not None:
+                await self.bucket.acquire()
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+async def get_range_async(dataset, schema, symbols, start, end=None, stype_in="raw_symbol", limiter=None):
+    """
+    Versión async de get_range: usa el mismo caché y el get_range_async del cliente
+
+    A diferencia de get_range no junta peticiones concurrentes; para lanzar
+    muchas a la vez con tope de concurrencia y de ritmo, usar as_completed.
+
+    Returns:
+        dbn_cache.CachedRange con los registros pedidos
+    """
+    return await dbn_cache.get_range_async(
+        get_client(),
+        dataset=dataset,
+        schema=schema,
+        stype_in=stype_in,
+        symbols=symbols,
+        start=start,
+        end=end,
+        limiter=limiter,
+        retries=dbn_cache.RETRIES,
+    )
+
+
+async def as_completed(requests, concurrency=MAX_CONCURRENCY, rate=RATE_LIMIT, burst=RATE_BURST,
+                       return_exceptions=False):
+    """
+    Lanzar muchas peticiones a la vez y entregar cada una apenas termina
+
+    Todas comparten un Limiter: a lo sumo `concurrency` descargas en vuelo y
+    `rate` por segundo. Lo que ya está en el caché se entrega sin esperar
+    turno, así que se puede empezar a agregar antes de que termine la más lenta.
+
+    Args:
+        requests: Diccionarios con los argumentos de get_range (dataset,
+            schema, symbols, start y opcionalmente end y stype_in)
+        return_exceptions: Entregar el error en lugar del resultado; si es
+            False, el primer error se propaga y se cancela el resto
+
+    Yields:
+        (petición, CachedRange o excepción) en orden de llegada
+    """
+    limiter = Limiter(concurrency, rate, burst)
+
+    async def run(request):
+        try:
+            return request, await get_range_async(**request, limiter=limiter), None
+        except Exception as e:
+            return request, None, e
+
+    tasks = [asyncio.ensure_future(run(request)) for request in requests]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            request, result, error = await next_done
+            if error is not None and not return_exceptions:
+                raise error
+            yield request, error if error is not None else result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def fetch_all(requests, **kwargs):
+    """
+    as_completed desde código sincrónico
+
+    Returns:
+        Lista de (petición, resultado) en orden de llegada
+    """
+    async def collect():
+        return [item async for item in as_completed(requests, **kwargs)]
+
+    return asyncio.run(collect())
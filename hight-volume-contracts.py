@@ -1,33 +1,31 @@
-import databento as db
-import os
-from dotenv import load_dotenv
+import argparse
+import instrumentation
+import volume_rank
 
-# Cargar variables de entorno
-load_dotenv()
+def rank_by_volume(parent="ZC.FUT", start="2025-01-15", end="2025-03-15", top=10, by="total",
+                   outrights_only=False):
+    """
+    Los `top` instrumentos (contratos y spreads) de un símbolo padre con más volumen
+    
+    Los registros se recorren por bloques con un heap de tamaño top y el
+    volumen de cada día queda en caché (ver volume_rank.DailyVolume)
+    """
+    return volume_rank.rank_by_volume(parent, start, end, top, by, outrights_only)
 
-# Obtener API key desde variable de entorno
-api_key = os.getenv('DATABENTO_API_KEY')
-if not api_key:
-    raise ValueError("DATABENTO_API_KEY no encontrada en el archivo .env")
-
-# Create historical client
-client = db.Historical(api_key)
-
-def rank_by_volume(top=10):
-    # Request OHLCV-1d data
-    data = client.timeseries.get_range(
-        dataset="GLBX.MDP3",
-        symbols="ZCZ5",
-        schema="ohlcv-1d",
-        start="2025-01-15",
-        end="2025-03-15",
-        # encoding="json"
-    )
-
-    # Convert to DataFrame and filter for top 10 instruments by volume
-    # df = data.to_df()
-    # return df.sort_values(by="volume", ascending=False)["instrument_id"].to_list()[:top]
-    return data.to_df()
-
-top_instruments = rank_by_volume()
-print(top_instruments)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ranking de instrumentos por volumen")
+    parser.add_argument("--parent", default="ZC.FUT", help="Símbolo padre (ZC.FUT, ZS.FUT...)")
+    parser.add_argument("--start", default="2025-01-15", help="Fecha inicial")
+    parser.add_argument("--end", default="2025-03-15", help="Fecha final (exclusiva)")
+    parser.add_argument("--top", type=int, default=10, help="Cantidad de instrumentos")
+    parser.add_argument("--by", choices=volume_rank.RANKINGS, default="total",
+                        help="Volumen total del rango o promedio por día operado")
+    parser.add_argument("--outrights", action="store_true", help="Excluir los spreads")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    
+    with instrumentation.session("hight-volume-contracts", args.report, args.profile):
+        top_instruments = rank_by_volume(args.parent, args.start, args.end, args.top, args.by, args.outrights)
+    
+    print(f"📊 Top {args.top} de {args.parent} por volumen ({args.by}) entre {args.start} y {args.end}")
+    print(top_instruments)
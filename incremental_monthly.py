@@ -0,0 +1,148 @@
+import pandas as pd
+from pathlib import Path
+import bar_store
+import fetch
+import monthly_engine
+
+# Estados mensuales guardados (uno por análisis)
+STATE_DIR = bar_store.STORE_DIR / "state"
+
+
+class MonthlyState:
+    """
+    Estado mensual por (símbolo, mes) guardado en disco
+
+    Guarda sumas, conteos, primero/último y máximo/mínimo de cada mes, de modo
+    que agregar barras nuevas solo toca los meses a los que pertenecen.
+    """
+
+    def __init__(self, name, state_dir=None):
+        self.path = Path(state_dir or STATE_DIR) / f"{name}.parquet"
+
+        if self.path.exists():
+            self.state = pd.read_parquet(self.path)
+        else:
+            self.state = pd.DataFrame(columns=monthly_engine.STATE_COLUMNS)
+
+    def watermarks(self):
+        """
+        Último ts_event ya incorporado para cada símbolo
+        """
+        if self.state.empty:
+            return {}
+        return self.state.groupby("symbol")["last_ts"].max().to_dict()
+
+    def reset(self):
+        self.state = pd.DataFrame(columns=monthly_engine.STATE_COLUMNS)
+
+    def update(self, df, symbols=None):
+        """
+        Incorporar barras nuevas, ignorando las que ya estaban en el estado
+
+        La última barra incorporada de cada símbolo puede haber cambiado (la
+        barra parcial del día en curso), así que el mes que la contiene se
+        vuelve a calcular con todas sus barras de df. Para eso df tiene que
+        traer ese mes desde su primera barra (refresh_monthly lo pide así); si
+        no lo trae y la barra vino corregida, se lanza ValueError.
+
+        Returns:
+            DataFrame con las barras que realmente se agregaron o corrigieron
+        """
+        if df is None or df.empty:
+            return pd.DataFrame()
+
+        if "ts_event" not in df.columns:
+            df = df.reset_index()
+        if symbols is not None:
+            df = df[df["symbol"].isin(symbols)]
+
+        # Barras desde la última incorporada de cada símbolo (incluida: puede venir corregida)
+        watermark = pd.to_datetime(df["symbol"].map(self.watermarks()), utc=True)
+        fresh = watermark.isna() | (df["ts_event"] >= watermark)
+        new_bars = df[fresh]
+        if new_bars.empty:
+            return new_bars
+
+        # Meses ya guardados que reciben barras: se rehacen si df los trae completos
+        keys = pd.MultiIndex.from_arrays([df["symbol"], monthly_engine.month_key(df["ts_event"])])
+        stored = pd.Series(
+            pd.to_datetime(self.state["first_ts"], utc=True).to_numpy(),
+            index=pd.MultiIndex.from_frame(self.state[["symbol", "month_year"]]),
+        )
+        touched = keys.isin(keys[fresh.to_numpy()]) & keys.isin(stored.index)
+        first_in_df = df["ts_event"].groupby(keys).transform("min")
+        rebuild = touched & (first_in_df <= stored.reindex(keys).to_numpy())
+
+        revised = ~rebuild & (df["ts_event"] == watermark)
+        if revised.any():
+            raise ValueError(
+                "La última barra guardada vino corregida y faltan barras anteriores de su mes: "
+                "pasar el mes completo para recalcularlo"
+            )
+
+        rebuilt = pd.MultiIndex.from_frame(self.state[["symbol", "month_year"]]).isin(keys[rebuild])
+        self.state = monthly_engine.merge_states(
+            self.state[~rebuilt].reset_index(drop=True),
+            monthly_engine.monthly_state(df[rebuild | fresh]),
+        )
+
+        return new_bars
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        self.state.to_parquet(tmp, index=False)
+        tmp.replace(self.path)
+
+    def to_monthly(self, symbols=None):
+        """
+        Tabla mensual (mismas columnas que monthly_engine.monthly_aggregate)
+        """
+        state = self.state
+        if symbols is not None:
+            state = state[state["symbol"].isin(symbols)]
+        return monthly_engine.finalize_monthly(state)
+
+
+def refresh_monthly(name, symbols, start, end=None, dataset="GLBX.MDP3",
+                    schema="ohlcv-1d", stype_in="continuous", state_dir=None):
+    """
+    Actualizar el estado mensual pidiendo solo las barras que faltan
+
+    Si todos los símbolos ya están en el estado, se piden datos desde el
+    inicio del mes de la última barra incorporada en lugar de desde start:
+    ese mes se recalcula completo por si la última barra cambió.
+
+    Args:
+        name: Nombre del estado (por ejemplo "ZC_monthly_2024-01-01")
+        symbols, start, end, dataset, schema, stype_in: igual que en get_range
+
+    Returns:
+        (tabla mensual, barras nuevas incorporadas)
+    """
+    state = MonthlyState(name, state_dir)
+    watermarks = state.watermarks()
+
+    # Un estado que ya pasó el fin pedido no sirve: se rehace desde cero
+    if end is not None and any(ts >= pd.Timestamp(end, tz="UTC") for ts in watermarks.values()):
+        state.reset()
+        watermarks = {}
+
+    fetch_start = start
+    if watermarks and all(s in watermarks for s in symbols):
+        last = min(watermarks[s] for s in symbols)
+        fetch_start = last.tz_localize(None).to_period("M").to_timestamp().tz_localize(last.tz)
+
+    data = fetch.get_range(
+        dataset=dataset,
+        schema=schema,
+        stype_in=stype_in,
+        symbols=symbols,
+        start=fetch_start,
+        end=end,
+    )
+
+    new_bars = state.update(data.to_df(), symbols)
+    state.save()
+
+    return state.to_monthly(symbols), new_bars
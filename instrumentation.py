@@ -0,0 +1,330 @@
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Carpeta de los perfiles de --profile (cProfile + tracemalloc)
+PROFILE_DIR = Path("profiles")
+
+# Funciones y líneas que se listan en el resumen del perfil
+PROFILE_TOP = 15
+
+# Medidas que acumula cada etapa
+_STAGE_FIELDS = ("calls", "seconds", "cpu_seconds", "max_seconds", "records", "bytes")
+
+
+class Recorder:
+    """
+    Tiempos por etapa y contadores de un proceso
+
+    Las etapas se acumulan por nombre (llamadas, segundos de reloj y de CPU,
+    registros y bytes), así que un bucle que abre miles de spans no hace
+    crecer la memoria. Los spans anidados se nombran con su ruta
+    ("fetch/download"); cada hilo lleva su propia pila.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def stage_path(self, name):
+        """
+        Nombre completo de la etapa `name` dentro de los spans abiertos en este hilo
+        """
+        return "/".join([*self._stack(), name])
+
+    @contextlib.contextmanager
+    def span(self, name, records=None, bytes=None):
+        """
+        Medir un bloque como etapa `name`
+
+        El objeto que devuelve permite sumar registros y bytes cuando se
+        conocen al final (span.add(records=len(df))). También sirve como
+        decorador para medir una función completa.
+        """
+        stack = self._stack()
+        stack.append(name)
+        current = _Span("/".join(stack), records, bytes)
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield current
+        finally:
+            stack.pop()
+            self.add(current.name, time.perf_counter() - started, time.thread_time() - cpu_started,
+                     current.records, current.bytes)
+
+    def add(self, name, seconds, cpu_seconds=0.0, records=None, bytes=None):
+        """
+        Registrar una medición ya tomada (por ejemplo un bloque de un iterador)
+        """
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = dict.fromkeys(_STAGE_FIELDS, 0)
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+            stage["cpu_seconds"] += cpu_seconds
+            stage["max_seconds"] = max(stage["max_seconds"], seconds)
+            stage["records"] += records or 0
+            stage["bytes"] += bytes or 0
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self):
+        """
+        Copia de las etapas y contadores (se puede mandar a otro proceso y usar en merge)
+        """
+        with self._lock:
+            return {
+                "stages": {name: dict(stage) for name, stage in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+    def merge(self, snapshot):
+        """
+        Sumar las mediciones de otro proceso (por ejemplo los workers de batch_runner)
+        """
+        with self._lock:
+            for name, other in snapshot["stages"].items():
+                stage = self.stages.setdefault(name, dict.fromkeys(_STAGE_FIELDS, 0))
+                for field in _STAGE_FIELDS:
+                    if field == "max_seconds":
+                        stage[field] = max(stage[field], other[field])
+                    else:
+                        stage[field] += other[field]
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+
+class _Span:
+
+    def __init__(self, name, records=None, bytes=None):
+        self.name = name
+        self.records = records
+        self.bytes = bytes
+
+    def add(self, records=None, bytes=None):
+        if records is not None:
+            self.records = (self.records or 0) + records
+        if bytes is not None:
+            self.bytes = (self.bytes or 0) + bytes
+
+
+# Registro compartido por todos los módulos del proceso
+recorder = Recorder()
+
+
+def span(name, records=None, bytes=None):
+    """
+    Medir un bloque como etapa del pipeline (ver Recorder.span)
+    """
+    return recorder.span(name, records, bytes)
+
+
+def count(name, value=1):
+    """
+    Sumar value al contador `name` (peticiones, bytes descargados...)
+    """
+    recorder.count(name, value)
+
+
+def stage_path(name):
+    """
+    Ruta de la etapa `name` bajo los spans abiertos (para registrar con recorder.add)
+    """
+    return recorder.stage_path(name)
+
+
+def timed_chunks(name, chunks):
+    """
+    Medir cuánto tarda en producirse cada bloque de un iterador de DataFrames
+
+    Solo se cuenta el tiempo dentro del iterador, no el de quien consume los
+    bloques, y cada bloque suma sus filas a la etapa.
+    """
+    iterator = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        # Se nombra según el span abierto en el momento de pedir el bloque
+        recorder.add(recorder.stage_path(name), time.perf_counter() - started, time.thread_time() - cpu_started,
+                     records=len(chunk))
+        yield chunk
+
+
+def report(meta=None):
+    """
+    Reporte estructurado: meta, etapas (ordenadas por tiempo) y contadores
+    """
+    snapshot = recorder.snapshot()
+    stages = [
+        {"stage": name, **stage}
+        for name, stage in sorted(snapshot["stages"].items(), key=lambda item: -item[1]["seconds"])
+    ]
+    return {"meta": meta or {}, "stages": stages, "counters": snapshot["counters"]}
+
+
+def to_line_protocol(data, measurement="pipeline"):
+    """
+    Reporte en line protocol (InfluxDB/Telegraf): una línea por etapa y una de contadores
+    """
+    meta = data["meta"]
+    tags = f",script={_escape_tag(meta.get('script', 'unknown'))}"
+    timestamp = int(datetime.fromisoformat(meta["started"]).timestamp() * 1e9) if "started" in meta else ""
+
+    lines = []
+    for stage in data["stages"]:
+        fields = ",".join(_field(key, stage[key]) for key in _STAGE_FIELDS)
+        lines.append(f"{measurement}_stage{tags},stage={_escape_tag(stage['stage'])} {fields} {timestamp}".rstrip())
+
+    counters = dict(data["counters"])
+    if "seconds" in meta:
+        counters["total_seconds"] = meta["seconds"]
+    if meta.get("peak_mb") is not None:
+        counters["peak_mb"] = meta["peak_mb"]
+    if counters:
+        fields = ",".join(_field(key, value) for key, value in sorted(counters.items()))
+        lines.append(f"{measurement}_counters{tags} {fields} {timestamp}".rstrip())
+
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path, data):
+    """
+    Guardar el reporte: JSON si path termina en .json, line protocol en otro caso ("-" = consola)
+    """
+    text = json.dumps(data, indent=2) + "\n" if str(path).endswith(".json") else to_line_protocol(data)
+    if str(path) == "-":
+        sys.stdout.write(text)
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(text)
+
+
+def print_summary(data):
+    """
+    Tabla de etapas y contadores para la consola
+    """
+    print(f"\n⏱️  ETAPAS - {data['meta'].get('script', '')} ({data['meta'].get('seconds', 0):.2f}s en total)")
+    print("="*78)
+    print(f"{'Etapa':<32} {'Llamadas':>8} {'Seg.':>9} {'CPU':>9} {'Registros':>10} {'MB':>7}")
+    print("-" * 78)
+    for stage in data["stages"]:
+        print(f"{stage['stage']:<32} {stage['calls']:>8} {stage['seconds']:>9.3f} "
+              f"{stage['cpu_seconds']:>9.3f} {stage['records']:>10} {stage['bytes'] / 1e6:>7.1f}")
+    for name, value in sorted(data["counters"].items()):
+        print(f"   • {name}: {value}")
+
+
+def add_arguments(parser):
+    """
+    Agregar --report y --profile al argparse de un script
+    """
+    parser.add_argument("--report", metavar="PATH", default=None,
+                        help="Guardar tiempos por etapa y contadores (.json o line protocol; '-' = consola)")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Perfilar con cProfile y tracemalloc (archivos en {PROFILE_DIR}/)")
+
+
+@contextlib.contextmanager
+def session(script, report_path=None, profile=False, profile_dir=None):
+    """
+    Ejecución instrumentada de un script completo
+
+    Reinicia las mediciones; al salir imprime el resumen y guarda el reporte
+    si se pidió. Con profile=True también corre cProfile y tracemalloc y
+    guarda <script>-<fecha>.prof (abrir con pstats o snakeviz) y .txt con las
+    funciones más lentas y las líneas que más memoria reservaron.
+    """
+    recorder.reset()
+    started = datetime.now(timezone.utc)
+    clock = time.perf_counter()
+
+    profiler = None
+    if profile:
+        tracemalloc.start()
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        yield recorder
+    finally:
+        meta = {
+            "script": script,
+            "started": started.isoformat(timespec="seconds"),
+            "seconds": time.perf_counter() - clock,
+            "argv": sys.argv[1:],
+        }
+
+        if profiler is not None:
+            profiler.disable()
+            meta["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+            memory = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            meta["profile"] = str(_save_profile(script, started, profiler, memory, profile_dir))
+
+        data = report(meta)
+        if report_path is not None or profile:
+            print_summary(data)
+        if report_path is not None:
+            write_report(report_path, data)
+            if report_path != "-":
+                print(f"💾 Reporte de etapas en: {report_path}")
+        if profiler is not None:
+            print(f"🔬 Perfil en: {meta['profile']} (pico de memoria {meta['peak_mb']:.1f} MB)")
+
+
+def _save_profile(script, started, profiler, memory, profile_dir=None):
+    directory = Path(profile_dir or PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    base = directory / f"{script}-{started:%Y%m%d-%H%M%S}"
+
+    prof_path = base.with_suffix(".prof")
+    profiler.dump_stats(prof_path)
+
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    text.write(f"\nMemoria reservada por línea (top {PROFILE_TOP}):\n")
+    for stat in memory.statistics("lineno")[:PROFILE_TOP]:
+        text.write(f"{stat}\n")
+    base.with_suffix(".txt").write_text(text.getvalue())
+
+    return prof_path
+
+
+def _escape_tag(value):
+    return str(value).replace("\\", "\\\\").replace(",", "\\,").replace(" ", "\\ ").replace("=", "\\=")
+
+
+def _field(key, value):
+    if isinstance(value, bool):
+        return f"{key}={str(value).lower()}"
+    if isinstance(value, int):
+        return f"{key}={value}i"
+    return f"{key}={float(value)}"
@@ -0,0 +1,478 @@
+import argparse
+import heapq
+import time
+import databento as db
+import databento_dbn as dbn
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import fetch
+import instrumentation
+import maiz_2026_analysis
+import monthly_engine
+
+# Schemas de barras que acepta el modo en vivo
+LIVE_SCHEMAS = ["ohlcv-1s", "ohlcv-1m"]
+
+# Cada cuánto se recalculan los agregados y se redibuja (segundos)
+REFRESH_SECONDS = 0.5
+
+# Tipos de registro con barras OHLCV
+_OHLCV_RECORDS = (dbn.OHLCVMsg,)
+
+_BAR_COLUMNS = ["ts_event", "symbol", "open", "high", "low", "close", "volume"]
+
+# Barra diaria a partir de barras más finas (o de una barra diaria parcial y las que siguen)
+_DAILY_AGGREGATIONS = {
+    "open": ("open", "first"),
+    "high": ("high", "max"),
+    "low": ("low", "min"),
+    "close": ("close", "last"),
+    "volume": ("volume", "sum"),
+}
+
+
+class LiveCurve:
+    """
+    Estado de la curva de futuros que se actualiza registro a registro
+
+    Guarda el último precio de cada contrato, la barra diaria (día UTC, como
+    ohlcv-1d) que se va armando con las barras de cada contrato y un estado
+    mensual (monthly_engine) con los días ya cerrados. Así los promedios del
+    mes son de barras diarias, igual que en la tabla del modo por lotes, y no
+    de barras de un minuto o un segundo.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self._wanted = set(self.symbols)
+        self.instruments = {}  # instrument_id -> símbolo (de los SymbolMappingMsg)
+        self.latest = {}       # símbolo -> último close
+        self.last_ts = None
+        self.state = pd.DataFrame(columns=monthly_engine.STATE_COLUMNS)
+        self.open_days = pd.DataFrame(columns=_BAR_COLUMNS)  # barras diarias del día en curso
+        self._pending = []
+
+    def on_record(self, record):
+        """
+        Incorporar un registro del stream
+
+        Returns:
+            True si el registro era una barra de uno de los contratos seguidos
+        """
+        if isinstance(record, dbn.SymbolMappingMsg):
+            self.instruments[record.instrument_id] = record.stype_in_symbol
+            return False
+
+        if not isinstance(record, _OHLCV_RECORDS):
+            return False
+
+        symbol = self.instruments.get(record.instrument_id)
+        if symbol not in self._wanted:
+            return False
+
+        self.latest[symbol] = record.pretty_close
+        self.last_ts = record.ts_event
+        self._pending.append((
+            record.ts_event, symbol,
+            record.pretty_open, record.pretty_high, record.pretty_low, record.pretty_close,
+            record.volume,
+        ))
+        return True
+
+    def flush(self):
+        """
+        Sumar las barras acumuladas a las barras diarias (una agrupación por tanda)
+
+        Los días anteriores al de la última barra ya no reciben barras (el
+        stream llega en orden de ts_event): pasan al estado mensual.
+        """
+        if not self._pending:
+            return
+
+        bars = pd.DataFrame(self._pending, columns=_BAR_COLUMNS)
+        bars["ts_event"] = pd.to_datetime(bars["ts_event"], utc=True).dt.floor("D")
+        self._pending = []
+
+        # La barra parcial de cada día va antes que sus barras nuevas: first/last siguen el orden
+        frames = [bars] if self.open_days.empty else [self.open_days, bars]
+        days = (
+            pd.concat(frames, ignore_index=True)
+            .groupby(["symbol", "ts_event"], sort=True)
+            .agg(**_DAILY_AGGREGATIONS)
+            .reset_index()[_BAR_COLUMNS]
+        )
+
+        closed = days["ts_event"] < days["ts_event"].max()
+        if closed.any():
+            self.state = monthly_engine.merge_states(self.state, monthly_engine.monthly_state(days[closed]))
+        self.open_days = days[~closed].reset_index(drop=True)
+
+    def spreads(self):
+        """
+        Spreads entre contratos consecutivos (ver maiz_2026_analysis.curve_spreads)
+        """
+        return maiz_2026_analysis.curve_spreads(self.latest)
+
+    def structure(self):
+        """
+        CONTANGO / BACKWARDATION entre el primer y el último contrato con precio
+        """
+        priced = [s for s in self.symbols if s in self.latest]
+        if len(priced) < 2:
+            return None
+        return maiz_2026_analysis.curve_structure(self.latest[priced[0]], self.latest[priced[-1]])
+
+    def current_month(self):
+        """
+        Agregados del mes en curso por contrato (columnas de monthly_aggregate)
+
+        El día en curso cuenta con su barra diaria parcial.
+        """
+        state = monthly_engine.merge_states(self.state, monthly_engine.monthly_state(self.open_days))
+        monthly = monthly_engine.finalize_monthly(state)
+        if monthly.empty:
+            return monthly
+        return monthly[monthly["month_year"] == monthly["month_year"].max()].reset_index(drop=True)
+
+
+class LiveCurveChart:
+    """
+    Curva, spreads y mes en curso redibujados con blitting
+
+    El fondo (ejes, grillas, títulos) se dibuja una vez y se guarda; en cada
+    actualización solo se restauran ese fondo y se dibujan las barras y los
+    textos animados. Si un valor se sale de la escala, se redibuja todo.
+    """
+
+    def __init__(self, symbols, figure=None):
+        self.symbols = list(symbols)
+        if figure is None:
+            figure = Figure(figsize=(16, 5))
+            FigureCanvasAgg(figure)
+        self.figure = figure
+        self.canvas = figure.canvas
+        self.ax_curve, self.ax_spread, self.ax_month = figure.subplots(1, 3)
+
+        n = len(self.symbols)
+
+        self.ax_curve.set_title("Curva de Futuros en Vivo")
+        self.ax_curve.set_ylabel("Precio ($)")
+        self.ax_curve.grid(True, alpha=0.3)
+        self.ax_curve.set_xticks(range(n))
+        self.ax_curve.set_xticklabels(self.symbols, rotation=45)
+        self.curve_bars = self.ax_curve.bar(range(n), [0] * n, alpha=0.7, animated=True).patches
+        self.curve_texts = [
+            self.ax_curve.text(i, 0, '', ha='center', va='bottom', fontweight='bold', animated=True)
+            for i in range(n)
+        ]
+
+        self.ax_spread.set_title("Spreads entre Contratos\n(Rojo=Contango, Azul=Backwardation)")
+        self.ax_spread.set_ylabel("Diferencia de Precio ($)")
+        self.ax_spread.axhline(y=0, color='black', linestyle='--', alpha=0.5)
+        self.ax_spread.grid(True, alpha=0.3)
+        self.ax_spread.set_xticks(range(n - 1))
+        self.ax_spread.set_xticklabels(
+            [f"{self.symbols[i - 1]}\nvs\n{self.symbols[i]}" for i in range(1, n)], rotation=45
+        )
+        self.spread_bars = self.ax_spread.bar(range(n - 1), [0] * (n - 1), alpha=0.7, animated=True).patches
+
+        self.ax_month.set_title("Mes en Curso")
+        self.ax_month.axis('off')
+        self.month_text = self.ax_month.text(
+            0, 1, '', va='top', family='monospace', fontsize=9,
+            transform=self.ax_month.transAxes, animated=True,
+        )
+        self.status_text = figure.text(0.5, 0.98, '', ha='center', va='top', fontsize=12,
+                                       fontweight='bold', animated=True)
+
+        self._animated = [*self.curve_bars, *self.curve_texts, *self.spread_bars,
+                          self.month_text, self.status_text]
+        self._background = None
+        figure.tight_layout(rect=(0, 0, 1, 0.94))
+
+        # Si la ventana cambia de tamaño, el fondo guardado deja de servir
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self._animated:
+            self.figure.draw_artist(artist)
+
+    def update(self, curve):
+        """
+        Refrescar el gráfico con el estado actual de la curva
+        """
+        prices = [curve.latest.get(s, np.nan) for s in self.symbols]
+        spreads = [
+            prices[i] - prices[i - 1] for i in range(1, len(prices))
+        ]
+        rescale = (
+            _out_of_range(self.ax_curve, [0, *prices])
+            | _out_of_range(self.ax_spread, [0, *spreads])
+        )
+
+        for i, (bar, text, price) in enumerate(zip(self.curve_bars, self.curve_texts, prices)):
+            if np.isnan(price):
+                bar.set_height(0)
+                text.set_text('')
+                continue
+            bar.set_height(price)
+            bar.set_facecolor('red' if i < 3 else 'green')
+            text.set_position((i, price + 1))
+            text.set_text(f'${price:.2f}')
+
+        for bar, spread in zip(self.spread_bars, spreads):
+            bar.set_height(0 if np.isnan(spread) else spread)
+            bar.set_facecolor('red' if spread > 0 else 'blue')
+
+        structure = curve.structure()
+        stamp = pd.Timestamp(curve.last_ts, tz='UTC').strftime('%Y-%m-%d %H:%M:%S') if curve.last_ts else ''
+        self.status_text.set_text(f"{structure or 'Esperando datos...'}  {stamp}")
+        self.status_text.set_color('red' if structure == "CONTANGO" else 'blue')
+
+        month = curve.current_month()
+        self.month_text.set_text(_format_month(month))
+
+        if rescale or self._background is None:
+            # Nueva escala: dibujo completo (draw_event vuelve a guardar el fondo)
+            _fit(self.ax_curve, [0, *prices])
+            _fit(self.ax_spread, [0, *spreads])
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_animated()
+            self.canvas.blit(self.figure.bbox)
+        self.canvas.flush_events()
+
+    def save(self, output_path):
+        """
+        Guardar el estado actual en un archivo (los artistas animados incluidos)
+        """
+        for artist in self._animated:
+            artist.set_animated(False)
+        try:
+            self.figure.savefig(output_path)
+        finally:
+            for artist in self._animated:
+                artist.set_animated(True)
+            # El fondo se guardó con las barras dibujadas: rehacerlo en el próximo update
+            self._background = None
+
+
+def _out_of_range(ax, values):
+    values = [v for v in values if not np.isnan(v)]
+    if not values:
+        return False
+    lo, hi = ax.get_ylim()
+    return min(values) < lo or max(values) > hi
+
+
+def _fit(ax, values):
+    values = [v for v in values if not np.isnan(v)]
+    lo, hi = min(values), max(values)
+    margin = max((hi - lo) * 0.25, 1)
+    ax.set_ylim(lo - margin if lo < 0 else 0, hi + margin)
+
+
+def _format_month(month):
+    if month.empty:
+        return ''
+    lines = [f"{month['month'].iloc[0]}  {'Open':>8} {'Close':>8} {'Diff':>7} {'Días':>7}"]
+    for row in month.itertuples(index=False):
+        lines.append(f"{row.symbol:<7} {row.open_avg:>8.2f} {row.close_avg:>8.2f} "
+                     f"{row.diff:>7.2f} {row.days_count:>7}")
+    return "\n".join(lines)
+
+
+class ReplayLive:
+    """
+    Reemplazo local de db.Live que reproduce archivos DBN grabados
+
+    Implementa lo que usa run_live (subscribe, iterar, stop): los registros de
+    todos los archivos salen en orden de ts_event, precedidos por los
+    SymbolMappingMsg de las mappings del metadata (o los que ya traiga el
+    archivo, como en una sesión grabada con add_stream).
+
+    Args:
+        paths: Archivos DBN (por ejemplo del caché o grabados con --record)
+        speed: None = lo más rápido posible; 1.0 = tiempo real; 60 = 60x
+    """
+
+    def __init__(self, paths, speed=None):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.speed = speed
+        self.schema = None
+        self.symbology_map = {}
+        self._stopped = False
+
+    def subscribe(self, dataset, schema, symbols="ALL_SYMBOLS", stype_in="raw_symbol", start=None):
+        self.schema = str(schema)
+
+    def add_stream(self, stream):
+        # Los archivos ya están grabados: no hay nada que volver a guardar
+        pass
+
+    def stop(self):
+        self._stopped = True
+
+    def block_for_close(self, timeout=None):
+        pass
+
+    def __iter__(self):
+        streams = [self._records(path) for path in self.paths]
+        previous = None
+
+        for _, _, record in heapq.merge(*streams, key=lambda item: item[:2]):
+            if self._stopped:
+                return
+            if self.speed and previous is not None and record.ts_event > previous:
+                time.sleep((record.ts_event - previous) / 1e9 / self.speed)
+            previous = record.ts_event
+
+            if isinstance(record, dbn.SymbolMappingMsg):
+                self.symbology_map[record.instrument_id] = record.stype_in_symbol
+            yield record
+
+    def _records(self, path):
+        store = db.DBNStore.from_file(path)
+        if store.schema is not None and self.schema is not None and str(store.schema) != self.schema:
+            return
+
+        # Mappings del metadata como mensajes, igual que los envía el gateway
+        mappings = []
+        for symbol, intervals in store.mappings.items():
+            for interval in intervals:
+                start = pd.Timestamp(interval["start_date"], tz='UTC').value
+                end = pd.Timestamp(interval["end_date"], tz='UTC').value
+                mappings.append((start, 0, dbn.SymbolMappingMsg(
+                    0, int(interval["symbol"]), start,
+                    store.metadata.stype_in or dbn.SType.RAW_SYMBOL, symbol,
+                    dbn.SType.INSTRUMENT_ID, interval["symbol"], start, end,
+                )))
+        mappings.sort(key=lambda item: item[:2])
+
+        # Las mappings de un mismo instante van antes que las barras
+        records = ((record.ts_event, 0 if isinstance(record, dbn.SymbolMappingMsg) else 1, record)
+                   for record in store)
+        yield from heapq.merge(mappings, records, key=lambda item: item[:2])
+
+
+def run_live(client, symbols, dataset="GLBX.MDP3", schema="ohlcv-1m", stype_in="continuous",
+             chart=None, refresh=REFRESH_SECONDS, max_records=None, on_update=None):
+    """
+    Suscribirse a las barras de la curva y mantener spreads, estructura y mes en curso
+
+    Args:
+        client: db.Live (fetch.get_live_client) o ReplayLive
+        symbols: Contratos continuos a seguir (ZC.c.0 ... ZC.c.5)
+        chart: LiveCurveChart opcional a redibujar en cada refresco
+        refresh: Segundos mínimos entre refrescos
+        max_records: Cortar después de tantas barras (None = hasta que termine el stream)
+        on_update: Función opcional llamada con la LiveCurve en cada refresco
+
+    Returns:
+        LiveCurve con el estado final
+    """
+    curve = LiveCurve(symbols)
+    client.subscribe(dataset=dataset, schema=schema, stype_in=stype_in, symbols=symbols)
+
+    received = 0
+    last_refresh = time.monotonic()
+    last_structure = None
+
+    def refresh_views():
+        nonlocal last_structure
+        with instrumentation.span("flush", records=len(curve._pending)):
+            curve.flush()
+
+        structure = curve.structure()
+        if structure is not None and structure != last_structure:
+            emoji = "🔴" if structure == "CONTANGO" else "🔵"
+            stamp = pd.Timestamp(curve.last_ts, tz='UTC')
+            print(f"{emoji} {stamp:%Y-%m-%d %H:%M} Mercado en {structure}")
+            last_structure = structure
+
+        if chart is not None:
+            with instrumentation.span("redraw"):
+                chart.update(curve)
+        if on_update is not None:
+            on_update(curve)
+
+    try:
+        for record in client:
+            if not curve.on_record(record):
+                continue
+            received += 1
+
+            if time.monotonic() - last_refresh >= refresh:
+                refresh_views()
+                # Contar desde el final del refresco: un redibujo lento no encadena otro
+                last_refresh = time.monotonic()
+
+            if max_records is not None and received >= max_records:
+                break
+    finally:
+        client.stop()
+        instrumentation.count("live_records", received)
+
+    refresh_views()
+    return curve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Curva de futuros en vivo (spreads, contango y mes en curso)")
+    parser.add_argument("--commodity", default="ZC", help="Raíz a seguir (ZC, ZS, ZW...)")
+    parser.add_argument("--schema", choices=LIVE_SCHEMAS, default="ohlcv-1m")
+    parser.add_argument("--replay", nargs="+", default=None,
+                        help="Reproducir archivos DBN grabados en lugar de conectarse a db.Live")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="Velocidad de la reproducción (1 = tiempo real; por defecto, lo más rápido posible)")
+    parser.add_argument("--record", default=None, help="Grabar la sesión en vivo en este archivo DBN")
+    parser.add_argument("--max-records", type=int, default=None)
+    parser.add_argument("--output", default=None,
+                        help="Sin ventana: guardar el gráfico final en este archivo (PNG, SVG...)")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+
+    with instrumentation.session("live_curve", args.report, args.profile):
+        _run(args)
+
+
+def _run(args):
+    symbols = maiz_2026_analysis.curve_symbols(args.commodity)
+
+    if args.replay:
+        client = ReplayLive(args.replay, speed=args.speed)
+    else:
+        client = fetch.get_live_client()
+        if args.record:
+            client.add_stream(args.record)
+
+    if args.output:
+        chart = LiveCurveChart(symbols)
+    else:
+        import matplotlib.pyplot as plt
+        plt.ion()
+        chart = LiveCurveChart(symbols, plt.figure(figsize=(16, 5)))
+        plt.show(block=False)
+
+    print(f"📡 Curva en vivo {args.commodity} ({args.schema}): {symbols}")
+    curve = run_live(client, symbols, schema=args.schema, chart=chart, max_records=args.max_records)
+
+    print(f"\n📊 Estado final: {curve.structure()}")
+    for first, second, spread in curve.spreads():
+        print(f"   {first} vs {second}: ${spread:+.2f}")
+
+    if args.output:
+        with instrumentation.span("render"):
+            chart.save(args.output)
+        print(f"🖼️ Gráfico guardado en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
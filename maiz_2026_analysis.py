@@ -1,215 +1,167 @@
-import databento as db
 import matplotlib.pyplot as plt
-import pandas as pd
 import numpy as np
-import os
-from dotenv import load_dotenv
+import argparse
+import bar_store
+import dashboards
+import fetch
+import instrumentation
+import term_structure
 
-# Cargar variables de entorno
-load_dotenv()
+def curve_symbols(commodity="ZC"):
+    """
+    Contratos continuos que se extienden hacia 2026
+    """
+    return [
+        f"{commodity}.c.0",  # Front month (actual)
+        f"{commodity}.c.1",  # 2do mes
+        f"{commodity}.c.2",  # 3er mes  
+        f"{commodity}.c.3",  # 4to mes (probablemente 2026)
+        f"{commodity}.c.4",  # 5to mes (definitivamente 2026)
+        f"{commodity}.c.5",  # 6to mes (2026)
+    ]
 
-# Obtener API key desde variable de entorno
-api_key = os.getenv('DATABENTO_API_KEY')
-if not api_key:
-    raise ValueError("DATABENTO_API_KEY no encontrada en el archivo .env")
+def curve_structure(front_price, far_price):
+    """
+    CONTANGO si el contrato lejano está más caro que el front month, si no BACKWARDATION
+    """
+    return "CONTANGO" if far_price > front_price else "BACKWARDATION"
 
-client = db.Historical(api_key)
-
-print("🌽 Analizando proyecciones de maíz hacia 2026 usando contratos continuos...")
-
-# Usar contratos continuos que se extienden hacia 2026
-symbols_2026_projection = [
-    "ZC.c.0",  # Front month (actual)
-    "ZC.c.1",  # 2do mes
-    "ZC.c.2",  # 3er mes  
-    "ZC.c.3",  # 4to mes (probablemente 2026)
-    "ZC.c.4",  # 5to mes (definitivamente 2026)
-    "ZC.c.5",  # 6to mes (2026)
-]
-
-print(f"📊 Obteniendo datos para: {symbols_2026_projection}")
+def curve_spreads(latest_prices):
+    """
+    Diferencia de precio entre contratos consecutivos de la curva
+    
+    Args:
+        latest_prices: Series o dict símbolo -> último precio
+    
+    Returns:
+        Lista de (contrato anterior, contrato siguiente, spread), por posición (c.9 antes que c.10)
+    """
+    contracts_sorted = sorted(latest_prices.keys(), key=lambda symbol: (bar_store.split_symbol(symbol), symbol))
+    prices = np.array([latest_prices[contract] for contract in contracts_sorted], dtype=float)
+    return list(zip(contracts_sorted[:-1], contracts_sorted[1:], np.diff(prices).tolist()))
 
-try:
-    data = client.timeseries.get_range(
+def fetch_data(commodity="ZC", start_date="2024-01-01", end_date="2025-10-23"):
+    """
+    Obtener las barras diarias de la curva (DataFrame indexado por ts_event)
+    """
+    data = fetch.get_range(
         dataset="GLBX.MDP3",
         schema="ohlcv-1d",
         stype_in="continuous",
-        symbols=symbols_2026_projection,
-        start="2024-01-01",
-        end="2025-10-23"
+        symbols=curve_symbols(commodity),
+        start=start_date,
+        end=end_date
     )
     
-    df = data.to_df()
+    return data.to_df()
+
+def main(commodity="ZC", start_date="2024-01-01", end_date="2025-10-23", output_path=None, df=None):
+    """
+    Análisis de la curva de futuros hacia 2026
+    
+    Args:
+        commodity: Raíz a analizar (ZC = Maíz)
+        start_date, end_date: Rango de barras diarias
+        output_path: Guardar el tablero en este archivo (PNG, SVG...) en lugar de mostrarlo
+        df: Barras ya descargadas con fetch_data (opcional)
+    """
+    print("🌽 Analizando proyecciones de maíz hacia 2026 usando contratos continuos...")
+    
+    # Usar contratos continuos que se extienden hacia 2026
+    symbols_2026_projection = curve_symbols(commodity)
+    projection_contracts = symbols_2026_projection[3:]
+    
+    print(f"📊 Obteniendo datos para: {symbols_2026_projection}")
+    
+    try:
+        if df is None:
+            df = fetch_data(commodity, start_date, end_date)
     
-    if not df.empty:
-        print(f"✅ Datos obtenidos: {len(df)} registros")
+        if not df.empty:
+            print(f"✅ Datos obtenidos: {len(df)} registros")
         
-        # Análisis de precios actuales
-        print("\n📈 PRECIOS ACTUALES (Oct 2025):")
-        latest_prices = df.groupby('symbol')['close'].last()
-        for symbol, price in latest_prices.items():
-            if symbol in ['ZC.c.3', 'ZC.c.4', 'ZC.c.5']:
-                print(f"  {symbol}: ${price:.2f} ⭐ (Proyección 2026)")
+            # Curva completa de toda la historia (fechas x posiciones)
+            curve = term_structure.TermStructure.from_bars(df, roots=[commodity])
+            
+            # Análisis de precios actuales
+            print("\n📈 PRECIOS ACTUALES (Oct 2025):")
+            latest_prices = curve.curve(root=commodity).dropna()
+            for symbol, price in latest_prices.items():
+                if symbol in projection_contracts:
+                    print(f"  {symbol}: ${price:.2f} ⭐ (Proyección 2026)")
+                else:
+                    print(f"  {symbol}: ${price:.2f}")
+        
+            # Crear visualización completa
+            with instrumentation.span("render", records=len(df)):
+                if output_path:
+                    # Sin pantalla: plantilla Agg reutilizada entre raíces y fechas
+                    dashboards.render_maiz(df, commodity, output_path)
+                    print(f"🖼️ Gráfico guardado en: {output_path}")
+                else:
+                    dashboard = dashboards.MaizDashboard(plt.figure(figsize=(16, 10)))
+                    dashboard.update(df, commodity)
+                    plt.tight_layout()
+                    plt.show()
+        
+            # Resumen de análisis
+            print("\n📊 ANÁLISIS DE PROYECCIONES 2026:")
+            print("="*50)
+        
+            # Identificar si hay contango o backwardation
+            front_price = latest_prices[symbols_2026_projection[0]]
+            far_price = latest_prices[symbols_2026_projection[-1]]
+            market_structure = curve_structure(front_price, far_price)
+            contango_share = curve.structure_share(commodity)
+        
+            if market_structure == "CONTANGO":
+                print(f"🔴 Mercado en {market_structure}: Los precios futuros son más altos")
+                print(f"   Front month: ${front_price:.2f}")
+                print(f"   6to mes (2026): ${far_price:.2f}")
+                print(f"   Diferencia: +${far_price - front_price:.2f}")
             else:
-                print(f"  {symbol}: ${price:.2f}")
-        
-        # Crear visualización completa
-        plt.figure(figsize=(16, 10))
-        
-        # Gráfico 1: Evolución temporal de todos los contratos
-        plt.subplot(2, 3, 1)
-        colors = ['red', 'orange', 'yellow', 'lightgreen', 'green', 'darkgreen']
-        for i, symbol in enumerate(df['symbol'].unique()):
-            symbol_data = df[df['symbol'] == symbol]
-            plt.plot(symbol_data.index, symbol_data['close'], 
-                    label=symbol, linewidth=2, color=colors[i % len(colors)])
-        plt.title("Evolución de Precios - Curva de Futuros")
-        plt.xlabel("Fecha")
-        plt.ylabel("Precio ($)")
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        
-        # Gráfico 2: Curva de futuros actual (contango/backwardation)
-        plt.subplot(2, 3, 2)
-        contracts = latest_prices.index.tolist()
-        prices = latest_prices.values.tolist()
-        
-        colors_bar = ['red' if 'c.0' in c or 'c.1' in c or 'c.2' in c 
-                     else 'green' for c in contracts]
-        
-        bars = plt.bar(range(len(contracts)), prices, color=colors_bar, alpha=0.7)
-        plt.title("Curva de Futuros Actual\n(Verde = Proyección 2026)")
-        plt.xlabel("Contrato")
-        plt.ylabel("Precio ($)")
-        plt.xticks(range(len(contracts)), contracts, rotation=45)
-        
-        # Añadir valores en las barras
-        for i, (bar, price) in enumerate(zip(bars, prices)):
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1, 
-                    f'${price:.0f}', ha='center', va='bottom', fontweight='bold')
-        plt.grid(True, alpha=0.3)
-        
-        # Gráfico 3: Spread entre contratos (contango analysis)
-        plt.subplot(2, 3, 3)
-        spreads = []
-        spread_labels = []
-        
-        contracts_sorted = sorted(latest_prices.index)
-        for i in range(1, len(contracts_sorted)):
-            spread = latest_prices[contracts_sorted[i]] - latest_prices[contracts_sorted[i-1]]
-            spreads.append(spread)
-            spread_labels.append(f"{contracts_sorted[i-1]}\nvs\n{contracts_sorted[i]}")
+                print(f"🔵 Mercado en {market_structure}: Los precios futuros son más bajos")
+                print(f"   Front month: ${front_price:.2f}")
+                print(f"   6to mes (2026): ${far_price:.2f}")
+                print(f"   Diferencia: ${far_price - front_price:.2f}")
         
-        colors_spread = ['red' if s > 0 else 'blue' for s in spreads]
-        bars_spread = plt.bar(range(len(spreads)), spreads, color=colors_spread, alpha=0.7)
-        plt.title("Spreads entre Contratos\n(Rojo=Contango, Azul=Backwardation)")
-        plt.xlabel("Par de Contratos")
-        plt.ylabel("Diferencia de Precio ($)")
-        plt.xticks(range(len(spread_labels)), spread_labels, rotation=45)
-        plt.axhline(y=0, color='black', linestyle='--', alpha=0.5)
-        plt.grid(True, alpha=0.3)
-        
-        # Gráfico 4: Análisis de volatilidad
-        plt.subplot(2, 3, 4)
-        volatilities = df.groupby('symbol')['close'].std()
-        bars_vol = plt.bar(volatilities.index, volatilities.values, 
-                          color='purple', alpha=0.7)
-        plt.title("Volatilidad por Contrato")
-        plt.xlabel("Contrato")
-        plt.ylabel("Volatilidad ($)")
-        plt.xticks(rotation=45)
-        plt.grid(True, alpha=0.3)
-        
-        # Gráfico 5: Retornos diarios promedio
-        plt.subplot(2, 3, 5)
-        returns = df.groupby('symbol')['close'].pct_change().groupby(df['symbol']).mean() * 100
-        colors_ret = ['red' if r < 0 else 'green' for r in returns.values]
-        bars_ret = plt.bar(returns.index, returns.values, color=colors_ret, alpha=0.7)
-        plt.title("Retorno Diario Promedio (%)")
-        plt.xlabel("Contrato")
-        plt.ylabel("Retorno Diario (%)")
-        plt.xticks(rotation=45)
-        plt.axhline(y=0, color='black', linestyle='--', alpha=0.5)
-        plt.grid(True, alpha=0.3)
-        
-        # Gráfico 6: Proyección simple de tendencia
-        plt.subplot(2, 3, 6)
-        
-        # Calcular tendencias para contratos 2026
-        projection_contracts = ['ZC.c.3', 'ZC.c.4', 'ZC.c.5']
-        
-        for contract in projection_contracts:
-            if contract in df['symbol'].unique():
-                contract_data = df[df['symbol'] == contract]['close']
-                
-                # Calcular tendencia lineal simple (últimos 30 días)
-                recent_data = contract_data.tail(30)
-                if len(recent_data) > 1:
-                    x = range(len(recent_data))
-                    z = np.polyfit(x, recent_data.values, 1)
-                    trend_line = np.poly1d(z)
-                    
-                    # Proyectar 30 días más
-                    future_x = range(len(recent_data), len(recent_data) + 30)
-                    future_prices = trend_line(future_x)
-                    
-                    plt.plot(x, recent_data.values, 'o-', label=f'{contract} (Actual)', linewidth=2)
-                    plt.plot(future_x, future_prices, '--', label=f'{contract} (Proyección)', linewidth=2)
-        
-        plt.title("Proyección de Tendencia (30 días)\nContratos 2026")
-        plt.xlabel("Días")
-        plt.ylabel("Precio ($)")
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        plt.show()
-        
-        # Resumen de análisis
-        print("\n📊 ANÁLISIS DE PROYECCIONES 2026:")
-        print("="*50)
-        
-        # Identificar si hay contango o backwardation
-        front_price = latest_prices['ZC.c.0']
-        far_price = latest_prices['ZC.c.5']
-        
-        if far_price > front_price:
-            market_structure = "CONTANGO"
-            print(f"🔴 Mercado en {market_structure}: Los precios futuros son más altos")
-            print(f"   Front month: ${front_price:.2f}")
-            print(f"   6to mes (2026): ${far_price:.2f}")
-            print(f"   Diferencia: +${far_price - front_price:.2f}")
-        else:
-            market_structure = "BACKWARDATION"
-            print(f"🔵 Mercado en {market_structure}: Los precios futuros son más bajos")
-            print(f"   Front month: ${front_price:.2f}")
-            print(f"   6to mes (2026): ${far_price:.2f}")
-            print(f"   Diferencia: ${far_price - front_price:.2f}")
-        
-        print(f"\n🎯 CONTRATOS PARA EXPOSICIÓN 2026:")
-        for contract in ['ZC.c.3', 'ZC.c.4', 'ZC.c.5']:
-            if contract in latest_prices:
-                price = latest_prices[contract]
-                print(f"   {contract}: ${price:.2f}")
-        
-        print(f"\n💡 INTERPRETACIÓN:")
-        print(f"   • Los contratos ZC.c.3, ZC.c.4, ZC.c.5 te dan exposición a precios de 2026")
-        print(f"   • El mercado está en {market_structure}")
-        if market_structure == "CONTANGO":
-            print(f"   • Esto sugiere expectativa de precios más altos en el futuro")
-            print(f"   • Posible escasez esperada o costos de almacenamiento")
-        else:
-            print(f"   • Esto sugiere expectativa de precios más bajos en el futuro")
-            print(f"   • Posible abundancia esperada o presión de inventarios")
+            print(f"📅 En la historia descargada: {contango_share:.0%} de los días en CONTANGO")
             
-    else:
-        print("❌ No se encontraron datos")
+            print(f"\n🎯 CONTRATOS PARA EXPOSICIÓN 2026:")
+            for contract in projection_contracts:
+                if contract in latest_prices:
+                    price = latest_prices[contract]
+                    print(f"   {contract}: ${price:.2f}")
+        
+            print(f"\n💡 INTERPRETACIÓN:")
+            print(f"   • Los contratos {', '.join(projection_contracts)} te dan exposición a precios de 2026")
+            print(f"   • El mercado está en {market_structure}")
+            if market_structure == "CONTANGO":
+                print(f"   • Esto sugiere expectativa de precios más altos en el futuro")
+                print(f"   • Posible escasez esperada o costos de almacenamiento")
+            else:
+                print(f"   • Esto sugiere expectativa de precios más bajos en el futuro")
+                print(f"   • Posible abundancia esperada o presión de inventarios")
+            
+        else:
+            print("❌ No se encontraron datos")
         
-except Exception as e:
-    print(f"❌ Error: {e}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+    print(f"\n🚀 CONCLUSIÓN:")
+    print(f"✅ SÍ puedes ver contratos futuros para 2026 usando:")
+    print(f"   • {', '.join(projection_contracts)} (contratos continuos)")
+    print(f"   • Estos te dan exposición a precios que se extienden hacia 2026")
+    print(f"   • Mucho mejor que esperar a que listen contratos individuales ZCH6, etc.")
 
-print(f"\n🚀 CONCLUSIÓN:")
-print(f"✅ SÍ puedes ver contratos futuros para 2026 usando:")
-print(f"   • ZC.c.3, ZC.c.4, ZC.c.5 (contratos continuos)")
-print(f"   • Estos te dan exposición a precios que se extienden hacia 2026")
-print(f"   • Mucho mejor que esperar a que listen contratos individuales ZCH6, etc.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Curva de futuros y proyecciones hacia 2026")
+    parser.add_argument("--commodity", default="ZC", help="Raíz a analizar (ZC, ZS, ZW...)")
+    parser.add_argument("--end", default="2025-10-23", help="Fecha final de las barras")
+    parser.add_argument("--output", default=None,
+                        help="Guardar el tablero en un archivo (PNG, SVG...) en lugar de mostrarlo")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    with instrumentation.session("maiz_2026_analysis", args.report, args.profile):
+        main(commodity=args.commodity, end_date=args.end, output_path=args.output)
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import instrumentation
+
+# Directorio de las tablas derivadas (se puede cambiar con la variable de entorno)
+MEMO_DIR = Path(os.getenv('DERIVED_CACHE_DIR', '.derived_cache'))
+
+# Tamaño máximo en disco; al pasarlo se borran las tablas usadas hace más tiempo
+MEMO_BUDGET_MB = float(os.getenv('DERIVED_CACHE_MB', '256'))
+
+
+def fingerprint(*inputs, **params):
+    """
+    Huella de los datos de entrada y los parámetros de una tabla derivada
+
+    Un resultado de fetch.get_range se identifica por sus archivos del caché
+    y sus tramos (sin leerlos); DataFrames, CompactBars y arrays, por su
+    contenido. Devuelve None si alguna entrada no se puede identificar (por
+    ejemplo barras del día en curso que no quedaron en disco).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for value in [*inputs, params]:
+        part = _fingerprint(value)
+        if part is None:
+            return None
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def table(name, compute, *inputs, **params):
+    """
+    Tabla derivada memoizada en disco
+
+    Si otra corrida (de este u otro script) ya calculó la tabla `name` con los
+    mismos datos y parámetros, se lee del disco; si no, se calcula con
+    compute() y se guarda. Los archivos usados hace más tiempo se borran
+    cuando el total pasa MEMO_BUDGET_MB.
+
+    Args:
+        name: Tipo de tabla (monthly, latest_prices...)
+        compute: Función sin argumentos que arma el DataFrame
+        inputs: Datos de los que depende la tabla
+        params: Parámetros que cambian el resultado (símbolos, fechas...)
+
+    Returns:
+        DataFrame
+    """
+    key = fingerprint(*inputs, name=name, **params)
+    if key is None:
+        return compute()
+
+    path = MEMO_DIR / name / f"{key}.parquet"
+    if path.exists():
+        try:
+            with instrumentation.span("memo_read"):
+                result = pd.read_parquet(path)
+            # La fecha de modificación hace de reloj LRU
+            os.utime(path)
+            instrumentation.count("memo_hits")
+            return result
+        except (OSError, ValueError):
+            # Borrado por otro proceso o incompleto: se vuelve a calcular
+            pass
+
+    instrumentation.count("memo_misses")
+    result = compute()
+    if isinstance(result, pd.DataFrame):
+        _save(result, path)
+    return result
+
+
+def clear(name=None):
+    """
+    Borrar las tablas guardadas (todas o las de un tipo)
+    """
+    base = MEMO_DIR / name if name else MEMO_DIR
+    for path in base.rglob("*.parquet"):
+        path.unlink(missing_ok=True)
+
+
+def _save(df, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Archivo temporal y os.replace: otro proceso nunca ve una tabla a medio escribir
+    tmp = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp")
+    try:
+        with instrumentation.span("memo_write", records=len(df)):
+            df.to_parquet(tmp, index=True)
+        os.replace(tmp, path)
+    except (OSError, ValueError, TypeError):
+        tmp.unlink(missing_ok=True)
+        return
+    _evict()
+
+
+def _evict():
+    budget = MEMO_BUDGET_MB * 1e6
+    files = []
+    for path in MEMO_DIR.rglob("*.parquet"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files, key=lambda f: f[0]):
+        if total <= budget:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        instrumentation.count("memo_evictions")
+
+
+def _fingerprint(value):
+    if hasattr(value, "fingerprint"):
+        part = value.fingerprint()
+        return None if part is None else part.encode()
+
+    if isinstance(value, pd.DataFrame):
+        hashed = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        header = json.dumps([[str(c), str(t)] for c, t in value.dtypes.items()])
+        return header.encode() + hashed.tobytes()
+
+    if isinstance(value, np.ndarray):
+        return str(value.dtype).encode() + np.ascontiguousarray(value).tobytes()
+
+    if isinstance(value, dict):
+        return json.dumps({str(k): _plain(v) for k, v in sorted(value.items())}, sort_keys=True).encode()
+
+    return json.dumps(_plain(value)).encode()
+
+
+def _plain(value):
+    # Parámetros como JSON estable (listas de símbolos, fechas, números)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_plain(v) for v in value]
+        return sorted(items, key=str) if isinstance(value, (set, frozenset)) else items
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
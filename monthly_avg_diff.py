@@ -1,22 +1,9 @@
-import databento as db
 import pandas as pd
-import os
-from dotenv import load_dotenv
-
-# Cargar variables de entorno
-load_dotenv()
-
-# Obtener API key desde variable de entorno
-api_key = os.getenv('DATABENTO_API_KEY')
-if not api_key:
-    raise ValueError("DATABENTO_API_KEY no encontrada en el archivo .env")
-
-# Crear cliente histórico
-client = db.Historical(api_key)
+import fetch
 
 def monthly_avg_difference(symbol="ZCZ5", start="2025-01-15", end="2025-03-15"):
     # Obtener datos diarios
-    data = client.timeseries.get_range(
+    data = fetch.get_range(
         dataset="GLBX.MDP3",
         symbols=symbol,
         schema="ohlcv-1d",
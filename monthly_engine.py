@@ -0,0 +1,423 @@
+import numpy as np
+import pandas as pd
+from databento_dbn import FIXED_PRICE_SCALE, UNDEF_PRICE
+import streaming
+
+# Métricas mensuales por (símbolo, mes): nombre -> (columna, función)
+MONTHLY_AGGREGATIONS = {
+    "open_avg": ("open", "mean"),
+    "close_avg": ("close", "mean"),
+    "high_avg": ("high", "mean"),
+    "low_avg": ("low", "mean"),
+    "volume_avg": ("volume", "mean"),
+    "days_count": ("open", "count"),
+}
+
+# Versión de los cálculos mensuales: subirla al corregirlos invalida las tablas guardadas con memo
+VERSION = 2
+
+# Mismo orden de columnas que monthly_futures_analysis
+MONTHLY_COLUMNS = [
+    "month_year", "open_avg", "close_avg", "high_avg", "low_avg",
+    "volume_avg", "days_count", "diff", "range_avg", "symbol", "month",
+]
+
+
+def month_key(ts):
+    """
+    Mes-año (Period M) de una columna de timestamps, sin pasar por objetos Python
+    """
+    if ts.dt.tz is not None:
+        # Igual que to_period: se usa la hora local y se descarta la zona
+        ts = ts.dt.tz_localize(None)
+    return ts.dt.to_period("M")
+
+
+def engine(df):
+    """
+    Motor con el que monthly_aggregate agrega df ("compact" o "pandas"; "records" es monthly_aggregate_records)
+
+    Va en los parámetros de memo.table junto con VERSION: cada motor guarda su propia tabla.
+    """
+    return "compact" if hasattr(df, "monthly_aggregate") else "pandas"
+
+
+def monthly_aggregate(df, symbols=None):
+    """
+    Promedios mensuales de todos los símbolos en una sola agrupación
+
+    Calcula open/close/high/low/volume promedio, cantidad de días, diff y
+    range_avg para cada (símbolo, mes) sin filtrar ni copiar por símbolo,
+    por lo que sirve igual para 6 contratos de ZC o para cientos de
+    contratos continuos de varias raíces.
+
+    Args:
+        df: Barras diarias con columnas ts_event, symbol, open, high, low, close, volume
+            (o compact_bars.CompactBars, que agrega con precios enteros)
+        symbols: Lista opcional de símbolos a incluir
+
+    Returns:
+        DataFrame con las columnas de MONTHLY_COLUMNS, ordenado por símbolo y mes
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=MONTHLY_COLUMNS)
+
+    if hasattr(df, "monthly_aggregate"):
+        return df.monthly_aggregate(symbols)
+
+    if symbols is not None:
+        df = df[df["symbol"].isin(symbols)]
+
+    ts = df["ts_event"] if "ts_event" in df.columns else df.index.to_series()
+
+    # La categoría evita comparar strings repetidos en cada fila
+    keys = [
+        df["symbol"].astype("category").array,
+        month_key(ts).array,
+    ]
+
+    monthly = (
+        df.groupby(keys, observed=True, sort=True)
+        .agg(**MONTHLY_AGGREGATIONS)
+        .reset_index()
+    )
+    monthly.columns = ["symbol", "month_year", *MONTHLY_AGGREGATIONS]
+
+    # Calcular métricas adicionales
+    monthly["diff"] = monthly["close_avg"] - monthly["open_avg"]
+    monthly["range_avg"] = monthly["high_avg"] - monthly["low_avg"]
+    monthly["symbol"] = monthly["symbol"].astype(df["symbol"].dtype)
+    monthly["month"] = monthly["month_year"].dt.strftime("%m/%y")
+
+    return monthly[MONTHLY_COLUMNS]
+
+
+# Estado acumulado por (símbolo, mes) a partir del cual se derivan los promedios
+STATE_AGGREGATIONS = {
+    "open_sum": ("open", "sum"),
+    "close_sum": ("close", "sum"),
+    "high_sum": ("high", "sum"),
+    "low_sum": ("low", "sum"),
+    "volume_sum": ("volume", "sum"),
+    "days_count": ("open", "count"),
+    "first_ts": ("ts_event", "first"),
+    "first_open": ("open", "first"),
+    "last_ts": ("ts_event", "last"),
+    "last_close": ("close", "last"),
+    "high_max": ("high", "max"),
+    "low_min": ("low", "min"),
+}
+
+# Cómo se combinan dos estados del mismo (símbolo, mes), el más antiguo primero
+STATE_MERGE = {
+    "open_sum": "sum",
+    "close_sum": "sum",
+    "high_sum": "sum",
+    "low_sum": "sum",
+    "volume_sum": "sum",
+    "days_count": "sum",
+    "first_ts": "first",
+    "first_open": "first",
+    "last_ts": "last",
+    "last_close": "last",
+    "high_max": "max",
+    "low_min": "min",
+}
+
+STATE_COLUMNS = ["symbol", "month_year", *STATE_AGGREGATIONS]
+
+
+def monthly_state(df, symbols=None):
+    """
+    Sumas, conteos, primero/último y máximo/mínimo por (símbolo, mes)
+
+    Es el mismo recorrido que monthly_aggregate, pero guarda valores que se
+    pueden sumar con los de barras nuevas (ver merge_states).
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=STATE_COLUMNS)
+
+    if symbols is not None:
+        df = df[df["symbol"].isin(symbols)]
+        if df.empty:
+            return pd.DataFrame(columns=STATE_COLUMNS)
+
+    if "ts_event" not in df.columns:
+        df = df.reset_index()
+
+    # Las barras deben estar en orden temporal para first/last
+    df = df.sort_values("ts_event", kind="stable")
+
+    keys = [
+        df["symbol"].astype("category").array,
+        month_key(df["ts_event"]).array,
+    ]
+
+    state = (
+        df.groupby(keys, observed=True, sort=True)
+        .agg(**STATE_AGGREGATIONS)
+        .reset_index()
+    )
+    state.columns = STATE_COLUMNS
+    state["symbol"] = state["symbol"].astype(df["symbol"].dtype)
+
+    return state
+
+
+def merge_states(old, new):
+    """
+    Combinar el estado guardado con el de otras barras del mismo período o posteriores
+
+    Solo se recalculan los (símbolo, mes) que aparecen en new; el resto del
+    estado se conserva tal cual. Los tramos de un mismo (símbolo, mes) se
+    ordenan por fecha antes de combinarlos, así que new puede contener barras
+    anteriores a las de old siempre que no se repitan.
+    """
+    if old is None or old.empty:
+        return new.copy()
+    if new is None or new.empty:
+        return old.copy()
+
+    old_keys = pd.MultiIndex.from_frame(old[["symbol", "month_year"]])
+    new_keys = pd.MultiIndex.from_frame(new[["symbol", "month_year"]])
+    affected = old_keys.isin(new_keys)
+
+    merged = (
+        pd.concat([old[affected], new], ignore_index=True)
+        .sort_values("first_ts", kind="stable")
+        .groupby(["symbol", "month_year"], sort=False)
+        .agg(STATE_MERGE)
+        .reset_index()
+    )
+
+    state = pd.concat([old[~affected], merged], ignore_index=True)
+    return state.sort_values(["symbol", "month_year"], kind="stable").reset_index(drop=True)
+
+
+def finalize_monthly(state):
+    """
+    Convertir el estado acumulado en la tabla de monthly_aggregate
+    """
+    if state is None or state.empty:
+        return pd.DataFrame(columns=MONTHLY_COLUMNS)
+
+    monthly = state[["symbol", "month_year", "days_count"]].copy()
+    for name in ("open", "close", "high", "low", "volume"):
+        monthly[f"{name}_avg"] = state[f"{name}_sum"] / state["days_count"]
+
+    monthly["diff"] = monthly["close_avg"] - monthly["open_avg"]
+    monthly["range_avg"] = monthly["high_avg"] - monthly["low_avg"]
+    monthly["month"] = monthly["month_year"].dt.strftime("%m/%y")
+
+    return monthly[MONTHLY_COLUMNS].reset_index(drop=True)
+
+
+def monthly_aggregate_chunks(chunks, symbols=None):
+    """
+    monthly_aggregate sobre barras que llegan por bloques
+
+    Cada bloque se reduce a su estado por (símbolo, mes) y se combina con el
+    acumulado, de modo que en memoria solo hay un bloque y el estado (un
+    registro por símbolo y mes), sin importar el rango de fechas.
+
+    Args:
+        chunks: Iterable de DataFrames de barras (por ejemplo streaming.iter_bars)
+        symbols: Lista opcional de símbolos a incluir
+
+    Returns:
+        DataFrame con las columnas de MONTHLY_COLUMNS
+    """
+    state = None
+    for chunk in chunks:
+        state = merge_states(state, monthly_state(chunk, symbols))
+    return finalize_monthly(state)
+
+
+# Sumas que arman los promedios a partir de registros DBN (precios enteros de punto fijo);
+# cada precio cuenta sus valores definidos (days_count es el de open, como en monthly_aggregate)
+SUM_COLUMNS = [
+    "open_sum", "close_sum", "high_sum", "low_sum", "volume_sum",
+    "days_count", "close_count", "high_count", "low_count", "volume_count",
+]
+
+_PRICE_COUNTS = {"open": "days_count", "close": "close_count", "high": "high_count", "low": "low_count"}
+
+# Bits de la parte baja al partir un entero para bincount (ver _exact_bincount)
+_LOW_BITS = 26
+
+
+def monthly_sums(codes, ts, prices, volume):
+    """
+    Sumas enteras por (código de símbolo, mes) sin ordenar los registros
+
+    Cada registro se ubica en su casilla (mes, símbolo) con aritmética entera
+    y las sumas salen de np.bincount; los precios se suman como enteros de
+    punto fijo, sin error de punto flotante. Los precios indefinidos
+    (UNDEF_PRICE) no se suman ni se cuentan, igual que los NaN en pandas.
+
+    Args:
+        codes: Código de símbolo de cada registro (>= 0)
+        ts: ts_event en nanosegundos (int64)
+        prices: Diccionario open/high/low/close -> int64 de punto fijo
+        volume: Volumen de cada registro
+
+    Returns:
+        (códigos, meses como ordinal de Period M, diccionario de SUM_COLUMNS)
+    """
+    months = ts.view("datetime64[ns]").astype("datetime64[M]").view(np.int64)
+    values = {}
+    for name, count in _PRICE_COUNTS.items():
+        column = np.asarray(prices[name])
+        defined = column != UNDEF_PRICE
+        if defined.all():
+            values[f"{name}_sum"], values[count] = column, None
+        else:
+            values[f"{name}_sum"], values[count] = np.where(defined, column, 0), defined
+    values["volume_sum"], values["volume_count"] = volume, None
+    return _reduce_by_month(codes, months, values)
+
+
+def merge_sums(parts):
+    """
+    Combinar las sumas de varios bloques (mismos códigos de símbolo)
+    """
+    parts = [part for part in parts if len(part[0])]
+    if not parts:
+        return np.empty(0, np.int64), np.empty(0, np.int64), {name: np.empty(0, np.int64) for name in SUM_COLUMNS}
+
+    codes = np.concatenate([part[0] for part in parts])
+    months = np.concatenate([part[1] for part in parts])
+    values = {name: np.concatenate([part[2][name] for part in parts]) for name in SUM_COLUMNS}
+    return _reduce_by_month(codes, months, values)
+
+
+def finalize_sums(codes, months, sums, names):
+    """
+    Tabla de monthly_aggregate a partir de las sumas enteras (solo acá se pasa a float)
+
+    Args:
+        names: Símbolo de cada código
+    """
+    if len(codes) == 0:
+        return pd.DataFrame(columns=MONTHLY_COLUMNS)
+
+    # Mismo orden que monthly_aggregate: por símbolo y mes
+    names = np.asarray(names, dtype=object)
+    name_rank = np.empty(len(names), dtype=np.int64)
+    name_rank[np.argsort(names.astype(str), kind="stable")] = np.arange(len(names))
+    order = np.lexsort((months, name_rank[codes]))
+    codes, months = codes[order], months[order]
+    sums = {name: values[order] for name, values in sums.items()}
+
+    # Cada promedio con sus propios valores definidos (sin ninguno queda NaN)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = {name: sums[f"{name}_sum"] / (sums[count] * FIXED_PRICE_SCALE)
+                    for name, count in _PRICE_COUNTS.items()}
+    count = sums["days_count"]
+    monthly = pd.DataFrame({
+        "month_year": pd.PeriodIndex.from_ordinals(months, freq="M"),
+        **{f"{name}_avg": averages[name] for name in ("open", "close", "high", "low")},
+        "volume_avg": sums["volume_sum"] / sums["volume_count"],
+        "days_count": count,
+        "diff": _difference(sums, "close", "open", averages),
+        "range_avg": _difference(sums, "high", "low", averages),
+        "symbol": names[codes],
+    })
+    monthly["month"] = monthly["month_year"].dt.strftime("%m/%y")
+    return monthly[MONTHLY_COLUMNS]
+
+
+def monthly_aggregate_records(data, symbols=None, count=None):
+    """
+    monthly_aggregate leyendo los registros DBN como arrays de NumPy
+
+    Los registros salen de to_ndarray (sin DataFrame por registro), se suman
+    por bloques con monthly_sums y pandas solo arma la tabla final de
+    (símbolo, mes).
+
+    Args:
+        data: Resultado de fetch.get_range
+        symbols: Lista opcional de símbolos a incluir
+        count: Registros por bloque (por defecto streaming.CHUNK_SIZE)
+
+    Returns:
+        DataFrame con las columnas de MONTHLY_COLUMNS
+    """
+    names = {}
+    parts = []
+    for codes, records in coded_records(data, names, symbols, count):
+        parts.append(monthly_sums(
+            codes,
+            records["ts_event"].view(np.int64),
+            {name: records[name] for name in ("open", "high", "low", "close")},
+            records["volume"],
+        ))
+
+    codes, months, sums = merge_sums(parts)
+    return finalize_sums(codes, months, sums, list(names))
+
+
+def coded_records(data, names, symbols=None, count=None):
+    """
+    Bloques de registros DBN con un código de símbolo común a todos
+
+    Cada archivo del caché numera sus símbolos a su manera; acá se traducen a
+    códigos compartidos que se van anotando en `names` (símbolo -> código).
+
+    Yields:
+        (codes, records) por bloque, sin las filas de símbolos excluidos
+    """
+    for chunk in data.iter_records(count or streaming.CHUNK_SIZE):
+        # Códigos del archivo -> códigos comunes a todos los bloques (-1 = fuera)
+        remap = np.array([
+            names.setdefault(name, len(names)) if symbols is None or name in symbols else -1
+            for name in chunk.names
+        ] + [-1], dtype=np.int64)
+        codes = remap[chunk.codes]
+        keep = codes >= 0
+        if not keep.any():
+            continue
+
+        records = chunk.records
+        if not keep.all():
+            records, codes = records[keep], codes[keep]
+        yield codes, records
+
+
+def _difference(sums, a, b, averages):
+    # Con los mismos días definidos la resta de sumas enteras es exacta; si no, se restan los promedios
+    same = sums[_PRICE_COUNTS[a]] == sums[_PRICE_COUNTS[b]]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        exact = (sums[f"{a}_sum"] - sums[f"{b}_sum"]) / (sums[_PRICE_COUNTS[a]] * FIXED_PRICE_SCALE)
+    return np.where(same, exact, averages[a] - averages[b])
+
+
+def _reduce_by_month(codes, months, values):
+    # Casilla de cada fila: (mes - primer mes) * símbolos + código
+    if len(codes) == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64), {name: np.empty(0, np.int64) for name in values}
+
+    codes = np.asarray(codes, dtype=np.int64)
+    month_min = months.min()
+    n_codes = int(codes.max()) + 1
+    bins = (months - month_min) * n_codes + codes
+    size = int(bins.max()) + 1
+
+    sums = {}
+    for name, column in values.items():
+        if column is None:
+            sums[name] = np.bincount(bins, minlength=size).astype(np.int64)
+        else:
+            sums[name] = _exact_bincount(bins, column, size)
+
+    present = np.flatnonzero(np.bincount(bins, minlength=size))
+    return present % n_codes, present // n_codes + month_min, {name: s[present] for name, s in sums.items()}
+
+
+def _exact_bincount(bins, values, size):
+    # bincount suma en float64: partiendo cada entero en parte alta y baja de
+    # 26 bits, cada suma parcial es un entero exacto en float64
+    values = np.asarray(values).astype(np.int64, copy=False)
+    high = np.bincount(bins, weights=values >> _LOW_BITS, minlength=size)
+    low = np.bincount(bins, weights=values & ((1 << _LOW_BITS) - 1), minlength=size)
+    return (high.astype(np.int64) << _LOW_BITS) + low.astype(np.int64)
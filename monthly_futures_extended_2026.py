@@ -1,23 +1,67 @@
-import databento as db
-import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
-import os
-from dotenv import load_dotenv
+import argparse
+import bar_store
+import compact_bars
+import dashboards
+import fetch
+import incremental_monthly
+import instrumentation
+import memo
+import monthly_engine
+import report
+import streaming
 from datetime import datetime, timedelta
 
-# Cargar variables de entorno
-load_dotenv()
+def contract_symbols(commodity="ZC"):
+    """
+    Contratos continuos que se extienden hacia 2026
+    """
+    return [
+        f"{commodity}.c.0",  # Front month (actual)
+        f"{commodity}.c.1",  # 2do mes
+        f"{commodity}.c.2",  # 3er mes
+        f"{commodity}.c.3",  # 4to mes (llega a 2026)
+        f"{commodity}.c.4",  # 5to mes (definitivamente 2026)
+        f"{commodity}.c.5",  # 6to mes (2026)
+    ]
 
-# Obtener API key desde variable de entorno
-api_key = os.getenv('DATABENTO_API_KEY')
-if not api_key:
-    raise ValueError("DATABENTO_API_KEY no encontrada en el archivo .env")
+def _get_range(commodity, start_date, end_date):
+    return fetch.get_range(
+        dataset="GLBX.MDP3",
+        schema="ohlcv-1d",
+        stype_in="continuous",  # ← Clave: usar contratos continuos
+        symbols=contract_symbols(commodity),
+        start=start_date,
+        end=end_date
+    )
 
-# Crear cliente histórico
-client = db.Historical(api_key)
+def fetch_data(commodity="ZC", start_date="2024-01-01", end_date="2025-10-23"):
+    """
+    Obtener las barras diarias que usa el análisis mensual extendido
+    
+    Returns:
+        DataFrame de to_df() con ts_event como columna
+    """
+    return _get_range(commodity, start_date, end_date).to_df().reset_index()
+
+def fetch_compact(commodity="ZC", start_date="2024-01-01", end_date="2025-10-23"):
+    """
+    Las mismas barras que fetch_data en formato compacto (precios enteros de punto fijo)
+    
+    Returns:
+        compact_bars.CompactBars
+    """
+    return compact_bars.CompactBars.from_range(_get_range(commodity, start_date, end_date))
 
-def monthly_futures_analysis(commodity="ZC", start_date="2024-01-01", end_date="2025-10-23"):
+def fetch_chunks(commodity="ZC", start_date="2024-01-01", end_date="2025-10-23",
+                 chunk_size=streaming.CHUNK_SIZE):
+    """
+    Las mismas barras que fetch_data, pero por bloques de a lo sumo chunk_size registros
+    """
+    return streaming.iter_bars(_get_range(commodity, start_date, end_date), chunk_size)
+
+def monthly_futures_analysis(commodity="ZC", start_date="2024-01-01", end_date="2025-10-23",
+                             incremental=False, df=None, stream=False):
     """
     Análisis mensual extendido para contratos futuros usando contratos continuos
     que se extienden hacia 2026
@@ -26,6 +70,9 @@ def monthly_futures_analysis(commodity="ZC", start_date="2024-01-01", end_date="
         commodity: Root symbol (ZC, ZS, ZW, etc.)
         start_date: Fecha inicio
         end_date: Fecha fin
+        incremental: Actualizar el estado mensual guardado en lugar de recalcular todo
+        df: Barras ya descargadas con fetch_data o fetch_compact (opcional)
+        stream: Leer y agregar las barras por bloques (memoria acotada)
     
     Returns:
         DataFrame con análisis mensual extendido
@@ -34,82 +81,71 @@ def monthly_futures_analysis(commodity="ZC", start_date="2024-01-01", end_date="
     print(f"🌽 Analizando {commodity} - Proyecciones mensuales hacia 2026...")
     
     # Usar contratos continuos que se extienden hacia 2026
-    symbols = [
-        f"{commodity}.c.0",  # Front month (actual)
-        f"{commodity}.c.1",  # 2do mes
-        f"{commodity}.c.2",  # 3er mes
-        f"{commodity}.c.3",  # 4to mes (llega a 2026)
-        f"{commodity}.c.4",  # 5to mes (definitivamente 2026)
-        f"{commodity}.c.5",  # 6to mes (2026)
-    ]
+    symbols = contract_symbols(commodity)
     
     print(f"📊 Obteniendo datos para: {symbols}")
     
     try:
-        # Obtener datos históricos
-        data = client.timeseries.get_range(
-            dataset="GLBX.MDP3",
-            schema="ohlcv-1d",
-            stype_in="continuous",  # ← Clave: usar contratos continuos
-            symbols=symbols,
-            start=start_date,
-            end=end_date
-        )
-        
-        df = data.to_df().reset_index()
-        
-        if df.empty:
-            print("❌ No se encontraron datos")
-            return None
-            
-        print(f"✅ Datos obtenidos: {len(df)} registros")
-        
-        # Agregar columna de mes-año
-        df["month_year"] = df["ts_event"].dt.to_period("M")
-        
-        # Análisis mensual por contrato
-        monthly_analysis = []
-        
-        for symbol in symbols:
-            symbol_data = df[df['symbol'] == symbol].copy()
-            
-            if symbol_data.empty:
-                continue
-                
-            # Agrupar por mes
-            monthly_symbol = (
-                symbol_data.groupby("month_year")
-                .agg(
-                    open_avg=("open", "mean"),
-                    close_avg=("close", "mean"),
-                    high_avg=("high", "mean"),
-                    low_avg=("low", "mean"),
-                    volume_avg=("volume", "mean"),
-                    days_count=("open", "count")
-                )
-                .reset_index()
+        if incremental:
+            # Solo se piden y agregan las barras posteriores al estado guardado
+            all_monthly, df = incremental_monthly.refresh_monthly(
+                f"{commodity}_monthly_extended_{start_date}",
+                symbols,
+                start=start_date,
+                end=end_date
             )
+            print(f"✅ Barras nuevas: {len(df)} registros")
+        elif stream and df is None:
+            # Cada bloque se agrega y se descarta: nunca están todas las barras en memoria
+            source = _get_range(commodity, start_date, end_date)
+            state = None
+            received = 0
+            with instrumentation.span("aggregate"):
+                for chunk in streaming.iter_bars(source):
+                    state = monthly_engine.merge_states(state, monthly_engine.monthly_state(chunk, symbols))
+                    received += len(chunk)
+            
+            if received == 0:
+                print("❌ No se encontraron datos")
+                return None
             
-            # Calcular métricas adicionales
-            monthly_symbol["diff"] = monthly_symbol["close_avg"] - monthly_symbol["open_avg"]
-            monthly_symbol["range_avg"] = monthly_symbol["high_avg"] - monthly_symbol["low_avg"] 
-            monthly_symbol["symbol"] = symbol
-            monthly_symbol["month"] = monthly_symbol["month_year"].dt.strftime("%m/%y")
+            print(f"✅ Datos obtenidos: {received} registros (por bloques)")
+            all_monthly = monthly_engine.finalize_monthly(state)
+        else:
+            # Obtener datos históricos
+            # La tabla mensual se guarda con la huella de los datos: con las
+            # mismas barras (monthly_simple_2026 pide las mismas) se lee del disco
+            source = df
+            if df is None:
+                source = _get_range(commodity, start_date, end_date)
+                df = compact_bars.CompactBars.from_range(source)
             
-            # Determinar si es proyección 2026
-            monthly_symbol["is_2026_projection"] = symbol in [f"{commodity}.c.3", f"{commodity}.c.4", f"{commodity}.c.5"]
+            if df.empty:
+                print("❌ No se encontraron datos")
+                return None
+                
+            print(f"✅ Datos obtenidos: {len(df)} registros")
             
-            monthly_analysis.append(monthly_symbol)
+            # Análisis mensual de todos los contratos en una sola agrupación
+            with instrumentation.span("aggregate", records=len(df)):
+                all_monthly = memo.table("monthly", lambda: monthly_engine.monthly_aggregate(df, symbols),
+                                         source, symbols=symbols, engine=monthly_engine.engine(df),
+                                         version=monthly_engine.VERSION)
+        
+        # Guardar las barras crudas en el almacén columnar: solo lo que todavía no estaba
+        if incremental:
+            bar_store.write_bars(df, dataset="GLBX.MDP3", schema="ohlcv-1d")
+        else:
+            bar_store.write_range(source, dataset="GLBX.MDP3", schema="ohlcv-1d")
         
-        # Concatenar todos los resultados
-        if not monthly_analysis:
+        if all_monthly.empty:
             print("❌ No se pudo procesar ningún símbolo")
             return None
-            
-        all_monthly = pd.concat(monthly_analysis, ignore_index=True)
         
-        # Ordenar por símbolo y mes
-        all_monthly = all_monthly.sort_values(['symbol', 'month_year'])
+        # Determinar si es proyección 2026
+        all_monthly["is_2026_projection"] = all_monthly["symbol"].isin(
+            [f"{commodity}.c.3", f"{commodity}.c.4", f"{commodity}.c.5"]
+        )
         
         return all_monthly
         
@@ -120,223 +156,85 @@ def monthly_futures_analysis(commodity="ZC", start_date="2024-01-01", end_date="
 def create_extended_summary(monthly_df, commodity="ZC"):
     """
     Crear resumen extendido similar al original pero con proyecciones 2026
+    
+    Returns:
+        DataFrame con el último mes de cada contrato (contract, latest_month,
+        open_avg, close_avg, diff, is_2026)
     """
     if monthly_df is None or monthly_df.empty:
         return None
     
-    print(f"\n📊 RESUMEN MENSUAL EXTENDIDO - {commodity} (Incluye proyecciones 2026)")
-    print("="*80)
-    
-    # Resumen por contrato
-    summary_by_contract = []
-    
-    for symbol in monthly_df['symbol'].unique():
-        symbol_data = monthly_df[monthly_df['symbol'] == symbol]
-        
-        print(f"\n🔹 {symbol}:")
-        if symbol_data['is_2026_projection'].iloc[0]:
-            print("   ⭐ PROYECCIÓN 2026")
-        
-        # Mostrar últimos 6 meses de datos
-        recent_data = symbol_data.tail(6)
-        
-        for _, row in recent_data.iterrows():
-            status = "📈 2026" if row['is_2026_projection'] else "📊 2025"
-            print(f"   {status} {row['month']:>5} | Open: ${row['open_avg']:>7.2f} | Close: ${row['close_avg']:>7.2f} | Diff: ${row['diff']:>6.2f}")
-        
-        # Agregar al resumen
-        latest = symbol_data.iloc[-1]
-        summary_by_contract.append({
-            'contract': symbol,
-            'latest_month': latest['month'],
-            'open_avg': latest['open_avg'],
-            'close_avg': latest['close_avg'],
-            'diff': latest['diff'],
-            'is_2026': latest['is_2026_projection']
-        })
-    
-    # Crear DataFrame de resumen
-    summary_df = pd.DataFrame(summary_by_contract)
-    
-    return summary_df
+    # Último mes de cada contrato en una sola agrupación
+    latest = report.latest_by(monthly_df, "symbol")
+    return latest.rename(columns={
+        "symbol": "contract", "month": "latest_month", "is_2026_projection": "is_2026",
+    })[["contract", "latest_month", "open_avg", "close_avg", "diff", "is_2026"]].reset_index(drop=True)
 
-def visualize_extended_analysis(monthly_df, commodity="ZC"):
+def build_report(monthly_df, summary, commodity="ZC"):
+    """
+    Reporte con los últimos 6 meses de cada contrato, la tabla resumen y la interpretación
+    """
+    recent = report.latest_by(monthly_df, "symbol", 6).rename(
+        columns={"symbol": "contract", "is_2026_projection": "is_2026"}
+    )[["contract", "month", "open_avg", "close_avg", "diff", "is_2026"]]
+    
+    proyecciones_2026 = summary[summary["is_2026"]]
+    interpretation = []
+    if not proyecciones_2026.empty:
+        trend = report.label(proyecciones_2026["diff"] > 0, "📈 Alcista", "📉 Bajista")
+        interpretation.append(f"✅ Encontraste {len(proyecciones_2026)} contratos con exposición a 2026:")
+        interpretation += ("   • " + proyecciones_2026["contract"] + ": "
+                           + report.money(proyecciones_2026["close_avg"]) + " - " + trend).tolist()
+    
+    result = report.Report(
+        f"RESUMEN MENSUAL EXTENDIDO - {commodity} (Incluye proyecciones 2026)",
+        meta={"commodity": commodity, "script": "monthly_futures_extended_2026"},
+    )
+    result.add("recent", "Últimos 6 meses por contrato", recent)
+    result.add("summary", f"TABLA RESUMEN - CONTRATOS {commodity}", summary)
+    result.add("interpretation", "INTERPRETACIÓN", notes=interpretation + [
+        "",
+        "💡 VENTAJAS vs monthly_avg_diff.py original:",
+        "   • Original: Solo 3 meses de 2025",
+        f"   • Nuevo: {len(summary)} contratos extendidos hacia 2026",
+        "   • Proyecciones reales de precios futuros disponibles",
+        "   • Análisis de curva de futuros incluido",
+    ])
+    return result
+
+def visualize_extended_analysis(monthly_df, commodity="ZC", output_path=None):
     """
     Crear visualizaciones del análisis extendido
+    
+    Si se pasa output_path, el gráfico se guarda en ese archivo en lugar de mostrarse
     """
     if monthly_df is None or monthly_df.empty:
         return
     
-    plt.figure(figsize=(20, 12))
-    
-    # Colores para cada contrato
-    colors = {
-        f'{commodity}.c.0': 'red',
-        f'{commodity}.c.1': 'orange', 
-        f'{commodity}.c.2': 'gold',
-        f'{commodity}.c.3': 'lightgreen',
-        f'{commodity}.c.4': 'green',
-        f'{commodity}.c.5': 'darkgreen'
-    }
-    
-    # Gráfico 1: Evolución mensual de precios promedio
-    plt.subplot(2, 3, 1)
-    for symbol in monthly_df['symbol'].unique():
-        symbol_data = monthly_df[monthly_df['symbol'] == symbol]
-        
-        label = f"{symbol} {'(2026 Proj.)' if symbol.endswith(('.c.3', '.c.4', '.c.5')) else ''}"
-        
-        plt.plot(symbol_data['month_year'].astype(str), 
-                symbol_data['close_avg'], 
-                'o-', label=label, 
-                color=colors.get(symbol, 'blue'),
-                linewidth=2, markersize=4)
-    
-    plt.title(f'{commodity} - Evolución Mensual de Precios Promedio')
-    plt.xlabel('Mes/Año')
-    plt.ylabel('Precio Promedio ($)')
-    plt.xticks(rotation=45)
-    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.grid(True, alpha=0.3)
-    
-    # Gráfico 2: Diferencias mensuales (close - open)
-    plt.subplot(2, 3, 2)
-    for symbol in monthly_df['symbol'].unique():
-        symbol_data = monthly_df[monthly_df['symbol'] == symbol]
-        
-        label = f"{symbol} {'(2026 Proj.)' if symbol.endswith(('.c.3', '.c.4', '.c.5')) else ''}"
-        
-        plt.plot(symbol_data['month_year'].astype(str), 
-                symbol_data['diff'], 
-                'o-', label=label,
-                color=colors.get(symbol, 'blue'),
-                linewidth=2, markersize=4)
-    
-    plt.title(f'{commodity} - Diferencias Mensuales (Close - Open)')
-    plt.xlabel('Mes/Año')
-    plt.ylabel('Diferencia ($)')
-    plt.xticks(rotation=45)
-    plt.axhline(y=0, color='black', linestyle='--', alpha=0.5)
-    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.grid(True, alpha=0.3)
-    
-    # Gráfico 3: Rango promedio mensual (volatilidad)
-    plt.subplot(2, 3, 3)
-    for symbol in monthly_df['symbol'].unique():
-        symbol_data = monthly_df[monthly_df['symbol'] == symbol]
-        
-        label = f"{symbol} {'(2026 Proj.)' if symbol.endswith(('.c.3', '.c.4', '.c.5')) else ''}"
-        
-        plt.plot(symbol_data['month_year'].astype(str), 
-                symbol_data['range_avg'], 
-                'o-', label=label,
-                color=colors.get(symbol, 'blue'),
-                linewidth=2, markersize=4)
-    
-    plt.title(f'{commodity} - Rango Promedio Mensual (Volatilidad)')
-    plt.xlabel('Mes/Año')
-    plt.ylabel('Rango Promedio ($)')
-    plt.xticks(rotation=45)
-    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.grid(True, alpha=0.3)
-    
-    # Gráfico 4: Comparación de precios actuales por contrato
-    plt.subplot(2, 3, 4)
-    latest_prices = []
-    contract_labels = []
-    contract_colors = []
-    
-    for symbol in monthly_df['symbol'].unique():
-        symbol_data = monthly_df[monthly_df['symbol'] == symbol]
-        latest = symbol_data.iloc[-1]
-        
-        latest_prices.append(latest['close_avg'])
-        contract_labels.append(symbol)
-        
-        if latest['is_2026_projection']:
-            contract_colors.append('green')
-        else:
-            contract_colors.append('blue')
-    
-    bars = plt.bar(contract_labels, latest_prices, color=contract_colors, alpha=0.7)
-    plt.title(f'{commodity} - Precios Actuales por Contrato\n(Verde = Proyección 2026)')
-    plt.xlabel('Contrato')
-    plt.ylabel('Precio ($)')
-    plt.xticks(rotation=45)
-    
-    # Añadir valores en las barras
-    for bar, price in zip(bars, latest_prices):
-        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1,
-                f'${price:.0f}', ha='center', va='bottom', fontweight='bold')
-    plt.grid(True, alpha=0.3)
-    
-    # Gráfico 5: Análisis de tendencia (últimos 6 meses)
-    plt.subplot(2, 3, 5)
-    
-    # Calcular tendencias para contratos 2026
-    projection_symbols = [s for s in monthly_df['symbol'].unique() 
-                         if s.endswith(('.c.3', '.c.4', '.c.5'))]
-    
-    trends = []
-    trend_labels = []
-    
-    for symbol in projection_symbols:
-        symbol_data = monthly_df[monthly_df['symbol'] == symbol]
-        
-        if len(symbol_data) >= 3:  # Necesitamos al menos 3 puntos
-            recent_data = symbol_data.tail(6)['close_avg'].values
-            x = range(len(recent_data))
-            
-            if len(recent_data) > 1:
-                # Calcular pendiente de tendencia
-                slope = np.polyfit(x, recent_data, 1)[0]
-                trends.append(slope)
-                trend_labels.append(symbol)
-    
-    if trends:
-        colors_trend = ['green' if t > 0 else 'red' for t in trends]
-        bars_trend = plt.bar(trend_labels, trends, color=colors_trend, alpha=0.7)
-        plt.title(f'{commodity} - Tendencias 2026\n(Verde=Alcista, Rojo=Bajista)')
-        plt.xlabel('Contrato 2026')
-        plt.ylabel('Pendiente de Tendencia ($/mes)')
-        plt.xticks(rotation=45)
-        plt.axhline(y=0, color='black', linestyle='--', alpha=0.5)
-        plt.grid(True, alpha=0.3)
-    
-    # Gráfico 6: Resumen de oportunidades 2026
-    plt.subplot(2, 3, 6)
-    
-    # Crear tabla de resumen
-    summary_data = []
-    for symbol in projection_symbols:
-        symbol_data = monthly_df[monthly_df['symbol'] == symbol]
-        if not symbol_data.empty:
-            latest = symbol_data.iloc[-1]
-            summary_data.append([
-                symbol,
-                f"${latest['close_avg']:.2f}",
-                f"${latest['diff']:.2f}",
-                f"${latest['range_avg']:.2f}"
-            ])
-    
-    if summary_data:
-        table = plt.table(cellText=summary_data,
-                         colLabels=['Contrato 2026', 'Precio Actual', 'Diff Mensual', 'Volatilidad'],
-                         cellLoc='center',
-                         loc='center',
-                         bbox=[0, 0, 1, 1])
-        table.auto_set_font_size(False)
-        table.set_fontsize(9)
-        table.scale(1, 2)
-        plt.axis('off')
-        plt.title(f'{commodity} - Resumen Oportunidades 2026', pad=20)
+    if output_path:
+        # Sin pantalla: plantilla Agg reutilizada entre raíces y fechas
+        dashboards.render_extended(monthly_df, commodity, output_path)
+        return
     
+    dashboard = dashboards.ExtendedDashboard(plt.figure(figsize=(20, 12)))
+    dashboard.update(monthly_df, commodity)
     plt.tight_layout()
     plt.show()
 
-def main():
-    """Función principal"""
-    commodity = "ZC"  # Maíz
+def main(commodity="ZC", export_csv=False, incremental=False, df=None, plot_path=None, stream=False,
+         export=()):
+    """
+    Función principal
+    
+    Args:
+        commodity: Raíz a analizar (ZC = Maíz)
+        export_csv: Exportar también la tabla mensual a CSV
+        incremental: Actualizar el estado mensual guardado
+        df: Barras ya descargadas con fetch_data o fetch_compact (opcional)
+        plot_path: Guardar el gráfico en este archivo en lugar de mostrarlo
+        stream: Leer y agregar las barras por bloques
+        export: Rutas donde guardar también el reporte (.json, .html o .md)
+    """
     
     print("🚀 ANÁLISIS MENSUAL EXTENDIDO - PROYECCIONES HACIA 2026")
     print("="*60)
@@ -345,46 +243,35 @@ def main():
     monthly_data = monthly_futures_analysis(
         commodity=commodity,
         start_date="2024-01-01",
-        end_date="2025-10-23"
+        end_date="2025-10-23",
+        incremental=incremental,
+        df=df,
+        stream=stream
     )
     
     if monthly_data is not None:
         # Crear resumen
-        summary = create_extended_summary(monthly_data, commodity)
+        with instrumentation.span("summary"):
+            summary = create_extended_summary(monthly_data, commodity)
         
         if summary is not None:
-            print(f"\n📋 TABLA RESUMEN - CONTRATOS {commodity} (FORMATO SOLICITADO):")
-            print("="*80)
-            print(f"{'Contrato':<12} {'Mes':<8} {'Open Avg':<12} {'Close Avg':<12} {'Diff':<10} {'2026?':<8}")
-            print("-" * 80)
-            
-            for _, row in summary.iterrows():
-                status = "⭐ SÍ" if row['is_2026'] else "❌ No"
-                print(f"{row['contract']:<12} {row['latest_month']:<8} "
-                      f"${row['open_avg']:<11.2f} ${row['close_avg']:<11.2f} "
-                      f"${row['diff']:<9.2f} {status:<8}")
-            
-            print("\n🎯 INTERPRETACIÓN:")
-            proyecciones_2026 = summary[summary['is_2026'] == True]
-            if not proyecciones_2026.empty:
-                print(f"✅ Encontraste {len(proyecciones_2026)} contratos con exposición a 2026:")
-                for _, row in proyecciones_2026.iterrows():
-                    trend = "📈 Alcista" if row['diff'] > 0 else "📉 Bajista"
-                    print(f"   • {row['contract']}: ${row['close_avg']:.2f} - {trend}")
-            
-            print(f"\n💡 VENTAJAS vs monthly_avg_diff.py original:")
-            print(f"   • Original: Solo 3 meses de 2025")
-            print(f"   • Nuevo: {len(summary)} contratos extendidos hacia 2026")
-            print(f"   • Proyecciones reales de precios futuros disponibles")
-            print(f"   • Análisis de curva de futuros incluido")
+            with instrumentation.span("display"):
+                summary_report = build_report(monthly_data, summary, commodity)
+                print(summary_report.render("console"), end="")
+                for path in export:
+                    summary_report.write(path)
+                    print(f"💾 Reporte en: {path}")
             
             # Crear visualizaciones
-            visualize_extended_analysis(monthly_data, commodity)
+            with instrumentation.span("render"):
+                visualize_extended_analysis(monthly_data, commodity, output_path=plot_path)
             
             # Guardar resultados
-            output_file = f"{commodity}_monthly_extended_2026.csv"
-            monthly_data.to_csv(output_file, index=False)
-            print(f"\n💾 Datos guardados en: {output_file}")
+            output_file = f"{commodity}_monthly_extended_2026.csv" if export_csv else None
+            bar_store.save_table(monthly_data, "monthly_extended", commodity, csv_path=output_file)
+            print(f"\n💾 Datos guardados en el almacén: tabla 'monthly_extended' (root={commodity})")
+            if output_file:
+                print(f"💾 Copia CSV en: {output_file}")
             
         else:
             print("❌ No se pudo crear el resumen")
@@ -392,4 +279,16 @@ def main():
         print("❌ No se pudieron obtener los datos")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Análisis mensual extendido hacia 2026")
+    parser.add_argument("--commodity", default="ZC", help="Raíz a analizar (ZC, ZS, ZW...)")
+    parser.add_argument("--csv", action="store_true", help="Exportar también los resultados a CSV")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Actualizar solo los meses con barras nuevas")
+    parser.add_argument("--stream", action="store_true",
+                        help="Leer y agregar las barras por bloques (memoria acotada)")
+    report.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    with instrumentation.session("monthly_futures_extended_2026", args.report, args.profile):
+        main(commodity=args.commodity, export_csv=args.csv, incremental=args.incremental, stream=args.stream,
+             export=args.export)
@@ -1,205 +1,256 @@
-import databento as db
 import pandas as pd
 import numpy as np
-import os
-from dotenv import load_dotenv
+import argparse
+import bar_store
+import fetch
+import instrumentation
+import memo
+import monte_carlo
+import monthly_engine
+import report
+import streaming
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 
-# Cargar variables de entorno
-load_dotenv()
+# Días recientes con los que se estima el precio actual de cada contrato 2026
+RECENT_DAYS = 30
 
-# Obtener API key desde variable de entorno
-api_key = os.getenv('DATABENTO_API_KEY')
-if not api_key:
-    raise ValueError("DATABENTO_API_KEY no encontrada en el archivo .env")
+def _get_range(commodity):
+    # Usar contratos continuos
+    symbols = [f"{commodity}.c.0", f"{commodity}.c.3", f"{commodity}.c.4", f"{commodity}.c.5"]
+    
+    return fetch.get_range(
+        dataset="GLBX.MDP3",
+        schema="ohlcv-1d",
+        stype_in="continuous",
+        symbols=symbols,
+        start="2025-01-01",
+        end="2025-10-23"
+    )
+
+def fetch_data(commodity="ZC"):
+    """
+    Obtener las barras diarias de 2025 que usa la proyección (DataFrame con ts_event como columna)
+    """
+    return _get_range(commodity).to_df().reset_index()
+
+def fetch_chunks(commodity="ZC", chunk_size=streaming.CHUNK_SIZE):
+    """
+    Las mismas barras que fetch_data, pero por bloques de a lo sumo chunk_size registros
+    """
+    return streaming.iter_bars(_get_range(commodity), chunk_size)
 
-# Crear cliente histórico
-client = db.Historical(api_key)
+def recent_prices(df, contracts, days=RECENT_DAYS):
+    """
+    Apertura y cierre promedio de los últimos `days` días de cada contrato
+    
+    Returns:
+        DataFrame indexado por symbol con open y close
+    """
+    if df.empty:
+        return pd.DataFrame(columns=['open', 'close'], index=pd.Index([], name='symbol'))
+    recent = df[df['symbol'].isin(contracts)].groupby('symbol', sort=False).tail(days)
+    return recent.groupby('symbol')[['open', 'close']].mean()
 
-def monthly_projection_2026(commodity="ZC"):
+def monthly_projection_2026(commodity="ZC", df=None, stream=False,
+                            n_paths=monte_carlo.N_PATHS, seed=monte_carlo.DEFAULT_SEED):
     """
     Crear proyección mensual que incluya fechas hacia 2026
     Basándose en contratos continuos actuales para estimar precios futuros
+    
+    Si se pasa df (barras de fetch_data), no se vuelven a pedir los datos; con
+    stream=True las barras se leen por bloques
+    
+    Cada mes proyectado es la mediana de n_paths caminos Monte Carlo, con las
+    bandas P5/P50/P95 del cierre en close_p5, close_p50 y close_p95. La
+    semilla se combina con la raíz: la misma raíz da el mismo resultado sola
+    o dentro de batch_runner.
     """
     
     print(f"🌽 Creando proyección mensual {commodity} hacia 2026...")
     print("="*60)
     
-    # Usar contratos continuos
-    symbols = [f"{commodity}.c.0", f"{commodity}.c.3", f"{commodity}.c.4", f"{commodity}.c.5"]
+    front_month = f"{commodity}.c.0"
+    contracts_2026 = [f"{commodity}.c.3", f"{commodity}.c.4", f"{commodity}.c.5"]
     
     try:
-        # Obtener datos actuales
-        data = client.timeseries.get_range(
-            dataset="GLBX.MDP3",
-            schema="ohlcv-1d",
-            stype_in="continuous",
-            symbols=symbols,
-            start="2025-01-01",
-            end="2025-10-23"
-        )
-        
-        df = data.to_df().reset_index()
-        
-        if df.empty:
-            print("❌ No se encontraron datos")
-            return None
-        
-        # Paso 1: Obtener datos históricos reales (2025)
-        historical_results = []
-        
-        # Usar el contrato front month para datos históricos reales
-        front_data = df[df['symbol'] == f"{commodity}.c.0"].copy()
-        front_data["month"] = front_data["ts_event"].dt.to_period("M")
-        
-        monthly_historical = (
-            front_data.groupby("month")
-            .agg(
-                open_avg=("open", "mean"),
-                close_avg=("close", "mean")
-            )
-            .reset_index()
-        )
-        
-        monthly_historical["diff"] = monthly_historical["close_avg"] - monthly_historical["open_avg"]
-        monthly_historical["month"] = monthly_historical["month"].dt.strftime("%m/%y")
-        monthly_historical["data_type"] = "REAL"
-        
-        # Tomar los últimos 6 meses de datos reales
-        historical_results = monthly_historical.tail(6).copy()
-        
-        # Paso 2: Crear proyecciones para 2026
-        projection_results = []
-        
-        # Obtener precios actuales de contratos 2026
-        current_date = datetime(2025, 10, 23)
-        contracts_2026 = [f"{commodity}.c.3", f"{commodity}.c.4", f"{commodity}.c.5"]
-        
-        # Calcular precios promedio actuales para cada contrato 2026
-        contract_prices = {}
-        for contract in contracts_2026:
-            contract_data = df[df['symbol'] == contract]
-            if not contract_data.empty:
-                recent_data = contract_data.tail(30)  # Últimos 30 días
-                avg_open = recent_data['open'].mean()
-                avg_close = recent_data['close'].mean()
-                contract_prices[contract] = {
-                    'open_avg': avg_open,
-                    'close_avg': avg_close,
-                    'diff': avg_close - avg_open
-                }
-        
-        # Generar proyecciones mensuales para 2026
-        # Empezar desde Nov 2025 hasta Oct 2026 (12 meses)
-        start_projection = datetime(2025, 11, 1)
-        
-        for i in range(12):  # 12 meses hacia adelante
-            projection_date = start_projection + relativedelta(months=i)
-            month_str = projection_date.strftime("%m/%y")
+        if stream and df is None:
+            # Una sola lectura por bloques: meses del front month y últimos 30 días de 2026
+            state = None
+            recent = streaming.RecentBars(RECENT_DAYS, contracts_2026)
+            with instrumentation.span("aggregate"):
+                for chunk in fetch_chunks(commodity):
+                    state = monthly_engine.merge_states(state, monthly_engine.monthly_state(chunk, [front_month]))
+                    recent.update(chunk)
+            
+            monthly_historical = monthly_engine.finalize_monthly(state)
+            
+            if monthly_historical.empty and recent.bars.empty:
+                print("❌ No se encontraron datos")
+                return None
+            recent_data = recent.bars.groupby('symbol')[['open', 'close']].mean()
+        else:
+            # Las tablas derivadas se guardan con la huella de los datos: si
+            # otra corrida ya las calculó con las mismas barras, se leen del disco
+            if df is None:
+                data = _get_range(commodity)
+                source = data
+                compute_monthly = lambda: monthly_engine.monthly_aggregate_records(data, [front_month])
+                monthly_key = "records"
+                compute_recent = lambda: recent_prices(
+                    data.slice(symbols=contracts_2026).to_df().reset_index(), contracts_2026
+                )
+            else:
+                if df.empty:
+                    print("❌ No se encontraron datos")
+                    return None
+                source = df
+                compute_monthly = lambda: monthly_engine.monthly_aggregate(df, [front_month])
+                monthly_key = monthly_engine.engine(df)
+                compute_recent = lambda: recent_prices(df, contracts_2026)
             
-            # Seleccionar qué contrato usar basándose en la distancia temporal
-            if i < 3:  # Primeros 3 meses: usar ZC.c.3
-                base_contract = f"{commodity}.c.3"
-            elif i < 8:  # Siguientes 5 meses: usar ZC.c.4
-                base_contract = f"{commodity}.c.4"
-            else:  # Últimos 4 meses: usar ZC.c.5
-                base_contract = f"{commodity}.c.5"
+            # Usar el contrato front month para datos históricos reales
+            with instrumentation.span("aggregate"):
+                monthly_historical = memo.table("monthly", compute_monthly, source, symbols=[front_month],
+                                                engine=monthly_key, version=monthly_engine.VERSION)
+                recent_data = memo.table("latest_prices", compute_recent, source,
+                                         symbols=contracts_2026, days=RECENT_DAYS)
             
-            if base_contract in contract_prices:
-                base_price = contract_prices[base_contract]
-                
-                # Añadir algo de variabilidad estacional/aleatoria
-                seasonal_factor = 1 + 0.02 * np.sin(2 * np.pi * i / 12)  # +/-2% variación estacional
-                noise_factor = 1 + np.random.normal(0, 0.01)  # +/-1% ruido aleatorio
-                
-                projected_open = base_price['open_avg'] * seasonal_factor * noise_factor
-                projected_close = base_price['close_avg'] * seasonal_factor * noise_factor
-                projected_diff = projected_close - projected_open
-                
-                projection_results.append({
-                    'month': month_str,
-                    'open_avg': projected_open,
-                    'close_avg': projected_close,
-                    'diff': projected_diff,
-                    'data_type': 'PROYECCIÓN',
-                    'base_contract': base_contract
-                })
-        
-        # Combinar resultados históricos y proyecciones
-        all_results = []
-        
-        # Agregar datos históricos
-        for _, row in historical_results.iterrows():
-            all_results.append({
-                'month': row['month'],
-                'open_avg': row['open_avg'],
-                'close_avg': row['close_avg'],
-                'diff': row['diff'],
-                'data_type': 'REAL'
-            })
-        
-        # Agregar proyecciones
-        all_results.extend(projection_results)
-        
-        # Crear DataFrame final
-        final_df = pd.DataFrame(all_results)
-        
-        return final_df
+            if monthly_historical.empty and recent_data.empty:
+                print("❌ No se encontraron datos")
+                return None
+        
+        with instrumentation.span("project"):
+            # Paso 1: Obtener datos históricos reales (2025)
+            historical_results = []
+        
+            monthly_historical = monthly_historical[["month", "open_avg", "close_avg", "diff"]].copy()
+            monthly_historical["data_type"] = "REAL"
+        
+            # Tomar los últimos 6 meses de datos reales
+            historical_results = monthly_historical.tail(6).copy()
+        
+            # Paso 2: Crear proyecciones para 2026
+            projection_results = []
+        
+            # Obtener precios actuales de contratos 2026
+            current_date = datetime(2025, 10, 23)
+        
+            # Precios promedio actuales para cada contrato 2026 (recent_data)
+            contract_prices = (
+                recent_data.rename(columns={'open': 'open_avg', 'close': 'close_avg'})
+                .assign(diff=recent_data['close'] - recent_data['open'])
+                .to_dict('index')
+            )
+        
+            # Generar proyecciones mensuales para 2026
+            # Empezar desde Nov 2025 hasta Oct 2026 (12 meses)
+            start_projection = datetime(2025, 11, 1)
+            steps = np.arange(12)
+            months = [(start_projection + relativedelta(months=int(i))).strftime("%m/%y") for i in steps]
+        
+            # Contrato base según la distancia: 3 meses ZC.c.3, 5 meses ZC.c.4 y 4 meses ZC.c.5
+            base_contracts = np.array(contracts_2026)[np.searchsorted([3, 8], steps, side="right")]
+            available = np.isin(base_contracts, list(contract_prices))
+        
+            # Variación estacional +/-2%; el ruido sale de n_paths caminos Monte Carlo
+            seasonal_factor = 1 + 0.02 * np.sin(2 * np.pi * steps / 12)
+            bands = monte_carlo.simulate_factors(
+                len(steps), n_paths=n_paths, rng=monte_carlo.root_rng(commodity, seed),
+            )
+        
+            base_open = np.array([contract_prices.get(c, {}).get('open_avg', np.nan) for c in base_contracts])
+            base_close = np.array([contract_prices.get(c, {}).get('close_avg', np.nan) for c in base_contracts])
+            median = seasonal_factor * bands[50]
+        
+            projection_results = pd.DataFrame({
+                'month': months,
+                'open_avg': base_open * median,
+                'close_avg': base_close * median,
+                'diff': (base_close - base_open) * median,
+                'data_type': 'PROYECCIÓN',
+                'base_contract': base_contracts,
+                **{f'close_p{q}': base_close * seasonal_factor * bands[q] for q in monte_carlo.PERCENTILES},
+            })[available]
+        
+            # Combinar resultados históricos y proyecciones
+            final_df = pd.concat([historical_results, projection_results], ignore_index=True)
+        
+            return final_df
         
     except Exception as e:
         print(f"❌ Error: {e}")
         return None
 
-def display_projection_results(results_df, commodity="ZC"):
+def build_report(results_df, commodity="ZC"):
     """
-    Mostrar resultados en el formato exacto solicitado
+    Reporte con la tabla mensual, las bandas Monte Carlo y el análisis comparativo
     """
-    if results_df is None or results_df.empty:
-        print("❌ No hay resultados para mostrar")
-        return
-    
-    print(f"\n📊 PROYECCIÓN MENSUAL {commodity} - Mayo 2025 a Octubre 2026")
-    print("="*70)
-    print("(Datos reales hasta Oct 2025, proyecciones desde Nov 2025)")
-    print("")
+    result = report.Report(
+        f"PROYECCIÓN MENSUAL {commodity} - Mayo 2025 a Octubre 2026",
+        meta={"commodity": commodity, "script": "monthly_projection_2026"},
+    )
     
     # Formato exacto solicitado
-    print("month   open_avg  close_avg      diff")
+    result.add("projection", "Datos reales hasta Oct 2025, proyecciones desde Nov 2025",
+               results_df[['month', 'open_avg', 'close_avg', 'diff', 'data_type']], decimals=6)
     
-    for _, row in results_df.iterrows():
-        status_symbol = "📊" if row['data_type'] == 'REAL' else "🔮"
-        
-        print(f"{row['month']} {row['open_avg']:9.6f} {row['close_avg']:9.6f} {row['diff']:9.6f}")
+    projection_data = results_df[results_df['data_type'] == 'PROYECCIÓN']
+    if 'close_p5' in results_df.columns:
+        result.add("bands", "BANDAS MONTE CARLO DEL CIERRE (P5 / P50 / P95)",
+                   projection_data[['month', 'close_p5', 'close_p50', 'close_p95', 'base_contract']])
     
-    print("")
-    print("📋 LEYENDA:")
-    print("  • 05/25 - 10/25: Datos REALES de mercado")
-    print("  • 11/25 - 10/26: PROYECCIONES basadas en contratos futuros")
+    notes = [
+        "📋 LEYENDA:",
+        "  • 05/25 - 10/25: Datos REALES de mercado",
+        "  • 11/25 - 10/26: PROYECCIONES basadas en contratos futuros",
+    ]
     
     # Análisis adicional
     real_data = results_df[results_df['data_type'] == 'REAL']
-    projection_data = results_df[results_df['data_type'] == 'PROYECCIÓN']
-    
     if not real_data.empty and not projection_data.empty:
         avg_real_price = real_data['close_avg'].mean()
         avg_projection_price = projection_data['close_avg'].mean()
         
-        print(f"\n📈 ANÁLISIS COMPARATIVO:")
-        print(f"  • Precio promedio real (2025): ${avg_real_price:.2f}")
-        print(f"  • Precio promedio proyección (2026): ${avg_projection_price:.2f}")
-        print(f"  • Diferencia: ${avg_projection_price - avg_real_price:.2f}")
-        
-        if avg_projection_price > avg_real_price:
-            print(f"  • Tendencia proyectada: 📈 ALCISTA hacia 2026")
-        else:
-            print(f"  • Tendencia proyectada: 📉 BAJISTA hacia 2026")
+        notes += [
+            "",
+            "📈 ANÁLISIS COMPARATIVO:",
+            f"  • Precio promedio real (2025): ${avg_real_price:.2f}",
+            f"  • Precio promedio proyección (2026): ${avg_projection_price:.2f}",
+            f"  • Diferencia: ${avg_projection_price - avg_real_price:.2f}",
+            "  • Tendencia proyectada: 📈 ALCISTA hacia 2026" if avg_projection_price > avg_real_price
+            else "  • Tendencia proyectada: 📉 BAJISTA hacia 2026",
+        ]
+    
+    result.add("analysis", "ANÁLISIS", notes=notes)
+    return result
 
-def main():
+def display_projection_results(results_df, commodity="ZC", export=()):
+    """
+    Mostrar resultados en el formato exacto solicitado
+    
+    export: Rutas donde guardar también el reporte (.json, .html o .md)
+    """
+    if results_df is None or results_df.empty:
+        print("❌ No hay resultados para mostrar")
+        return
+    
+    projection_report = build_report(results_df, commodity)
+    print(projection_report.render("console"), end="")
+    for path in export:
+        projection_report.write(path)
+        print(f"💾 Reporte en: {path}")
+
+def main(commodity="ZC", export_csv=False, df=None, stream=False,
+         n_paths=monte_carlo.N_PATHS, seed=monte_carlo.DEFAULT_SEED, export=()):
     """
     Función principal
+    
+    commodity: ZC = Maíz; df: barras ya descargadas con fetch_data (opcional);
+    stream: leer las barras por bloques; n_paths y seed: caminos y semilla
+    de la simulación Monte Carlo; export: rutas donde guardar también el
+    reporte (.json, .html o .md)
     """
-    commodity = "ZC"  # Maíz
     
     print("🚀 PROYECCIÓN MENSUAL EXTENDIDA - MAYO 2025 A OCTUBRE 2026")
     print("="*70)
@@ -207,20 +258,20 @@ def main():
     print("   basadas en contratos futuros actuales")
     print("")
     
-    # Set random seed para resultados reproducibles
-    np.random.seed(42)
-    
-    # Generar proyección
-    results = monthly_projection_2026(commodity)
+    # Generar proyección (reproducible: la semilla fija los caminos de cada raíz)
+    results = monthly_projection_2026(commodity, df=df, stream=stream, n_paths=n_paths, seed=seed)
     
     if results is not None:
         # Mostrar resultados en formato solicitado
-        display_projection_results(results, commodity)
+        with instrumentation.span("display"):
+            display_projection_results(results, commodity, export)
         
         # Guardar datos
-        output_file = f"{commodity}_projection_2025_to_2026.csv"
-        results.to_csv(output_file, index=False)
-        print(f"\n💾 Datos guardados en: {output_file}")
+        output_file = f"{commodity}_projection_2025_to_2026.csv" if export_csv else None
+        bar_store.save_table(results, "projection", commodity, csv_path=output_file)
+        print(f"\n💾 Datos guardados en el almacén: tabla 'projection' (root={commodity})")
+        if output_file:
+            print(f"💾 Copia CSV en: {output_file}")
         
         print(f"\n🎉 ÉXITO: Proyección creada con {len(results)} meses")
         print(f"📅 Desde {results.iloc[0]['month']} hasta {results.iloc[-1]['month']}")
@@ -229,4 +280,18 @@ def main():
         print("❌ No se pudo generar la proyección")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Proyección mensual hasta octubre 2026")
+    parser.add_argument("--commodity", default="ZC", help="Raíz a analizar (ZC, ZS, ZW...)")
+    parser.add_argument("--csv", action="store_true", help="Exportar también los resultados a CSV")
+    parser.add_argument("--stream", action="store_true",
+                        help="Leer las barras por bloques (memoria acotada)")
+    parser.add_argument("--paths", type=int, default=monte_carlo.N_PATHS,
+                        help="Caminos Monte Carlo por contrato")
+    parser.add_argument("--seed", type=int, default=monte_carlo.DEFAULT_SEED,
+                        help="Semilla de la simulación")
+    report.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    with instrumentation.session("monthly_projection_2026", args.report, args.profile):
+        main(commodity=args.commodity, export_csv=args.csv, stream=args.stream,
+             n_paths=args.paths, seed=args.seed, export=args.export)
@@ -1,210 +1,202 @@
-import databento as db
-import pandas as pd
-import os
-from dotenv import load_dotenv
+import argparse
+import bar_store
+import fetch
+import incremental_monthly
+import instrumentation
+import memo
+import monthly_engine
+import report
+import streaming
 
-# Cargar variables de entorno
-load_dotenv()
+def contract_symbols(commodity="ZC", extended_to_2026=True):
+    """
+    Contratos continuos a analizar (hasta 2026 o solo el front month)
+    """
+    if extended_to_2026:
+        return [
+            f"{commodity}.c.0",  # Actual
+            f"{commodity}.c.1",  # 2do mes  
+            f"{commodity}.c.2",  # 3er mes
+            f"{commodity}.c.3",  # 4to mes (2026)
+            f"{commodity}.c.4",  # 5to mes (2026)
+            f"{commodity}.c.5",  # 6to mes (2026)
+        ]
+    return [f"{commodity}.c.0"]  # Solo front month
 
-# Obtener API key desde variable de entorno
-api_key = os.getenv('DATABENTO_API_KEY')
-if not api_key:
-    raise ValueError("DATABENTO_API_KEY no encontrada en el archivo .env")
+def _get_range(commodity, extended_to_2026):
+    return fetch.get_range(
+        dataset="GLBX.MDP3",
+        schema="ohlcv-1d",
+        stype_in="continuous",
+        symbols=contract_symbols(commodity, extended_to_2026),
+        start="2024-01-01",
+        end="2025-10-23"
+    )
 
-# Crear cliente histórico
-client = db.Historical(api_key)
+def fetch_data(commodity="ZC", extended_to_2026=True):
+    """
+    Obtener las barras diarias del análisis simple (DataFrame con ts_event como columna)
+    """
+    return _get_range(commodity, extended_to_2026).to_df().reset_index()
+
+def fetch_chunks(commodity="ZC", extended_to_2026=True, chunk_size=streaming.CHUNK_SIZE):
+    """
+    Las mismas barras que fetch_data, pero por bloques de a lo sumo chunk_size registros
+    """
+    return streaming.iter_bars(_get_range(commodity, extended_to_2026), chunk_size)
 
-def monthly_futures_simple(commodity="ZC", extended_to_2026=True):
+def monthly_futures_simple(commodity="ZC", extended_to_2026=True, incremental=False, df=None,
+                           stream=False):
     """
     Versión simplificada del análisis mensual con proyecciones 2026
     Similar al monthly_avg_diff.py original pero con contratos futuros extendidos
+    
+    Si se pasa df (barras de fetch_data), no se vuelven a pedir los datos; con
+    stream=True las barras se leen y agregan por bloques
     """
     
     print(f"🌽 Análisis mensual {commodity} - Extendido hacia 2026")
     print("="*60)
     
     # Usar contratos continuos que se extienden hacia 2026
-    if extended_to_2026:
-        symbols = [
-            f"{commodity}.c.0",  # Actual
-            f"{commodity}.c.1",  # 2do mes  
-            f"{commodity}.c.2",  # 3er mes
-            f"{commodity}.c.3",  # 4to mes (2026)
-            f"{commodity}.c.4",  # 5to mes (2026)
-            f"{commodity}.c.5",  # 6to mes (2026)
-        ]
-    else:
-        symbols = [f"{commodity}.c.0"]  # Solo front month
+    symbols = contract_symbols(commodity, extended_to_2026)
     
     try:
-        # Obtener datos
-        data = client.timeseries.get_range(
-            dataset="GLBX.MDP3",
-            schema="ohlcv-1d",
-            stype_in="continuous",
-            symbols=symbols,
-            start="2024-01-01",
-            end="2025-10-23"
-        )
-        
-        df = data.to_df().reset_index()
+        if incremental:
+            # Reutiliza el estado mensual guardado y solo agrega las barras nuevas
+            monthly, _ = incremental_monthly.refresh_monthly(
+                f"{commodity}_monthly_simple_2024-01-01",
+                symbols,
+                start="2024-01-01",
+                end="2025-10-23"
+            )
+        elif stream and df is None:
+            # Agregar bloque a bloque sin armar el DataFrame completo
+            with instrumentation.span("aggregate"):
+                monthly = monthly_engine.monthly_aggregate_chunks(
+                    fetch_chunks(commodity, extended_to_2026), symbols
+                )
+            if monthly.empty:
+                print("❌ No se encontraron datos")
+                return None
+        elif df is None:
+            # Solo hacen falta promedios mensuales: se agregan los registros DBN
+            # como arrays de NumPy, sin armar el DataFrame de barras
+            # (memo la guarda aparte de las de los otros motores)
+            data = _get_range(commodity, extended_to_2026)
+            with instrumentation.span("aggregate"):
+                monthly = memo.table("monthly", lambda: monthly_engine.monthly_aggregate_records(data, symbols),
+                                     data, symbols=symbols, engine="records", version=monthly_engine.VERSION)
+            if monthly.empty:
+                print("❌ No se encontraron datos")
+                return None
+        else:
+            if df.empty:
+                print("❌ No se encontraron datos")
+                return None
+            
+            # Agrupar todos los contratos por mes en una sola pasada
+            with instrumentation.span("aggregate", records=len(df)):
+                monthly = memo.table("monthly", lambda: monthly_engine.monthly_aggregate(df, symbols),
+                                     df, symbols=symbols, engine=monthly_engine.engine(df),
+                                     version=monthly_engine.VERSION)
         
-        if df.empty:
-            print("❌ No se encontraron datos")
+        if monthly.empty:
             return None
         
-        # Procesar cada contrato por separado
-        all_results = []
+        # Agregar información del contrato
+        monthly = monthly.rename(columns={"symbol": "contract"})
+        monthly["is_2026_projection"] = monthly["contract"].str.endswith(('.c.3', '.c.4', '.c.5'))
         
-        for symbol in symbols:
-            symbol_data = df[df['symbol'] == symbol].copy()
-            
-            if symbol_data.empty:
-                continue
-            
-            # Agregar columna de mes
-            symbol_data["month"] = symbol_data["ts_event"].dt.to_period("M")
-            
-            # Agrupar por mes (similar al original)
-            monthly = (
-                symbol_data.groupby("month")
-                .agg(
-                    open_avg=("open", "mean"),
-                    close_avg=("close", "mean")
-                )
-                .reset_index()
-            )
-            
-            # Calcular diferencia (close - open) - igual que el original
-            monthly["diff"] = monthly["close_avg"] - monthly["open_avg"]
-            
-            # Formato mes como MM/YY - igual que el original
-            monthly["month"] = monthly["month"].dt.strftime("%m/%y")
-            
-            # Agregar información del contrato
-            monthly["contract"] = symbol
-            monthly["is_2026_projection"] = symbol.endswith(('.c.3', '.c.4', '.c.5'))
-            
-            # Tomar solo los últimos meses para no sobrecargar
-            recent_monthly = monthly.tail(6)  # Últimos 6 meses
-            
-            all_results.append(recent_monthly)
+        # Tomar solo los últimos meses para no sobrecargar
+        recent_monthly = monthly.groupby("contract", sort=False).tail(6)  # Últimos 6 meses
         
-        # Combinar resultados
-        if all_results:
-            combined_df = pd.concat(all_results, ignore_index=True)
-            return combined_df
-        else:
-            return None
+        return recent_monthly[
+            ["month", "open_avg", "close_avg", "diff", "contract", "is_2026_projection"]
+        ].reset_index(drop=True)
             
     except Exception as e:
         print(f"❌ Error: {e}")
         return None
 
-def display_results(results_df, commodity="ZC"):
+def build_report(results_df, commodity="ZC"):
     """
-    Mostrar resultados en formato similar al monthly_avg_diff.py original
+    Reporte con los meses de cada contrato, el resumen consolidado y el análisis comparativo
+    
+    Todas las tablas salen de agrupaciones sobre results_df (sin recorrer contratos)
     """
-    if results_df is None or results_df.empty:
-        print("❌ No hay resultados para mostrar")
-        return
+    # Tomar el último mes de cada contrato para el resumen
+    summary_df = report.latest_by(results_df, "contract").rename(
+        columns={"is_2026_projection": "is_2026"}
+    )[["contract", "month", "open_avg", "close_avg", "diff", "is_2026"]].reset_index(drop=True)
     
-    print(f"\n📊 RESULTADOS FORMATO ORIGINAL - {commodity}")
-    print("="*70)
+    result = report.Report(
+        f"RESULTADOS FORMATO ORIGINAL - {commodity}",
+        meta={"commodity": commodity, "script": "monthly_simple_2026"},
+    )
+    # Formato igual al original: 6 decimales
+    result.add("monthly", "Meses por contrato", results_df[
+        ["contract", "month", "open_avg", "close_avg", "diff", "is_2026_projection"]
+    ], decimals=6)
+    result.add("summary", "RESUMEN CONSOLIDADO - Todos los contratos", summary_df)
     
-    # Mostrar por contrato
-    for contract in results_df['contract'].unique():
-        contract_data = results_df[results_df['contract'] == contract]
-        
-        is_2026 = contract_data['is_2026_projection'].iloc[0]
-        status = "⭐ PROYECCIÓN 2026" if is_2026 else "📊 ACTUAL/2025"
-        
-        print(f"\n🔹 {contract} - {status}")
-        print("-" * 50)
-        
-        # Formato igual al original
-        display_df = contract_data[['month', 'open_avg', 'close_avg', 'diff']].copy()
-        
-        # Formatear números como en el original
-        display_df['open_avg'] = display_df['open_avg'].round(6)
-        display_df['close_avg'] = display_df['close_avg'].round(6) 
-        display_df['diff'] = display_df['diff'].round(6)
-        
-        print(display_df.to_string(index=False))
-    
-    print(f"\n📋 RESUMEN CONSOLIDADO - Todos los contratos:")
-    print("="*70)
-    print(f"{'Contrato':<10} {'Mes':<8} {'Open Avg':<12} {'Close Avg':<12} {'Diff':<10} {'2026?'}")
-    print("-" * 70)
+    # Promedios de contratos 2026 y actuales en una sola agrupación
+    groups = summary_df.groupby("is_2026")[["close_avg", "diff"]].agg(["mean", "size"])
+    notes = []
     
-    # Tomar el último mes de cada contrato para el resumen
-    summary_data = []
-    for contract in results_df['contract'].unique():
-        contract_data = results_df[results_df['contract'] == contract]
-        latest = contract_data.iloc[-1]
-        
-        status = "⭐ SÍ" if latest['is_2026_projection'] else "❌ No"
-        
-        print(f"{contract:<10} {latest['month']:<8} "
-              f"{latest['open_avg']:<12.2f} {latest['close_avg']:<12.2f} "
-              f"{latest['diff']:<10.2f} {status}")
-        
-        summary_data.append({
-            'contract': contract,
-            'month': latest['month'],
-            'open_avg': latest['open_avg'],
-            'close_avg': latest['close_avg'],
-            'diff': latest['diff'],
-            'is_2026': latest['is_2026_projection']
-        })
-    
-    # Análisis adicional
-    summary_df = pd.DataFrame(summary_data)
-    
-    print(f"\n🎯 ANÁLISIS COMPARATIVO:")
-    print("="*50)
-    
-    # Contratos 2026
-    contratos_2026 = summary_df[summary_df['is_2026'] == True]
-    if not contratos_2026.empty:
-        print(f"✅ Contratos con exposición 2026: {len(contratos_2026)}")
-        
-        avg_price_2026 = contratos_2026['close_avg'].mean()
-        avg_diff_2026 = contratos_2026['diff'].mean()
-        
-        print(f"   • Precio promedio 2026: ${avg_price_2026:.2f}")
-        print(f"   • Diferencia promedio 2026: ${avg_diff_2026:.2f}")
-        
-        if avg_diff_2026 > 0:
-            print(f"   • Tendencia 2026: 📈 ALCISTA")
-        else:
-            print(f"   • Tendencia 2026: 📉 BAJISTA")
+    if True in groups.index:
+        avg_price_2026, avg_diff_2026 = groups.loc[True, ("close_avg", "mean")], groups.loc[True, ("diff", "mean")]
+        notes += [
+            f"✅ Contratos con exposición 2026: {groups.loc[True, ('close_avg', 'size')]}",
+            f"   • Precio promedio 2026: ${avg_price_2026:.2f}",
+            f"   • Diferencia promedio 2026: ${avg_diff_2026:.2f}",
+            f"   • Tendencia 2026: {'📈 ALCISTA' if avg_diff_2026 > 0 else '📉 BAJISTA'}",
+        ]
     
-    # Contratos actuales
-    contratos_actuales = summary_df[summary_df['is_2026'] == False]
-    if not contratos_actuales.empty:
-        avg_price_actual = contratos_actuales['close_avg'].mean()
-        avg_diff_actual = contratos_actuales['diff'].mean()
-        
-        print(f"✅ Contratos actuales/2025: {len(contratos_actuales)}")
-        print(f"   • Precio promedio actual: ${avg_price_actual:.2f}")
-        print(f"   • Diferencia promedio actual: ${avg_diff_actual:.2f}")
+    if False in groups.index:
+        avg_price_actual, avg_diff_actual = groups.loc[False, ("close_avg", "mean")], groups.loc[False, ("diff", "mean")]
+        notes += [
+            f"✅ Contratos actuales/2025: {groups.loc[False, ('close_avg', 'size')]}",
+            f"   • Precio promedio actual: ${avg_price_actual:.2f}",
+            f"   • Diferencia promedio actual: ${avg_diff_actual:.2f}",
+        ]
         
         # Comparación
-        if len(contratos_2026) > 0:
+        if True in groups.index:
             premium_2026 = avg_price_2026 - avg_price_actual
-            print(f"\n💰 PREMIUM 2026 vs ACTUAL: ${premium_2026:.2f}")
-            
-            if premium_2026 > 0:
-                print(f"   🔴 Mercado en CONTANGO (futuros más caros)")
-            else:
-                print(f"   🔵 Mercado en BACKWARDATION (futuros más baratos)")
+            notes += [
+                "",
+                f"💰 PREMIUM 2026 vs ACTUAL: ${premium_2026:.2f}",
+                "   🔴 Mercado en CONTANGO (futuros más caros)" if premium_2026 > 0
+                else "   🔵 Mercado en BACKWARDATION (futuros más baratos)",
+            ]
+    
+    result.add("comparison", "ANÁLISIS COMPARATIVO", notes=notes)
+    return result
 
-def main():
+def display_results(results_df, commodity="ZC", export=()):
+    """
+    Mostrar resultados en formato similar al monthly_avg_diff.py original
+    
+    export: Rutas donde guardar también el reporte (.json, .html o .md)
+    """
+    if results_df is None or results_df.empty:
+        print("❌ No hay resultados para mostrar")
+        return
+    
+    results_report = build_report(results_df, commodity)
+    print(results_report.render("console"), end="")
+    for path in export:
+        results_report.write(path)
+        print(f"💾 Reporte en: {path}")
+
+def main(commodity="ZC", export_csv=False, incremental=False, df=None, stream=False, export=()):
     """
     Función principal - Ejecutar análisis
+    
+    commodity: ZC = Maíz - puedes cambiar por ZS (soja) o ZW (trigo)
+    export: Rutas donde guardar también el reporte (.json, .html o .md)
     """
-    commodity = "ZC"  # Maíz - puedes cambiar por ZS (soja) o ZW (trigo)
     
     print("🚀 MONTHLY_AVG_DIFF EXTENDIDO - PROYECCIONES 2026")
     print("="*60)
@@ -213,16 +205,20 @@ def main():
     print("")
     
     # Ejecutar análisis
-    results = monthly_futures_simple(commodity, extended_to_2026=True)
+    results = monthly_futures_simple(commodity, extended_to_2026=True, incremental=incremental, df=df,
+                                     stream=stream)
     
     if results is not None:
         # Mostrar resultados
-        display_results(results, commodity)
+        with instrumentation.span("display"):
+            display_results(results, commodity, export)
         
         # Guardar en CSV para referencia
-        output_file = f"{commodity}_monthly_extended_simple.csv"
-        results.to_csv(output_file, index=False)
-        print(f"\n💾 Datos guardados en: {output_file}")
+        output_file = f"{commodity}_monthly_extended_simple.csv" if export_csv else None
+        bar_store.save_table(results, "monthly_simple", commodity, csv_path=output_file)
+        print(f"\n💾 Datos guardados en el almacén: tabla 'monthly_simple' (root={commodity})")
+        if output_file:
+            print(f"💾 Copia CSV en: {output_file}")
         
         print(f"\n🎉 ÉXITO: Análisis completado con {len(results)} registros mensuales")
         print(f"📈 Ahora tienes proyecciones hasta 2026 vs solo 3 meses del original")
@@ -231,4 +227,16 @@ def main():
         print("❌ No se pudieron obtener resultados")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Análisis mensual simple con proyecciones 2026")
+    parser.add_argument("--commodity", default="ZC", help="Raíz a analizar (ZC, ZS, ZW...)")
+    parser.add_argument("--csv", action="store_true", help="Exportar también los resultados a CSV")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Actualizar solo los meses con barras nuevas")
+    parser.add_argument("--stream", action="store_true",
+                        help="Leer y agregar las barras por bloques (memoria acotada)")
+    report.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    with instrumentation.session("monthly_simple_2026", args.report, args.profile):
+        main(commodity=args.commodity, export_csv=args.csv, incremental=args.incremental, stream=args.stream,
+             export=args.export)
@@ -1,35 +1,32 @@
-import databento as db
 import matplotlib.pyplot as plt
-import os
-from dotenv import load_dotenv
-
-# Cargar variables de entorno
-load_dotenv()
-
-# Obtener API key desde variable de entorno
-api_key = os.getenv('DATABENTO_API_KEY')
-if not api_key:
-    raise ValueError("DATABENTO_API_KEY no encontrada en el archivo .env")
-
-client = db.Historical(api_key)
+import decimation
+import fetch
 
 dataset = "GLBX.MDP3"
+schema = "ohlcv-1d"  # Con ohlcv-1m cada serie se reduce igual al ancho del gráfico
 symbols = ["ZC.c.4", "ZS.c.4", "ZW.c.4"]  # Try with 'c' roll rule (calendar roll)
 start = "2024"
 
-data = client.timeseries.get_range(
+data = fetch.get_range(
     dataset="GLBX.MDP3",
-    schema="ohlcv-1d",
+    schema=schema,
     stype_in="continuous",
     symbols=symbols,
     start=start,
 )
 
 df = data.to_df()
-df.groupby("symbol")["close"].plot(
-    xlabel="Date",
-    ylabel="Price",
-)
+
+fig, ax = plt.subplots()
+width = decimation.axes_width_px(ax)
+
+# Graficar a lo sumo ~2 puntos por píxel por serie, conservando máximos y mínimos
+for symbol, symbol_data in df.groupby("symbol"):
+    x, y = decimation.decimate(symbol_data.index, symbol_data["close"], width)
+    ax.plot(x, y, label=symbol)
+
+ax.set_xlabel("Date")
+ax.set_ylabel("Price")
 
 plt.legend()
 plt.show()
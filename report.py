@@ -0,0 +1,182 @@
+import html
+import json
+import sys
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Formatos de salida; write() elige según la extensión del archivo
+FORMATS = ("console", "json", "html", "markdown")
+_SUFFIXES = {".json": "json", ".html": "html", ".htm": "html", ".md": "markdown", ".txt": "console"}
+
+
+class Report:
+    """
+    Reporte estructurado: secciones con una tabla y/o líneas de texto
+
+    Los scripts arman las tablas con operaciones vectorizadas y el reporte se
+    escribe completo de una vez en consola, JSON, HTML o Markdown.
+
+    Args:
+        title: Título del reporte
+        meta: Datos extra para JSON (raíz, fechas...); se agrega la fecha de creación
+    """
+
+    def __init__(self, title, meta=None):
+        self.title = title
+        self.meta = {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"), **(meta or {})}
+        self.sections = []
+
+    def add(self, name, title, table=None, notes=(), decimals=2):
+        """
+        Agregar una sección
+
+        Args:
+            name: Clave de la sección en JSON
+            title: Encabezado para consola, HTML y Markdown
+            table: DataFrame (opcional)
+            notes: Líneas de texto que van después de la tabla
+            decimals: Decimales de los números en consola, HTML y Markdown
+        """
+        self.sections.append({
+            "name": name,
+            "title": title,
+            "table": table,
+            "notes": list(notes),
+            "decimals": decimals,
+        })
+        return self
+
+    def render(self, fmt="console"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato no soportado: {fmt} (usar {', '.join(FORMATS)})")
+        return _RENDERERS[fmt](self)
+
+    def write(self, path):
+        """
+        Guardar el reporte; el formato sale de la extensión (.json, .html, .md) y "-" = consola
+        """
+        if str(path) == "-":
+            sys.stdout.write(self.render("console"))
+            return
+
+        fmt = _SUFFIXES.get(Path(path).suffix.lower())
+        if fmt is None:
+            raise ValueError(f"Extensión no soportada: {path} (usar {', '.join(_SUFFIXES)})")
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(self.render(fmt), encoding="utf-8")
+
+
+def latest_by(df, by, n=1):
+    """
+    Últimas n filas de cada grupo (en el orden de df), sin recorrer los grupos uno por uno
+    """
+    return df.groupby(by, sort=False).tail(n)
+
+
+def label(mask, yes, no):
+    """
+    Columna de texto a partir de una condición (por ejemplo "⭐ SÍ" / "❌ No")
+    """
+    return pd.Series(np.where(mask, yes, no), index=mask.index)
+
+
+def money(values, decimals=2):
+    """
+    Columna de montos formateados ("$123.45") a partir de números
+    """
+    return "$" + values.round(decimals).map(f"{{:.{decimals}f}}".format)
+
+
+def add_arguments(parser):
+    """
+    Agregar --export al argparse de un script
+    """
+    parser.add_argument("--export", metavar="PATH", action="append", default=[],
+                        help="Guardar también el reporte (.json, .html o .md; se puede repetir)")
+
+
+def _formatted(table, decimals):
+    # Todas las celdas como texto, columna por columna
+    columns = {}
+    for column in table.columns:
+        values = table[column]
+        if pd.api.types.is_bool_dtype(values):
+            text = pd.Series(np.where(values, "⭐ SÍ", "❌ No"), index=values.index)
+        elif pd.api.types.is_float_dtype(values):
+            text = values.round(decimals).map(f"{{:.{decimals}f}}".format)
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            text = values.dt.strftime("%Y-%m-%d")
+        else:
+            text = values.astype(str)
+        columns[str(column)] = text.where(values.notna(), "")
+    return pd.DataFrame(columns, index=table.index)
+
+
+def _console(report):
+    lines = [f"\n📊 {report.title}", "=" * 80]
+    for section in report.sections:
+        lines += ["", f"🔹 {section['title']}", "-" * 80]
+        table = section["table"]
+        if table is not None and not table.empty:
+            lines.append(_formatted(table, section["decimals"]).to_string(index=False))
+        lines += section["notes"]
+    return "\n".join(lines) + "\n"
+
+
+def _markdown(report):
+    lines = [f"# {report.title}", ""]
+    for section in report.sections:
+        lines += [f"## {section['title']}", ""]
+        table = section["table"]
+        if table is not None and not table.empty:
+            cells = _formatted(table, section["decimals"])
+            escaped = [cells[c].str.replace("|", "\\|", regex=False) for c in cells.columns]
+            rows = escaped[0].str.cat(escaped[1:], sep=" | ") if len(escaped) > 1 else escaped[0]
+            lines.append("| " + " | ".join(cells.columns) + " |")
+            lines.append("|" + "---|" * len(cells.columns))
+            lines += ("| " + rows + " |").tolist()
+            lines.append("")
+        lines += [f"- {note.strip()}" for note in section["notes"] if note.strip()]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _html(report):
+    parts = [
+        "<!DOCTYPE html>",
+        '<html><head><meta charset="utf-8">',
+        f"<title>{html.escape(report.title)}</title>",
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+        "td,th{border:1px solid #ccc;padding:2px 8px;text-align:right}</style>",
+        "</head><body>",
+        f"<h1>{html.escape(report.title)}</h1>",
+    ]
+    for section in report.sections:
+        parts.append(f"<h2>{html.escape(section['title'])}</h2>")
+        table = section["table"]
+        if table is not None and not table.empty:
+            parts.append(_formatted(table, section["decimals"]).to_html(index=False, border=0))
+        notes = [note.strip() for note in section["notes"] if note.strip()]
+        if notes:
+            parts.append("<ul>" + "".join(f"<li>{html.escape(note)}</li>" for note in notes) + "</ul>")
+    parts.append("</body></html>")
+    return "\n".join(parts) + "\n"
+
+
+def _json(report):
+    sections = []
+    for section in report.sections:
+        table = section["table"]
+        rows = [] if table is None else json.loads(
+            table.to_json(orient="records", date_format="iso", force_ascii=False)
+        )
+        sections.append({"name": section["name"], "title": section["title"],
+                         "rows": rows, "notes": [note.strip() for note in section["notes"]]})
+    return json.dumps({"title": report.title, "meta": report.meta, "sections": sections},
+                      indent=2, ensure_ascii=False) + "\n"
+
+
+_RENDERERS = {"console": _console, "json": _json, "html": _html, "markdown": _markdown}
@@ -0,0 +1,335 @@
+import argparse
+import numpy as np
+import pandas as pd
+from databento_dbn import FIXED_PRICE_SCALE, UNDEF_PRICE
+from compact_bars import CompactBars, PRICE_COLUMNS
+import fetch
+import instrumentation
+import monthly_engine
+import report
+import streaming
+
+DATASET = "GLBX.MDP3"
+
+# Sesión de CME Globex: empieza a las 17:00 de Chicago y cuenta para el día hábil siguiente
+SESSION_TZ = "America/Chicago"
+SESSION_START = "17:00"
+
+# Temporalidades -> frecuencia de pandas (la semana cierra el viernes)
+FREQUENCIES = {"D": "D", "W": "W-FRI", "M": "M", "Q": "Q"}
+
+BAR_COLUMNS = ["symbol", "period", "open", "high", "low", "close", "volume", "days", "bars"]
+
+_DAY_NS = 86_400 * 10**9
+
+
+class SessionBars:
+    """
+    Barras diarias por sesión armadas localmente a partir de barras más finas
+
+    Se descarga una sola vez la granularidad más fina (ohlcv-1m, ohlcv-1h o
+    ohlcv-1d) y de ahí salen las barras diarias, semanales, mensuales y
+    trimestrales de todos los símbolos a la vez: primer open, máximo high,
+    mínimo low, último close y volumen sumado. Cada barra fina se asigna al día
+    de su sesión (con SESSION_START = 17:00 de Chicago, una barra del domingo
+    a la noche cuenta para el lunes). Los precios quedan en enteros de punto
+    fijo hasta armar la tabla final.
+
+    Las barras diarias se calculan una vez; las demás temporalidades y los
+    promedios mensuales de siempre (monthly_aggregate) salen de ellas sin
+    volver a leer los registros.
+
+    Args:
+        codes: Código de símbolo de cada barra diaria
+        days: Día de la sesión (días desde 1970-01-01)
+        fields: Diccionario first_ts/last_ts/open/high/low/close/volume/bars -> array
+        names: Símbolo de cada código
+    """
+
+    def __init__(self, codes, days, fields, names):
+        self.codes = codes
+        self.days = days
+        self.fields = fields
+        self.names = np.asarray(names, dtype=object)
+
+    @classmethod
+    def from_range(cls, data, symbols=None, count=None, tz=SESSION_TZ, session_start=SESSION_START):
+        """
+        Barras de sesión leyendo los registros DBN de get_range por bloques
+
+        Args:
+            data: Resultado de fetch.get_range (o CompactBars / DataFrame de barras)
+            symbols: Lista opcional de símbolos a incluir
+            count: Registros por bloque (por defecto streaming.CHUNK_SIZE)
+            tz: Zona horaria de la sesión
+            session_start: Hora local de inicio de la sesión ("17:00"; None = día UTC)
+        """
+        if isinstance(data, pd.DataFrame):
+            data = CompactBars.from_frame(data)
+        if isinstance(data, CompactBars):
+            return cls.from_compact(data, symbols, count, tz, session_start)
+
+        names = {}
+        parts = []
+        with instrumentation.span("session_bars"):
+            for codes, records in monthly_engine.coded_records(data, names, symbols, count):
+                ts = records["ts_event"].view(np.int64)
+                parts.append(_daily(
+                    codes, session_days(ts, tz, session_start), ts,
+                    {name: records[name].view(np.int64) for name in PRICE_COLUMNS},
+                    records["volume"],
+                ))
+        return cls(*_merge_daily(parts), list(names))
+
+    @classmethod
+    def from_compact(cls, bars, symbols=None, count=None, tz=SESSION_TZ, session_start=SESSION_START):
+        """
+        Barras de sesión a partir de un CompactBars (mismo resultado que from_range)
+        """
+        names = np.asarray(bars.symbol.categories, dtype=object)
+        codes = np.asarray(bars.symbol.codes, dtype=np.int64)
+        if symbols is not None:
+            codes = np.where(np.isin(names, list(symbols))[codes] & (codes >= 0), codes, -1)
+        count = count or streaming.CHUNK_SIZE
+
+        parts = []
+        with instrumentation.span("session_bars", records=len(codes)):
+            for lo in range(0, len(codes), count):
+                part = slice(lo, lo + count)
+                keep = codes[part] >= 0
+                ts = bars.ts[part][keep]
+                parts.append(_daily(
+                    codes[part][keep], session_days(ts, tz, session_start), ts,
+                    {name: bars.prices[name][part][keep] for name in PRICE_COLUMNS},
+                    bars.volume[part][keep],
+                ))
+        return cls(*_merge_daily(parts), names)
+
+    @property
+    def empty(self):
+        return len(self.codes) == 0
+
+    def bars(self, freq="D"):
+        """
+        Barras OHLCV de una temporalidad para todos los símbolos
+
+        Args:
+            freq: "D", "W" (semana hasta el viernes), "M" o "Q"
+
+        Returns:
+            DataFrame con índice ts_event (inicio del período, UTC) y las
+            columnas de BAR_COLUMNS: days = sesiones con barras, bars = barras
+            finas usadas
+        """
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Temporalidad no soportada: {freq} (usar {', '.join(FREQUENCIES)})")
+
+        with instrumentation.span("resample", records=len(self.codes)):
+            codes, periods = self.codes, self.days
+            fields = {**self.fields, "days": np.ones(len(codes), dtype=np.int64)}
+            if freq != "D":
+                codes, periods, fields = _reduce(codes, _periods(periods, freq), fields)
+
+            # Mismo orden que las tablas mensuales: por símbolo y período
+            name_rank = _name_rank(self.names)
+            order = np.lexsort((periods, name_rank[codes]))
+            labels = pd.PeriodIndex.from_ordinals(periods[order], freq=FREQUENCIES[freq])
+            bars = pd.DataFrame({
+                "symbol": self.names[codes[order]],
+                "period": labels,
+                **{name: _price(fields[name][order]) for name in PRICE_COLUMNS},
+                "volume": fields["volume"][order],
+                "days": fields["days"][order],
+                "bars": fields["bars"][order],
+            }, index=pd.DatetimeIndex(labels.start_time, name="ts_event").tz_localize("UTC"))
+        return bars[BAR_COLUMNS]
+
+    def resample(self, freqs=("D", "W", "M", "Q")):
+        """
+        Varias temporalidades de una vez: temporalidad -> DataFrame de bars()
+        """
+        return {freq: self.bars(freq) for freq in freqs}
+
+    def monthly_aggregate(self, symbols=None):
+        """
+        Promedios mensuales de siempre (MONTHLY_COLUMNS) a partir de las barras de sesión
+
+        Con barras ohlcv-1d de entrada da lo mismo que monthly_aggregate sobre
+        el DataFrame; con barras más finas, los promedios son de las barras
+        diarias armadas acá.
+        """
+        codes, days = self.codes, self.days
+        prices = {name: self.fields[name] for name in PRICE_COLUMNS}
+        volume = self.fields["volume"]
+        if symbols is not None:
+            keep = np.isin(self.names, list(symbols))[codes]
+            codes, days, volume = codes[keep], days[keep], volume[keep]
+            prices = {name: values[keep] for name, values in prices.items()}
+
+        part = monthly_engine.monthly_sums(codes, days * _DAY_NS, prices, volume)
+        codes, months, sums = monthly_engine.merge_sums([part])
+        return monthly_engine.finalize_sums(codes, months, sums, self.names)
+
+
+def session_days(ts, tz=SESSION_TZ, session_start=SESSION_START):
+    """
+    Día de sesión (días desde 1970-01-01) de cada timestamp en nanosegundos UTC
+
+    La hora local se corre para que session_start caiga a la medianoche: con
+    17:00, las 16:59 del lunes son del lunes y las 17:00 ya son del martes.
+    """
+    if session_start is None:
+        return np.floor_divide(ts, _DAY_NS)
+    local = pd.DatetimeIndex(ts, tz="UTC").tz_convert(tz).tz_localize(None).asi8
+    hours, minutes = map(int, session_start.split(":"))
+    shift = _DAY_NS - pd.Timedelta(hours=hours, minutes=minutes).value
+    return np.floor_divide(local + shift, _DAY_NS)
+
+
+def _daily(codes, days, ts, prices, volume):
+    fields = {
+        "first_ts": ts,
+        "last_ts": ts,
+        **prices,
+        "volume": volume.astype(np.uint64, copy=False),
+        "bars": np.ones(len(ts), dtype=np.int64),
+    }
+    return _reduce(codes, days, fields)
+
+
+def _merge_daily(parts):
+    if not parts:
+        empty = np.empty(0, dtype=np.int64)
+        fields = {name: empty for name in ("first_ts", "last_ts", *PRICE_COLUMNS, "bars")}
+        return empty, empty, {**fields, "volume": np.empty(0, dtype=np.uint64)}
+    if len(parts) == 1:
+        return parts[0]
+    # Un mismo (símbolo, día) puede quedar repartido entre bloques: se vuelve a reducir
+    codes = np.concatenate([p[0] for p in parts])
+    days = np.concatenate([p[1] for p in parts])
+    fields = {name: np.concatenate([p[2][name] for p in parts]) for name in parts[0][2]}
+    return _reduce(codes, days, fields)
+
+
+def _reduce(codes, periods, fields):
+    # Una fila por (código, período): primer open, máximo high, mínimo low, último close
+    # (los precios UNDEF_PRICE no cuentan; si ninguno está definido queda UNDEF_PRICE)
+    if len(codes) == 0:
+        return codes, periods, fields
+
+    first = periods.min()
+    keys = codes * (periods.max() - first + 1) + (periods - first)
+    order = np.lexsort((fields["first_ts"], keys))
+    ordered = keys[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    reduced = {
+        "first_ts": fields["first_ts"][order][starts],
+        "open": _first_defined(fields["open"][order], starts, ends),
+        "high": _max_defined(fields["high"][order], starts),
+        # UNDEF_PRICE es el máximo int64: el mínimo ya lo deja afuera
+        "low": np.minimum.reduceat(fields["low"][order], starts),
+    }
+    for name in ("volume", "bars", "days"):
+        if name in fields:
+            reduced[name] = np.add.reduceat(fields[name][order], starts)
+
+    # El último close va por last_ts (en barras finas es el mismo orden)
+    if fields["last_ts"] is not fields["first_ts"]:
+        last = np.lexsort((fields["last_ts"], keys))
+    else:
+        last = order
+    reduced["last_ts"] = fields["last_ts"][last][ends]
+    reduced["close"] = _last_defined(fields["close"][last], starts, ends)
+
+    rows = order[starts]
+    return codes[rows], periods[rows], reduced
+
+
+def _first_defined(values, starts, ends):
+    # Primer precio definido de cada grupo ordenado
+    position = np.where(values != UNDEF_PRICE, np.arange(len(values)), len(values))
+    first = np.minimum.reduceat(position, starts)
+    return np.where(first <= ends, values[np.minimum(first, len(values) - 1)], np.int64(UNDEF_PRICE))
+
+
+def _last_defined(values, starts, ends):
+    # Último precio definido de cada grupo ordenado
+    position = np.where(values != UNDEF_PRICE, np.arange(len(values)), -1)
+    last = np.maximum.reduceat(position, starts)
+    return np.where(last >= starts, values[np.maximum(last, 0)], np.int64(UNDEF_PRICE))
+
+
+def _max_defined(values, starts):
+    # Máximo sin los UNDEF_PRICE (que son el máximo int64)
+    lowest = np.iinfo(np.int64).min
+    top = np.maximum.reduceat(np.where(values != UNDEF_PRICE, values, lowest), starts)
+    return np.where(top != lowest, top, np.int64(UNDEF_PRICE))
+
+
+def _price(values):
+    # Punto fijo -> float, con NaN donde el precio no está definido
+    return np.where(values != UNDEF_PRICE, values / FIXED_PRICE_SCALE, np.nan)
+
+
+def _periods(days, freq):
+    # Ordinal del período (semana, mes, trimestre) de cada día de sesión
+    dates = pd.DatetimeIndex(days.astype("datetime64[D]"))
+    return dates.to_period(FREQUENCIES[freq]).asi8
+
+
+def _name_rank(names):
+    rank = np.empty(len(names), dtype=np.int64)
+    rank[np.argsort(names.astype(str), kind="stable")] = np.arange(len(names))
+    return rank
+
+
+def main(symbols, stype_in, schema, start, end, freqs, last, averages, export=()):
+    print(f"📥 Descargando {schema} de {', '.join(symbols)} desde {start}")
+    try:
+        data = fetch.get_range(DATASET, schema, symbols, start, end, stype_in=stype_in)
+    except Exception as e:
+        print(f"❌ {e}")
+        return
+
+    session = SessionBars.from_range(data)
+    if session.empty:
+        print("❌ No hay barras en el rango pedido")
+        return
+
+    titles = {"D": "Diarias (sesión)", "W": "Semanales", "M": "Mensuales", "Q": "Trimestrales"}
+    result = report.Report(f"Barras remuestreadas desde {schema}",
+                           meta={"symbols": symbols, "schema": schema, "start": start, "end": end})
+    for freq, bars in session.resample(freqs).items():
+        table = report.latest_by(bars, "symbol", last).reset_index(drop=True)
+        table["period"] = table["period"].astype(str)
+        result.add(freq, f"{titles[freq]} - últimos {last} períodos", table)
+    if averages:
+        monthly = report.latest_by(session.monthly_aggregate(), "symbol", last).copy()
+        monthly["month_year"] = monthly["month_year"].astype(str)
+        result.add("monthly_avg", "Promedios mensuales (misma pasada)", monthly)
+
+    print(result.render("console"), end="")
+    for path in export:
+        result.write(path)
+        print(f"💾 Reporte guardado en: {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Barras diarias/semanales/mensuales/trimestrales desde barras finas")
+    parser.add_argument("symbols", nargs="*", default=["ZC.c.0"], help="Símbolos (por defecto ZC.c.0)")
+    parser.add_argument("--stype", default="continuous", help="stype_in de los símbolos")
+    parser.add_argument("--schema", default="ohlcv-1m", help="Granularidad a descargar")
+    parser.add_argument("--start", default="2025-01-01")
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--freq", nargs="+", default=list(FREQUENCIES), choices=list(FREQUENCIES))
+    parser.add_argument("--last", type=int, default=5, help="Períodos a mostrar por símbolo")
+    parser.add_argument("--averages", action="store_true",
+                        help="Agregar los promedios mensuales calculados de las mismas barras")
+    report.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    with instrumentation.session("resample", args.report, args.profile):
+        main(args.symbols, args.stype, args.schema, args.start, args.end, args.freq, args.last,
+             args.averages, export=args.export)
@@ -0,0 +1,60 @@
+import pandas as pd
+
+# Registros por bloque: fija la memoria máxima de la lectura por bloques
+CHUNK_SIZE = 100_000
+
+
+def iter_bars(data, chunk_size=CHUNK_SIZE):
+    """
+    Recorrer un resultado de get_range por bloques sin armar el DataFrame completo
+
+    Args:
+        data: CachedRange (fetch.get_range) o DBNStore
+        chunk_size: Máximo de registros por bloque
+
+    Yields:
+        DataFrames con ts_event como columna (igual que fetch_data de los scripts)
+    """
+    if hasattr(data, "iter_df"):
+        chunks = data.iter_df(count=chunk_size)
+    else:
+        chunks = data.to_df(count=chunk_size)
+
+    for chunk in chunks:
+        if not chunk.empty:
+            yield chunk.reset_index()
+
+
+class RecentBars:
+    """
+    Últimas n barras de cada símbolo, mantenidas bloque a bloque
+
+    Equivale a df.groupby("symbol").tail(n) sobre todas las barras, pero solo
+    guarda n filas por símbolo.
+    """
+
+    def __init__(self, n, symbols=None):
+        self.n = n
+        self.symbols = symbols
+        self.bars = pd.DataFrame()
+
+    def update(self, chunk):
+        if self.symbols is not None:
+            chunk = chunk[chunk["symbol"].isin(self.symbols)]
+        if chunk.empty:
+            return self
+
+        frames = [chunk] if self.bars.empty else [self.bars, chunk]
+        self.bars = (
+            pd.concat(frames, ignore_index=True)
+            .sort_values("ts_event", kind="stable")
+            .groupby("symbol", sort=False)
+            .tail(self.n)
+        )
+        return self
+
+    def last(self, column="close"):
+        """
+        Último valor de cada símbolo (por ejemplo el precio actual de la curva)
+        """
+        return self.bars.groupby("symbol")[column].last()
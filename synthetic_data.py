@@ -0,0 +1,212 @@
+from types import SimpleNamespace
+import databento as db
+import databento_dbn as dbn
+import numpy as np
+import pandas as pd
+
+# Raíces con nombre real; a partir de la séptima se usan R6, R7...
+ROOT_NAMES = ["ZC", "ZS", "ZW", "KE", "ZM", "ZL"]
+
+# Sesión diurna de granos en CME (8:30-13:20 CT) expresada en UTC
+SESSION_START_MINUTE = 14 * 60 + 30
+SESSION_MINUTES = 290
+
+# Schema -> (schema DBN, rtype de las barras)
+SCHEMAS = {
+    "ohlcv-1d": (dbn.Schema.OHLCV_1D, dbn.RType.OHLCV_1D),
+    "ohlcv-1m": (dbn.Schema.OHLCV_1M, dbn.RType.OHLCV_1M),
+}
+
+# Precios en múltiplos de un cuarto de centavo, como los granos de CBOT
+TICK_SIZE = 0.25
+
+_PUBLISHER_GLBX = 1
+_FIRST_INSTRUMENT_ID = 100_000
+
+
+def root_names(count):
+    """
+    Nombres de `count` raíces sintéticas (ZC, ZS, ... y luego R6, R7...)
+    """
+    return [ROOT_NAMES[i] if i < len(ROOT_NAMES) else f"R{i}" for i in range(count)]
+
+
+def continuous_symbols(roots, ranks):
+    """
+    Contratos continuos root.c.0 ... root.c.{ranks-1} de cada raíz
+    """
+    return [f"{root}.c.{rank}" for root in roots for rank in range(ranks)]
+
+
+def bar_times(start, end, schema="ohlcv-1d"):
+    """
+    ts_event (ns UTC) de todas las barras de días hábiles en [start, end)
+
+    Las barras diarias van a medianoche UTC, como las de ohlcv-1d; las de un
+    minuto cubren la sesión diurna.
+    """
+    days = pd.bdate_range(start, end, inclusive="left").as_unit("ns").asi8
+    if schema == "ohlcv-1d":
+        return days
+
+    minutes = (SESSION_START_MINUTE + np.arange(SESSION_MINUTES)) * 60_000_000_000
+    return (days[:, None] + minutes[None, :]).ravel()
+
+
+class SyntheticBars:
+    """
+    Universo de barras OHLCV sintéticas y reproducibles
+
+    Genera un camino aleatorio por contrato continuo para N raíces x M
+    posiciones entre start y end. Las barras se guardan ya codificadas como
+    registros DBN (ordenados por ts_event), así que cualquier subrango que se
+    pida sale idéntico en todas las llamadas.
+
+    Args:
+        roots: Lista de raíces (ver root_names)
+        ranks: Posiciones de la curva por raíz (c.0 ... c.{ranks-1})
+        start, end: Rango [start, end) de las barras
+        schema: "ohlcv-1d" u "ohlcv-1m"
+        seed: Semilla del generador
+    """
+
+    def __init__(self, roots, ranks, start, end, schema="ohlcv-1d", seed=0):
+        if schema not in SCHEMAS:
+            raise ValueError(f"Schema no soportado: {schema} (usar {', '.join(SCHEMAS)})")
+
+        self.roots = list(roots)
+        self.ranks = ranks
+        self.start = _utc(start)
+        self.end = _utc(end)
+        self.schema = schema
+        self.symbols = continuous_symbols(self.roots, ranks)
+        self.instrument_ids = {
+            symbol: _FIRST_INSTRUMENT_ID + i for i, symbol in enumerate(self.symbols)
+        }
+        self.records = self._generate(seed)
+
+    @property
+    def nbytes(self):
+        return self.records.nbytes
+
+    def _generate(self, seed):
+        rng = np.random.default_rng(seed)
+        times = bar_times(self.start, self.end, self.schema)
+        n_times, n_symbols = len(times), len(self.symbols)
+
+        # Nivel inicial según raíz y posición (contango suave) y volatilidad por barra
+        base = np.array([
+            400.0 + 150.0 * (i // self.ranks) + 8.0 * (i % self.ranks)
+            for i in range(n_symbols)
+        ])
+        volatility = 0.012 if self.schema == "ohlcv-1d" else 0.012 / np.sqrt(SESSION_MINUTES)
+
+        close = base * np.exp(np.cumsum(rng.normal(0, volatility, (n_times, n_symbols)), axis=0))
+        open_ = np.vstack([base, close[:-1]])
+        spread = np.abs(rng.normal(0, volatility, (n_times, n_symbols))) * close
+        high = np.maximum(open_, close) + spread
+        low = np.minimum(open_, close) - spread
+
+        records = np.zeros(n_times * n_symbols, dtype=dbn.OHLCVMsg._dtypes)
+        records["length"] = dbn.OHLCVMsg.size_hint // 4
+        records["rtype"] = int(SCHEMAS[self.schema][1])
+        records["publisher_id"] = _PUBLISHER_GLBX
+        records["instrument_id"] = np.tile(list(self.instrument_ids.values()), n_times)
+        records["ts_event"] = np.repeat(times, n_symbols)
+        for field, values in (("open", open_), ("high", high), ("low", low), ("close", close)):
+            records[field] = _fixed_price(values).ravel()
+        records["volume"] = rng.integers(100, 50_000, n_times * n_symbols)
+
+        return records
+
+    def to_store(self, symbols=None, start=None, end=None, stype_in="continuous"):
+        """
+        DBNStore con los símbolos y fechas [start, end) pedidos
+
+        Los símbolos que no existen en el universo simplemente no traen
+        registros, como en la API.
+        """
+        symbols = self.symbols if symbols is None else [s for s in symbols if s in self.instrument_ids]
+        start = self.start if start is None else _utc(start)
+        end = self.end if end is None else _utc(end)
+
+        ts = self.records["ts_event"]
+        lo, hi = np.searchsorted(ts, [start.value, end.value])
+        records = self.records[lo:hi]
+        ids = np.array([self.instrument_ids[s] for s in symbols], dtype=records["instrument_id"].dtype)
+        records = records[np.isin(records["instrument_id"], ids)]
+
+        interval_end = (end + pd.Timedelta(days=1)).date()
+        mappings = [
+            SimpleNamespace(raw_symbol=symbol, intervals=[SimpleNamespace(
+                start_date=start.date(), end_date=interval_end, symbol=str(self.instrument_ids[symbol]),
+            )])
+            for symbol in symbols
+        ]
+
+        metadata = dbn.Metadata(
+            dataset="GLBX.MDP3",
+            start=start.value,
+            end=end.value,
+            stype_in=dbn.SType(str(stype_in)),
+            stype_out=dbn.SType.INSTRUMENT_ID,
+            schema=SCHEMAS[self.schema][0],
+            symbols=list(symbols),
+            mappings=mappings,
+        )
+        return db.DBNStore.from_bytes(bytes(metadata) + records.tobytes())
+
+
+class LocalHistorical:
+    """
+    Reemplazo local de db.Historical que sirve get_range desde universos sintéticos
+
+    Se usa con fetch.set_client(); cuenta las llamadas y los bytes servidos.
+
+    Args:
+        universes: SyntheticBars o lista de ellos (uno por schema)
+    """
+
+    def __init__(self, universes):
+        if isinstance(universes, SyntheticBars):
+            universes = [universes]
+        self.universes = {universe.schema: universe for universe in universes}
+        self.timeseries = _LocalTimeseries(self)
+        self.calls = 0
+        self.bytes_served = 0
+
+
+class _LocalTimeseries:
+
+    def __init__(self, client):
+        self.client = client
+
+    def get_range(self, dataset, schema, symbols, start, end=None, stype_in="raw_symbol",
+                  path=None, **kwargs):
+        universe = self.client.universes.get(str(schema))
+        if universe is None:
+            raise ValueError(f"No hay datos sintéticos para el schema {schema}")
+
+        if isinstance(symbols, str):
+            symbols = [s.strip() for s in symbols.split(",")]
+
+        store = universe.to_store(symbols, start, end, stype_in)
+        self.client.calls += 1
+        self.client.bytes_served += store.nbytes
+
+        if path is not None:
+            store.to_file(path)
+        return store
+
+    async def get_range_async(self, *args, **kwargs):
+        return self.get_range(*args, **kwargs)
+
+
+def _fixed_price(values):
+    # Redondear al tick y pasar a punto fijo (1e-9) como los precios DBN
+    return (np.round(values / TICK_SIZE) * TICK_SIZE * 1e9).astype(np.int64)
+
+
+def _utc(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+import bar_store
+
+# Valores de structure(): contrato lejano más caro / no más caro / sin precio
+CONTANGO = 1
+BACKWARDATION = -1
+UNKNOWN = 0
+
+
+class TermStructure:
+    """
+    Curva de futuros de varias raíces como matriz raíces x fechas x posiciones
+
+    Cada celda es el precio (close por defecto) del contrato continuo
+    ROOT.c.{rank} en esa fecha, o NaN si ese día no hubo barra. Los spreads
+    de calendario de todos los pares de posiciones y la estructura
+    (contango/backwardation) se calculan para toda la historia en una sola
+    operación sobre la matriz.
+
+    Args:
+        roots: Lista de raíces (primer eje)
+        dates: DatetimeIndex UTC ordenado (segundo eje)
+        ranks: Cantidad de posiciones (tercer eje: c.0 ... c.{ranks-1})
+        prices: ndarray (raíces, fechas, posiciones)
+    """
+
+    def __init__(self, roots, dates, ranks, prices):
+        self.roots = list(roots)
+        self.dates = dates
+        self.ranks = ranks
+        self.prices = prices
+        self._root_index = {root: i for i, root in enumerate(self.roots)}
+        self._filled = None
+
+    @classmethod
+    def from_bars(cls, df, column="close", roots=None):
+        """
+        Armar la matriz desde barras de contratos continuos (to_df() o fetch_data)
+
+        Los símbolos que no son continuos (ZCZ5) se ignoran. Si hay dos barras
+        para la misma fecha y contrato, queda la última.
+
+        Args:
+            df: Barras con symbol y ts_event (columna o índice)
+            column: Columna de precio a usar
+            roots: Raíces a incluir, en este orden (por defecto todas, ordenadas)
+        """
+        ts = df["ts_event"] if "ts_event" in df.columns else df.index.to_series()
+        ts = pd.to_datetime(ts, utc=True).dt.tz_localize(None)
+
+        # Separar raíz y posición una vez por símbolo, no por fila
+        codes, symbols = pd.factorize(df["symbol"], sort=False)
+        parts = [bar_store.split_symbol(symbol) for symbol in symbols]
+        symbol_roots = np.array([root for root, _ in parts], dtype=object)
+        symbol_ranks = np.array([rank for _, rank in parts], dtype=np.int64)
+
+        if roots is None:
+            roots = sorted(set(symbol_roots[symbol_ranks >= 0]))
+        root_index = {root: i for i, root in enumerate(roots)}
+        symbol_root_idx = np.array([root_index.get(root, -1) for root in symbol_roots], dtype=np.int64)
+
+        keep = (codes >= 0)
+        keep[keep] = (symbol_ranks[codes[keep]] >= 0) & (symbol_root_idx[codes[keep]] >= 0)
+        codes = codes[keep]
+
+        day_values, date_idx = np.unique(ts.to_numpy()[keep], return_inverse=True)
+        dates = pd.DatetimeIndex(day_values).tz_localize("UTC")
+        ranks = int(symbol_ranks[codes].max()) + 1 if len(codes) else 0
+
+        prices = np.full((len(roots), len(dates), ranks), np.nan)
+        prices[symbol_root_idx[codes], date_idx, symbol_ranks[codes]] = (
+            df[column].to_numpy(dtype=float)[keep]
+        )
+
+        return cls(roots, dates, ranks, prices)
+
+    def symbols(self, root):
+        return [f"{root}.c.{rank}" for rank in range(self.ranks)]
+
+    def pairs(self):
+        """
+        Pares de posiciones (cercana, lejana) en el orden del último eje de spreads()
+        """
+        near, far = np.triu_indices(self.ranks, k=1)
+        return list(zip(near.tolist(), far.tolist()))
+
+    def spreads(self, adjacent=False):
+        """
+        Spreads de calendario lejano - cercano de todos los pares y todas las fechas
+
+        Returns:
+            ndarray (raíces, fechas, pares) con el orden de pairs(), o solo los
+            pares consecutivos (c.0-c.1, c.1-c.2...) si adjacent=True
+        """
+        if adjacent:
+            return np.diff(self.prices, axis=2)
+        near, far = np.triu_indices(self.ranks, k=1)
+        return self.prices[:, :, far] - self.prices[:, :, near]
+
+    def structure(self, front=0, far=None):
+        """
+        CONTANGO (1) / BACKWARDATION (-1) de cada raíz y fecha, UNKNOWN (0) sin precios
+
+        Compara la posición far (por defecto la última) con front, igual que
+        maiz_2026_analysis.curve_structure.
+        """
+        far = self.ranks - 1 if far is None else far
+        front_prices = self.prices[:, :, front]
+        far_prices = self.prices[:, :, far]
+
+        flags = np.where(far_prices > front_prices, CONTANGO, BACKWARDATION).astype(np.int8)
+        flags[np.isnan(front_prices) | np.isnan(far_prices)] = UNKNOWN
+        return flags
+
+    def pair_structure(self):
+        """
+        Contango/backwardation de cada par de posiciones (mismo eje que spreads())
+        """
+        spreads = self.spreads()
+        flags = np.where(spreads > 0, CONTANGO, BACKWARDATION).astype(np.int8)
+        flags[np.isnan(spreads)] = UNKNOWN
+        return flags
+
+    @property
+    def filled(self):
+        """
+        Precios con el último valor conocido de cada contrato hacia adelante
+        """
+        if self._filled is None:
+            valid = ~np.isnan(self.prices)
+            last = np.where(valid, np.arange(len(self.dates))[None, :, None], 0)
+            np.maximum.accumulate(last, axis=1, out=last)
+            self._filled = np.take_along_axis(self.prices, last, axis=1)
+        return self._filled
+
+    def curve(self, date=None, root=None):
+        """
+        Curva completa en una fecha: último precio de cada posición hasta esa fecha
+
+        Args:
+            date: Fecha de consulta (por defecto la última)
+            root: Raíz; si es None se devuelve un DataFrame raíces x posiciones
+
+        Returns:
+            Series símbolo -> precio (NaN si el contrato no tuvo barras hasta date)
+        """
+        if date is None:
+            row = len(self.dates) - 1
+        else:
+            date = pd.Timestamp(date)
+            date = date.tz_localize("UTC") if date.tz is None else date.tz_convert("UTC")
+            row = self.dates.searchsorted(date, side="right") - 1
+        if row < 0:
+            raise KeyError(f"No hay precios hasta {date}")
+
+        if root is not None:
+            return pd.Series(self.filled[self._root_index[root], row], index=self.symbols(root), name=self.dates[row])
+
+        return pd.DataFrame(self.filled[:, row], index=self.roots,
+                            columns=[f"c.{rank}" for rank in range(self.ranks)])
+
+    def spread_table(self, root, adjacent=True):
+        """
+        Spreads de una raíz como DataFrame fechas x pares ("ZC.c.0-ZC.c.1")
+        """
+        pairs = [(r, r + 1) for r in range(self.ranks - 1)] if adjacent else self.pairs()
+        values = self.spreads(adjacent=adjacent)[self._root_index[root]]
+        columns = [f"{root}.c.{near}-{root}.c.{far}" for near, far in pairs]
+        return pd.DataFrame(values, index=self.dates, columns=columns)
+
+    def structure_share(self, root=None):
+        """
+        Fracción de las fechas con precio en que cada raíz estuvo en contango
+        """
+        flags = self.structure()
+        known = (flags != UNKNOWN).sum(axis=1)
+        share = pd.Series((flags == CONTANGO).sum(axis=1) / np.maximum(known, 1), index=self.roots)
+        return share if root is None else share[root]
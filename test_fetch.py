@@ -0,0 +1,58 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+import dbn_cache
+import fetch
+import synthetic_data
+
+
+class CoalesceTest(unittest.TestCase):
+
+    def setUp(self):
+        universe = synthetic_data.SyntheticBars(synthetic_data.root_names(2), 1, "2024-01-01", "2024-03-01",
+                                                "ohlcv-1d", 0)
+        self.symbols = universe.symbols
+        self.client = synthetic_data.LocalHistorical(universe)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved = fetch._client, dbn_cache.CACHE_DIR, fetch.COALESCE_WINDOW
+        fetch.set_client(self.client)
+        dbn_cache.CACHE_DIR = Path(self.tmp.name)
+        # Ventana amplia para que el test no dependa de cuánto tarda en arrancar cada hilo
+        fetch.COALESCE_WINDOW = 0.2
+
+    def tearDown(self):
+        fetch._client, dbn_cache.CACHE_DIR, fetch.COALESCE_WINDOW = self.saved
+        self.tmp.cleanup()
+
+    def get(self, symbols):
+        return fetch.get_range("GLBX.MDP3", "ohlcv-1d", symbols, "2024-01-01", "2024-03-01",
+                               stype_in="continuous")
+
+    def test_concurrent_requests_share_one_download(self):
+        barrier = threading.Barrier(len(self.symbols))
+        results = {}
+
+        def run(symbol):
+            barrier.wait()
+            results[symbol] = self.get([symbol]).to_df()
+
+        threads = [threading.Thread(target=run, args=(symbol,)) for symbol in self.symbols]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.client.calls, 1)
+        for symbol, df in results.items():
+            self.assertFalse(df.empty)
+            self.assertEqual(set(df["symbol"]), {symbol})
+
+    def test_cached_range_is_not_downloaded_again(self):
+        self.get(self.symbols)
+        self.get(self.symbols[:1])
+        self.assertEqual(self.client.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
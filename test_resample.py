@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import pandas as pd
+from databento_dbn import UNDEF_PRICE
+from compact_bars import CompactBars
+import resample
+
+
+def _bars(rows):
+    # rows: (ts, open, high, low, close) con precios en punto fijo
+    ts = pd.DatetimeIndex([row[0] for row in rows], tz="UTC").as_unit("ns").asi8
+    prices = {name: np.array([row[i] for row in rows], dtype=np.int64)
+              for i, name in enumerate(("open", "high", "low", "close"), start=1)}
+    return CompactBars(ts, pd.Categorical(["ZC.c.0"] * len(rows)), prices, np.ones(len(rows), dtype=np.uint32))
+
+
+class UndefPriceTest(unittest.TestCase):
+
+    def test_undefined_prices_are_left_out(self):
+        bars = _bars([
+            ("2025-03-03 14:00", UNDEF_PRICE, UNDEF_PRICE, 400, 410),
+            ("2025-03-03 15:00", 405, 420, 395, 415),
+            ("2025-03-03 16:00", 415, 418, UNDEF_PRICE, UNDEF_PRICE),
+        ])
+        daily = resample.SessionBars.from_compact(bars, session_start=None).bars("D")
+        row = daily.iloc[0]
+        self.assertEqual(row["open"], 405e-9)
+        self.assertEqual(row["high"], 420e-9)
+        self.assertEqual(row["low"], 395e-9)
+        self.assertEqual(row["close"], 415e-9)
+        self.assertEqual(row["bars"], 3)
+
+    def test_undefined_group_is_nan(self):
+        bars = _bars([
+            ("2025-03-03 14:00", 405, UNDEF_PRICE, 395, 415),
+            ("2025-03-04 14:00", UNDEF_PRICE, UNDEF_PRICE, UNDEF_PRICE, UNDEF_PRICE),
+        ])
+        session = resample.SessionBars.from_compact(bars, session_start=None)
+        daily = session.bars("D")
+        self.assertTrue(daily[["open", "high", "low", "close"]].iloc[1].isna().all())
+        self.assertTrue(np.isnan(daily["high"].iloc[0]))
+
+        weekly = session.bars("W").iloc[0]
+        self.assertEqual(weekly["open"], 405e-9)
+        self.assertTrue(np.isnan(weekly["high"]))
+        self.assertEqual(weekly["low"], 395e-9)
+        self.assertEqual(weekly["close"], 415e-9)
+
+
+if __name__ == "__main__":
+    unittest.main()
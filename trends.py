@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+# Columnas que agrega rolling_trends
+TREND_COLUMNS = ["slope", "intercept", "r2", "n"]
+
+
+class RollingTrend:
+    """
+    Regresión lineal móvil (y = intercept + slope * x) en cada fila
+
+    x es la posición de la fila dentro de su serie y el intercepto se mide en
+    el inicio de la ventana, igual que np.polyfit(range(len(ventana)), ventana, 1).
+
+    Attributes:
+        slope, intercept, r2: ndarrays con una fila por observación (NaN si la
+            ventana tiene menos de min_periods valores)
+        n: Valores válidos en cada ventana
+        span: Filas que abarca cada ventana (incluidas las NaN)
+    """
+
+    def __init__(self, slope, intercept, r2, n, span):
+        self.slope = slope
+        self.intercept = intercept
+        self.r2 = r2
+        self.n = n
+        self.span = span
+
+    def project(self, steps):
+        """
+        Valor de la recta `steps` filas después del final de cada ventana
+        """
+        return self.intercept + self.slope * (self.span - 1 + np.asarray(steps))
+
+
+def rolling_ols(values, window, groups=None, min_periods=2):
+    """
+    Pendiente, intercepto y R² de ventanas móviles para muchas series en O(n)
+
+    Las sumas de cada ventana (n, Σx, Σx², Σy, Σy², Σxy) salen de restar dos
+    sumas acumuladas, así que el costo no depende del tamaño de la ventana ni
+    de la cantidad de series. Las sumas de x se llevan en enteros (exactas);
+    las de y se centran por serie y se acumulan en long double para no perder
+    precisión en historias de millones de filas.
+
+    Args:
+        values: Valores de todas las series una detrás de otra (NaN = sin dato)
+        window: Filas por ventana (las primeras de cada serie usan las que hay)
+        groups: Código de serie de cada fila, con las series contiguas (None = una sola)
+        min_periods: Valores válidos mínimos para devolver una recta
+
+    Returns:
+        RollingTrend
+    """
+    y = np.asarray(values, dtype=float)
+    rows = np.arange(len(y))
+
+    if groups is None:
+        codes = np.zeros(len(y), dtype=np.int64)
+    else:
+        codes = pd.factorize(np.asarray(groups), sort=False)[0]
+    first = np.r_[True, codes[1:] != codes[:-1]] if len(y) else np.zeros(0, dtype=bool)
+    group_start = np.maximum.accumulate(np.where(first, rows, 0))
+    window_start = np.maximum(rows - window + 1, group_start)
+
+    valid = ~np.isnan(y)
+    x = (rows - group_start) * valid
+
+    # Centrar y con la media de su serie: las sumas acumuladas quedan chicas
+    counts = np.bincount(codes, weights=valid, minlength=codes.max() + 1 if len(y) else 0)
+    sums = np.bincount(codes, weights=np.where(valid, y, 0.0), minlength=len(counts))
+    center = (sums / np.maximum(counts, 1))[codes]
+    yc = np.where(valid, y - center, 0.0).astype(np.longdouble)
+
+    def window_sum(series):
+        total = np.concatenate([np.zeros(1, dtype=series.dtype), np.cumsum(series)])
+        return total[rows + 1] - total[window_start]
+
+    n = window_sum(valid.astype(np.int64))
+    sx = window_sum(x)
+    sxx = window_sum(x * x)
+    sy = window_sum(yc)
+    syy = window_sum(yc * yc)
+    sxy = window_sum(x * yc)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # n·Σx² - (Σx)² es exacto en enteros; cero si todos los x son iguales
+        x_var = (n * sxx - sx * sx).astype(float)
+        cov = (n * sxy - sx * sy).astype(float)
+        y_var = (n * syy - sy * sy).astype(float)
+        sy = sy.astype(float)
+
+        slope = cov / x_var
+        x_start = (window_start - group_start).astype(float)
+        intercept = (sy / n + center[rows]) - slope * (sx / n - x_start)
+        r2 = cov * cov / (x_var * y_var)
+
+    fitted = (n >= min_periods) & (x_var > 0)
+    slope[~fitted] = np.nan
+    intercept[~fitted] = np.nan
+    r2[~fitted | ~(y_var > 0)] = np.nan
+
+    return RollingTrend(slope, intercept, r2, n, rows - window_start + 1)
+
+
+def rolling_trends(df, column="close", window=30, by="symbol", order="ts_event", min_periods=2):
+    """
+    rolling_ols sobre un DataFrame largo con varias series (una por símbolo)
+
+    Args:
+        df: Barras o tabla mensual con columnas by, column y order (u order como índice)
+        column: Valor a ajustar
+        window: Filas por ventana
+        by: Columna que identifica cada serie
+        order: Columna (o nombre del índice) que ordena las filas dentro de la serie
+
+    Returns:
+        DataFrame con by, order, column y las columnas de TREND_COLUMNS, ordenado
+        por serie y order
+    """
+    data = df.reset_index() if order not in df.columns else df
+    data = data[[by, order, column]].sort_values([by, order], kind="stable").reset_index(drop=True)
+
+    trend = rolling_ols(data[column].to_numpy(dtype=float), window, data[by].to_numpy(), min_periods)
+    data["slope"] = trend.slope
+    data["intercept"] = trend.intercept
+    data["r2"] = trend.r2
+    data["n"] = trend.n
+    return data
+
+
+def latest_trends(df, column="close", window=30, by="symbol", order="ts_event", min_periods=2):
+    """
+    Recta de la última ventana de cada serie (la de polyfit sobre tail(window))
+
+    Returns:
+        DataFrame indexado por serie con TREND_COLUMNS, solo las series con
+        al menos min_periods valores
+    """
+    trends = rolling_trends(df, column, window, by, order, min_periods)
+    latest = trends.groupby(by, sort=False).tail(1).set_index(by)[TREND_COLUMNS]
+    return latest.dropna(subset=["slope"])
@@ -0,0 +1,235 @@
+import heapq
+import json
+import os
+import uuid
+import pandas as pd
+from datetime import datetime, timezone
+import dbn_cache
+import fetch
+import instrumentation
+import streaming
+
+DATASET = "GLBX.MDP3"
+SCHEMA = "ohlcv-1d"
+
+# Formas de ordenar: volumen total del rango o promedio por día operado
+RANKINGS = ("total", "average")
+
+_COLUMNS = ["day", "instrument_id", "symbol", "volume"]
+
+
+class DailyVolume:
+    """
+    Volumen diario de cada instrumento de un símbolo padre (ZC.FUT: contratos y spreads)
+
+    Los registros se recorren por bloques y solo se guarda un total por día e
+    instrumento, así que la memoria depende de días x instrumentos y no de la
+    cantidad de registros (sirve igual para ohlcv-1m o trades). Los días ya
+    procesados se guardan en disco al lado del caché DBN: ampliar el rango o
+    correr una ventana móvil solo procesa los días nuevos.
+
+    Args:
+        parent: Símbolo padre (stype_in="parent")
+        schema: Schema con columna volume (o size para trades)
+    """
+
+    def __init__(self, parent="ZC.FUT", dataset=DATASET, schema=SCHEMA, chunk_size=streaming.CHUNK_SIZE):
+        self.parent = parent
+        self.dataset = dataset
+        self.schema = schema
+        self.chunk_size = chunk_size
+        self.path = dbn_cache.CACHE_DIR / dataset / schema / "volume" / parent
+        self.volumes, self.covered = self._load()
+
+    def update(self, start, end):
+        """
+        Procesar los días de [start, end) que todavía no están en el caché
+        """
+        days = _days(start, end)
+        missing = [day for day in days if day.strftime("%Y-%m-%d") not in self.covered]
+        if not missing:
+            return self
+
+        # Un get_range por tramo de días consecutivos que falta
+        runs = []
+        for day in missing:
+            if runs and day == runs[-1][1]:
+                runs[-1][1] = day + pd.Timedelta(days=1)
+            else:
+                runs.append([day, day + pd.Timedelta(days=1)])
+
+        # Los días que se vuelven a leer (el día en curso) reemplazan a la lectura anterior
+        kept = self.volumes[~self.volumes["day"].isin(missing)]
+        frames = [kept] + [self._scan(lo, hi) for lo, hi in runs]
+        self.volumes = pd.concat([f for f in frames if not f.empty] or [kept], ignore_index=True)
+
+        # El día en curso todavía puede cambiar: no se marca como procesado
+        today = pd.Timestamp(datetime.now(timezone.utc).date(), tz="UTC")
+        self.covered.update(day.strftime("%Y-%m-%d") for day in missing if day < today)
+        self._save(today)
+        return self
+
+    def _scan(self, lo, hi):
+        data = fetch.get_range(
+            dataset=self.dataset,
+            schema=self.schema,
+            stype_in="parent",
+            symbols=[self.parent],
+            start=lo,
+            end=hi,
+        )
+
+        partials = []
+        with instrumentation.span("volume_scan") as span:
+            for chunk in streaming.iter_bars(data, self.chunk_size):
+                volume = chunk["volume"] if "volume" in chunk.columns else chunk["size"]
+                day = chunk["ts_event"].dt.floor("D").rename("day")
+                partials.append(volume.groupby([day, chunk["instrument_id"], chunk["symbol"]], sort=False).sum())
+                span.add(records=len(chunk))
+
+        if not partials:
+            return pd.DataFrame(columns=_COLUMNS)
+
+        # Un mismo día puede venir repartido en dos bloques
+        daily = pd.concat(partials).groupby(level=[0, 1, 2], sort=False).sum()
+        return daily.rename("volume").reset_index()[_COLUMNS]
+
+    def days(self, start, end):
+        """
+        Volumen de cada instrumento en cada día de [start, end) (procesa lo que falte)
+        """
+        self.update(start, end)
+        start, end = dbn_cache._to_utc(start).floor("D"), dbn_cache._to_utc(end)
+        volumes = self.volumes
+        return volumes[(volumes["day"] >= start) & (volumes["day"] < end)]
+
+    def top(self, start, end, k=10, by="total", outrights_only=False):
+        """
+        Los k instrumentos con más volumen en [start, end)
+
+        Args:
+            by: "total" (volumen del rango) o "average" (promedio por día operado)
+            outrights_only: Excluir los spreads (ZCZ5-ZCH6)
+
+        Returns:
+            DataFrame indexado por instrument_id con symbol, volume, days y
+            average, de mayor a menor según by
+        """
+        # Cada fila es un día de un instrumento: se suman todas de una vez
+        totals = _Totals()
+        totals.add(self.days(start, end))
+        return totals.top(k, by, outrights_only)
+
+    def rolling_top(self, start, end, k=10, window=20, by="total", outrights_only=False):
+        """
+        Ranking de cada día con los últimos `window` días, actualizado día a día
+
+        Cada día suma el volumen del día que entra y resta el del que sale en
+        lugar de volver a sumar la ventana completa.
+
+        Yields:
+            (día, DataFrame como el de top()) para cada día con datos; la
+            ventana cuenta días con datos, no días corridos
+        """
+        volumes = self.days(start, end)
+        totals = _Totals()
+        window_days = []
+
+        for day, day_volumes in volumes.groupby("day", sort=True):
+            totals.add(day_volumes)
+            window_days.append(day_volumes)
+            if len(window_days) > window:
+                totals.remove(window_days.pop(0))
+            yield day, totals.top(k, by, outrights_only)
+
+    def _load(self):
+        index_path = self.path / "index.json"
+        if not index_path.exists():
+            return pd.DataFrame(columns=_COLUMNS), set()
+
+        with open(index_path) as f:
+            index = json.load(f)
+        volumes = pd.read_parquet(self.path / index["file"])
+        return volumes, set(index["covered"])
+
+    def _save(self, today):
+        self.path.mkdir(parents=True, exist_ok=True)
+        volumes = self.volumes[self.volumes["day"] < today]
+
+        # Archivo nuevo y después el índice (escritura atómica, como dbn_cache)
+        name = f"{uuid.uuid4().hex}.parquet"
+        volumes.to_parquet(self.path / name, index=False)
+        index_path = self.path / "index.json"
+        previous = json.loads(index_path.read_text())["file"] if index_path.exists() else None
+
+        tmp = self.path / f"index.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"file": name, "covered": sorted(self.covered)}, f)
+        os.replace(tmp, index_path)
+
+        if previous is not None:
+            (self.path / previous).unlink(missing_ok=True)
+
+
+class _Totals:
+    """
+    Volumen acumulado y días operados por instrumento dentro de una ventana
+    """
+
+    def __init__(self):
+        self.volume = {}
+        self.days = {}
+        self.symbols = {}
+
+    def add(self, day_volumes):
+        for instrument_id, symbol, volume in zip(day_volumes["instrument_id"], day_volumes["symbol"],
+                                                 day_volumes["volume"]):
+            self.volume[instrument_id] = self.volume.get(instrument_id, 0) + int(volume)
+            self.days[instrument_id] = self.days.get(instrument_id, 0) + 1
+            self.symbols[instrument_id] = symbol
+
+    def remove(self, day_volumes):
+        for instrument_id, volume in zip(day_volumes["instrument_id"], day_volumes["volume"]):
+            self.days[instrument_id] -= 1
+            if self.days[instrument_id] == 0:
+                del self.volume[instrument_id], self.days[instrument_id], self.symbols[instrument_id]
+            else:
+                self.volume[instrument_id] -= int(volume)
+
+    def top(self, k, by="total", outrights_only=False):
+        if by not in RANKINGS:
+            raise ValueError(f"Ranking no soportado: {by} (usar {', '.join(RANKINGS)})")
+
+        candidates = self.volume.keys()
+        if outrights_only:
+            candidates = (i for i in candidates if "-" not in self.symbols[i])
+        if by == "total":
+            key = self.volume.__getitem__
+        else:
+            key = lambda i: self.volume[i] / self.days[i]
+
+        # Heap de tamaño k: no se ordena la lista completa de instrumentos
+        best = heapq.nlargest(k, candidates, key=key)
+        return pd.DataFrame(
+            {
+                "symbol": [self.symbols[i] for i in best],
+                "volume": [self.volume[i] for i in best],
+                "days": [self.days[i] for i in best],
+                "average": [self.volume[i] / self.days[i] for i in best],
+            },
+            index=pd.Index(best, name="instrument_id"),
+        )
+
+
+def rank_by_volume(parent="ZC.FUT", start="2025-01-15", end="2025-03-15", top=10, by="total",
+                   outrights_only=False, schema=SCHEMA):
+    """
+    Los `top` instrumentos de un símbolo padre con más volumen en [start, end)
+    """
+    return DailyVolume(parent, schema=schema).top(start, end, top, by, outrights_only)
+
+
+def _days(start, end):
+    start = dbn_cache._to_utc(start).floor("D")
+    end = dbn_cache._to_utc(end)
+    return pd.date_range(start, end, freq="D", inclusive="left")